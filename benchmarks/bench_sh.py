@@ -0,0 +1,80 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Benchmark of running many short commands via csspin.sh.
+
+Runs ``sh("true")`` repeatedly inside a subprocess environment that
+activates a virtual environment-like setup by modifying os.environ, once
+reusing the cached environment snapshot and once invalidating it before
+each call, which is what sh did before the snapshot was introduced.
+
+Usage: python benchmarks/bench_sh.py [-n 1000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+import time
+from typing import Generator
+
+import csspin
+from csspin.cli import load_minimal_tree
+
+
+@contextlib.contextmanager
+def activate_venv(venv: str) -> Generator:
+    """Activate a fake virtual environment, similar to what environment
+    providing plugins do."""
+    saved = os.environ.copy()
+    os.environ["VIRTUAL_ENV"] = venv
+    os.environ["PATH"] = os.pathsep.join(
+        (os.path.join(venv, "bin"), os.environ.get("PATH", ""))
+    )
+    os.environ.pop("PYTHONHOME", None)
+    try:
+        yield
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+def run(n: int, invalidate: bool) -> float:
+    command = "cmd /c exit 0" if sys.platform == "win32" else "true"
+    start = time.perf_counter()
+    for _ in range(n):
+        if invalidate:
+            csspin.invalidate_subprocess_environment()
+        csspin.sh(command, silent=True)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", type=int, default=1000, help="number of sh calls")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        spinfile = os.path.join(tmpdir, "spinfile.yaml")
+        with open(spinfile, "w", encoding="utf-8") as f:
+            f.write("spin:\n  project_name: bench\n")
+        cfg = load_minimal_tree(spinfile, cwd=tmpdir, verbosity=csspin.Verbosity.QUIET)
+        venv = os.path.join(tmpdir, "venv")
+        cfg.spin.subprocess_environment = lambda: activate_venv(venv)
+
+        uncached = run(args.n, invalidate=True)
+        cached = run(args.n, invalidate=False)
+
+    print(f"{args.n} x sh(): activated per call: {uncached:.3f}s")
+    print(f"{args.n} x sh(): cached snapshot:    {cached:.3f}s")
+    print(f"speedup: {uncached / cached:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
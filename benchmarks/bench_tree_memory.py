@@ -0,0 +1,83 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Benchmark of the memory retained by configuration trees and schemas.
+
+Loads a synthetic YAML document with 10k settings (100 subtrees of 100
+keys each) as configuration tree and builds a schema of the same shape,
+measuring the memory retained by both via tracemalloc.
+
+Usage: python benchmarks/bench_tree_memory.py [--subtrees 100] [--keys 100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+from csspin import schema, tree
+
+
+def write_yaml(fn: str, subtrees: int, keys: int) -> None:
+    with open(fn, "w", encoding="utf-8") as f:
+        for i in range(subtrees):
+            f.write(f"plugin{i}:\n")
+            for j in range(keys):
+                f.write(f"  key{j}: value{j}\n")
+
+
+def write_schema(fn: str, subtrees: int, keys: int) -> None:
+    with open(fn, "w", encoding="utf-8") as f:
+        for i in range(subtrees):
+            f.write(f"plugin{i}:\n  type: object\n  help: Plugin {i}\n")
+            f.write("  properties:\n")
+            for j in range(keys):
+                f.write(f"    key{j}:\n      type: str\n")
+                f.write(f"      help: Setting {j}\n      default: value{j}\n")
+
+
+def measure(func, *args) -> tuple:  # type: ignore[no-untyped-def]
+    """Return the result of `func` and the memory it retains."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func(*args)
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--subtrees", type=int, default=100)
+    parser.add_argument("--keys", type=int, default=100)
+    args = parser.parse_args()
+    total = args.subtrees * args.keys
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        data = os.path.join(tmpdir, "spinfile.yaml")
+        write_yaml(data, args.subtrees, args.keys)
+        props = os.path.join(tmpdir, "schema.yaml")
+        write_schema(props, args.subtrees, args.keys)
+
+        _, config_size = measure(tree.tree_load, data)
+        desc, schema_size = measure(schema.schema_load, props)
+        _, defaults_size = measure(desc.get_default)
+
+    for name, size in (
+        ("tree_load", config_size),
+        ("schema_load", schema_size),
+        ("get_default", defaults_size),
+    ):
+        print(f"{name:12} {size / 1024:10.1f} KiB {size / total:8.1f} B/key")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Benchmark suite for the hot paths of csspin.
+
+Runs each benchmark on synthetic inputs of increasing size (number of keys,
+nesting depth, length of interpolation chains, number of plugins, number of
+files) and reports the best time of several runs per size together with the
+scaling exponent, i.e. the slope of the time over the size on a log-log
+scale: 1.0 means linear scaling, 2.0 quadratic.
+
+Results can be stored as baseline via ``--save`` and compared against a
+baseline via ``--compare``, which exits with status 1 if any benchmark got
+slower by more than ``--threshold`` (relative, default 0.25). Everything
+runs offline; the inputs are written to a temporary directory.
+
+The memory retained by configuration trees and the cost of running
+commands are measured by bench_tree_memory.py and bench_sh.py.
+
+Usage: python benchmarks/run.py [--quick] [-k PATTERN] [--save FILE]
+                                [--compare FILE] [--threshold 0.25]
+"""
+
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import importlib.metadata
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+from functools import partial
+from typing import TYPE_CHECKING
+
+import csspin
+from csspin import fastcopy, scanner, schema, tree
+from csspin.cli import load_minimal_tree, load_plugin
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+# Benchmarks by name: the function creating the inputs and the sizes to run
+# with (full and --quick). The function is called with a temporary directory
+# and the size and returns a function that prepares a single run, which in
+# turn returns the function to be timed.
+BENCHMARKS: dict[str, tuple[Callable, tuple, tuple]] = {}
+
+KEYS = (100, 1000, 10000)
+DEPTH = (10, 30, 90)
+CHAIN = (10, 100, 1000)
+PLUGINS = (10, 50, 200)
+FILES = (100, 1000, 10000)
+
+
+def benchmark(name: str, sizes: tuple) -> Callable:
+    def register(fn: Callable) -> Callable:
+        BENCHMARKS[name] = (fn, sizes, sizes[:-1])
+        return fn
+
+    return register
+
+
+def write_data(fn: str, keys: int, value: str = "value{j}") -> None:
+    """Write a YAML document with `keys` settings in subtrees of up to 100
+    keys. `value` is formatted with the subtree index `i` and key index
+    `j`."""
+    with open(fn, "w", encoding="utf-8") as f:
+        f.write("bench:\n")
+        for n in range(keys):
+            i, j = divmod(n, 100)
+            if not j:
+                f.write(f"  s{i}:\n")
+            f.write(f"    k{j}: {value.format(i=i, j=j)!r}\n")
+
+
+def write_schema(fn: str, keys: int) -> None:
+    """Write a schema matching the documents written by `write_data`."""
+    with open(fn, "w", encoding="utf-8") as f:
+        f.write("bench:\n  type: object\n  properties:\n")
+        for n in range(keys):
+            i, j = divmod(n, 100)
+            if not j:
+                f.write(f"    s{i}:\n      type: object\n      properties:\n")
+            f.write(f"        k{j}:\n          type: str\n")
+            f.write(f"          help: Setting {j} of subtree {i}\n")
+
+
+def write_nested_data(fn: str, depth: int, value: str = "value{j}") -> None:
+    """Write a YAML document with subtrees nested `depth` levels deep, each
+    level holding 10 settings. `value` is formatted with the dotted path of
+    the level's subtree `path` and key index `j`."""
+    with open(fn, "w", encoding="utf-8") as f:
+        f.write("bench:\n")
+        path = "bench"
+        for level in range(depth):
+            indent = "  " * (level + 1)
+            path += f".d{level}"
+            f.write(f"{indent}d{level}:\n")
+            for j in range(10):
+                f.write(f"{indent}  k{j}: {value.format(path=path, j=j)!r}\n")
+
+
+def write_nested_schema(fn: str, depth: int) -> None:
+    """Write a schema matching the documents written by
+    `write_nested_data`."""
+    with open(fn, "w", encoding="utf-8") as f:
+        f.write("bench:\n  type: object\n  properties:\n")
+        for level in range(depth):
+            indent = "    " * (level + 1)
+            f.write(f"{indent}d{level}:\n")
+            f.write(f"{indent}  type: object\n{indent}  properties:\n")
+            for j in range(10):
+                f.write(f"{indent}    k{j}:\n{indent}      type: str\n")
+
+
+def tree_loader(data: str, props: str) -> Callable:
+    """Return a function loading the tree in YAML file `data` with the
+    schema in file `props`."""
+
+    def load() -> tree.ConfigTree:
+        cfg: tree.ConfigTree = schema.schema_load(props).get_default()
+        tree.tree_update(cfg, tree.tree_load(data))
+        return cfg
+
+    return load
+
+
+def loaded_tree(tmpdir: str, keys: int, value: str = "value{j}") -> Callable:
+    """Return a function loading a tree with `keys` settings and their
+    schema from files written once."""
+    data = os.path.join(tmpdir, "data.yaml")
+    props = os.path.join(tmpdir, "schema.yaml")
+    write_data(data, keys, value)
+    write_schema(props, keys)
+    return tree_loader(data, props)
+
+
+def nested_tree(tmpdir: str, depth: int, value: str = "value{j}") -> Callable:
+    """Return a function loading a tree nested `depth` levels deep and its
+    schema from files written once."""
+    data = os.path.join(tmpdir, "nested.yaml")
+    props = os.path.join(tmpdir, "nested_schema.yaml")
+    write_nested_data(data, depth, value)
+    write_nested_schema(props, depth)
+    return tree_loader(data, props)
+
+
+@benchmark("config", KEYS)
+def bench_config(tmpdir: str, keys: int) -> Callable:
+    """Build a configuration tree from Python dictionaries."""
+    subtrees: dict[str, dict] = {}
+    for n in range(keys):
+        i, j = divmod(n, 100)
+        subtrees.setdefault(f"s{i}", {})[f"k{j}"] = f"value{j}"
+
+    def run() -> None:
+        csspin.config(
+            bench=csspin.config(
+                **{name: csspin.config(**values) for name, values in subtrees.items()}
+            )
+        )
+
+    return lambda: run
+
+
+@benchmark("tree_load", KEYS)
+def bench_tree_load(tmpdir: str, keys: int) -> Callable:
+    """Parse a YAML document into a configuration tree."""
+    data = os.path.join(tmpdir, "data.yaml")
+    write_data(data, keys)
+
+    return lambda: partial(tree.tree_load, data)
+
+
+@benchmark("schema_load", KEYS)
+def bench_schema_load(tmpdir: str, keys: int) -> Callable:
+    """Parse a schema and build its descriptors."""
+    props = os.path.join(tmpdir, "schema.yaml")
+    write_schema(props, keys)
+
+    return lambda: partial(schema.schema_load, props)
+
+
+@benchmark("interpolate1", CHAIN)
+def bench_interpolate1(tmpdir: str, length: int) -> Callable:
+    """Interpolate a chain of settings referring to the next one."""
+    # pylint: disable=unused-argument
+    cfg = csspin.config(
+        **{f"k{i}": f"{{k{i + 1}}}" for i in range(length)}, **{f"k{length}": "end"}
+    )
+
+    def prepare() -> Callable:
+        csspin.set_tree(cfg)
+        return partial(csspin.interpolate1, "{k0}")
+
+    return prepare
+
+
+@benchmark("tree_sanitize", KEYS)
+def bench_tree_sanitize(tmpdir: str, keys: int) -> Callable:
+    """Interpolate and type check a tree, where all values refer to the
+    first setting of their subtree."""
+    load = loaded_tree(tmpdir, keys, "{{bench.s{i}.k0}}/{j}")
+
+    def prepare() -> Callable:
+        cfg = load()
+        cfg.bench.s0.k0 = "value"
+        for subtree in list(cfg.bench.values())[1:]:
+            subtree.k0 = "{bench.s0.k0}"
+        csspin.set_tree(cfg)
+        return partial(tree.tree_sanitize, cfg)
+
+    return prepare
+
+
+@benchmark("tree_sanitize_depth", DEPTH)
+def bench_tree_sanitize_depth(tmpdir: str, depth: int) -> Callable:
+    """Interpolate and type check a deeply nested tree, where all values
+    refer to the first setting of their level by its full path."""
+    load = nested_tree(tmpdir, depth, "{{{path}.k0}}/{j}")
+
+    def prepare() -> Callable:
+        cfg = load()
+        level = cfg.bench
+        for n in range(depth):
+            level = level[f"d{n}"]
+            level.k0 = "value"
+        csspin.set_tree(cfg)
+        return partial(tree.tree_sanitize, cfg)
+
+    return prepare
+
+
+@benchmark("tree_walk", KEYS)
+def bench_tree_walk(tmpdir: str, keys: int) -> Callable:
+    """Walk a tree."""
+    cfg = loaded_tree(tmpdir, keys)()
+    return lambda: lambda: list(tree.tree_walk(cfg))
+
+
+@benchmark("tree_dump", KEYS)
+def bench_tree_dump(tmpdir: str, keys: int) -> Callable:
+    """Dump a tree as text."""
+    cfg = loaded_tree(tmpdir, keys)()
+    return lambda: partial(tree.tree_dump, cfg)
+
+
+@benchmark("tree_walk_depth", DEPTH)
+def bench_tree_walk_depth(tmpdir: str, depth: int) -> Callable:
+    """Walk a deeply nested tree."""
+    cfg = nested_tree(tmpdir, depth)()
+    return lambda: lambda: list(tree.tree_walk(cfg))
+
+
+@benchmark("tree_dump_depth", DEPTH)
+def bench_tree_dump_depth(tmpdir: str, depth: int) -> Callable:
+    """Dump a deeply nested tree as text."""
+    cfg = nested_tree(tmpdir, depth)()
+    return lambda: partial(tree.tree_dump, cfg)
+
+
+@benchmark("tree_apply_directives", KEYS)
+def bench_tree_apply_directives(tmpdir: str, keys: int) -> Callable:
+    """Apply directives to a tree, where every other key is an append
+    directive for the previous one."""
+    data = os.path.join(tmpdir, "directives.yaml")
+    with open(data, "w", encoding="utf-8") as f:
+        f.write("bench:\n")
+        for n in range(0, keys, 2):
+            i, j = divmod(n, 100)
+            if not j:
+                f.write(f"  s{i}:\n")
+            f.write(f"    k{j}: [a]\n    append k{j}: [b]\n")
+
+    def prepare() -> Callable:
+        return partial(tree.tree_apply_directives, tree.tree_load(data))
+
+    return prepare
+
+
+@benchmark("load_plugin", PLUGINS)
+def bench_load_plugin(tmpdir: str, plugins: int) -> Callable:
+    """Import and initialize plugins, where each plugin requires its
+    predecessor and the plugin at half its index."""
+    package = os.path.join(tmpdir, "benchplugins")
+    os.mkdir(package)
+    with open(os.path.join(package, "__init__.py"), "w", encoding="utf-8"):
+        pass
+    for i in range(plugins):
+        requires = (
+            sorted({f"benchplugins.p{i - 1}", f"benchplugins.p{i // 2}"}) if i else []
+        )
+        with open(os.path.join(package, f"p{i}.py"), "w", encoding="utf-8") as f:
+            f.write(
+                "from csspin import config\n"
+                "defaults = config(\n"
+                f"    home='{{spin.data}}/p{i}',\n"
+                f"    requires=config(spin={requires!r}),\n"
+                ")\n"
+                "def configure(cfg):\n"
+                "    pass\n"
+            )
+        with open(
+            os.path.join(package, f"p{i}_schema.yaml"), "w", encoding="utf-8"
+        ) as f:
+            f.write(
+                f"p{i}:\n  type: object\n  help: Plugin {i}\n  properties:\n"
+                "    home:\n      type: path\n      help: Home directory\n"
+            )
+    spinfile = os.path.join(tmpdir, "spinfile.yaml")
+    with open(spinfile, "w", encoding="utf-8") as f:
+        f.write("spin:\n  project_name: bench\n")
+    sys.path.insert(0, tmpdir)
+
+    def prepare() -> Callable:
+        for name in [name for name in sys.modules if name.startswith("benchplugins")]:
+            del sys.modules[name]
+        cfg = load_minimal_tree(spinfile, cwd=tmpdir, verbosity=csspin.Verbosity.QUIET)
+
+        def run() -> None:
+            for i in range(plugins):
+                load_plugin(cfg, f"benchplugins.p{i}")
+
+        return run
+
+    return prepare
+
+
+def copy_tree(tmpdir: str, files: int, mode: str, jobs: int | None) -> Callable:
+    """Return a function preparing a copy of a tree of `files` files of
+    4 KiB in subdirectories of up to 100 files into a fresh target."""
+    source = os.path.join(tmpdir, "source")
+    for n in range(files):
+        i, j = divmod(n, 100)
+        if not j:
+            os.makedirs(os.path.join(source, f"d{i}"))
+        with open(os.path.join(source, f"d{i}", f"f{j}"), "wb") as f:
+            f.write(os.urandom(4096))
+    runs = iter(range(sys.maxsize))
+
+    def prepare() -> Callable:
+        target = os.path.join(tmpdir, f"target{next(runs)}")
+        os.mkdir(target)
+        return partial(fastcopy.copy_tree, source, target, mode, jobs)
+
+    return prepare
+
+
+@benchmark("copy_tree", FILES)
+def bench_copy_tree(tmpdir: str, files: int) -> Callable:
+    """Copy a tree of files one by one using shutil.copy2."""
+    return copy_tree(tmpdir, files, "copy", 1)
+
+
+@benchmark("copy_tree_auto", FILES)
+def bench_copy_tree_auto(tmpdir: str, files: int) -> Callable:
+    """Copy a tree of files in parallel using the fastest method."""
+    return copy_tree(tmpdir, files, "auto", None)
+
+
+@benchmark("is_up_to_date_tree", FILES)
+def bench_is_up_to_date_tree(tmpdir: str, files: int) -> Callable:
+    """Check a target against a glob matching a tree of files."""
+    copy_tree(tmpdir, files, "copy", 1)
+    target = os.path.join(tmpdir, "target")
+    with open(target, "w", encoding="utf-8"):
+        pass
+    cfg = csspin.config()
+
+    def prepare() -> Callable:
+        csspin.set_tree(cfg)
+        scanner.clear_cache()
+        return partial(
+            csspin.is_up_to_date, target, [os.path.join(tmpdir, "source", "**", "f*")]
+        )
+
+    return prepare
+
+
+def measure(prepare: Callable, budget: float) -> float:
+    """Return the best time of running the function returned by `prepare`,
+    repeating it at least 3 times and until `budget` seconds are spent."""
+    best = math.inf
+    spent = 0.0
+    runs = 0
+    while runs < 3 or (spent < budget and runs < 100):
+        func = prepare()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        spent += elapsed
+        runs += 1
+    return best
+
+
+def scaling(results: dict) -> float | None:
+    """Return the slope of the time over the size on a log-log scale."""
+    sizes = sorted(results, key=int)
+    if len(sizes) < 2:
+        return None
+    first, last = sizes[0], sizes[-1]
+    return math.log(results[last] / results[first]) / math.log(int(last) / int(first))
+
+
+def run(patterns: list[str], quick: bool, budget: float) -> dict:
+    results: dict[str, dict] = {}
+    for name, (fn, sizes, quick_sizes) in BENCHMARKS.items():
+        if patterns and not any(fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+        results[name] = {}
+        for size in quick_sizes if quick else sizes:
+            with tempfile.TemporaryDirectory() as tmpdir:
+                seconds = measure(fn(tmpdir, size), budget)
+            results[name][str(size)] = seconds
+            print(f"{name:24} {size:>8} {seconds * 1000:12.3f} ms", flush=True)
+        if (slope := scaling(results[name])) is not None:
+            print(f"{name:24} {'scaling':>8} {f'O(n^{slope:.2f})':>15}", flush=True)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> bool:
+    """Print the changes relative to `baseline` and return whether no
+    benchmark regressed by more than `threshold`."""
+    ok = True
+    print(f"\nComparison against baseline (threshold {threshold:+.0%}):")
+    for name, sizes in results.items():
+        for size, seconds in sizes.items():
+            if (base := baseline.get(name, {}).get(size)) is None:
+                continue
+            change = seconds / base - 1
+            regressed = change > threshold
+            ok = ok and not regressed
+            marker = "REGRESSION" if regressed else ""
+            print(f"{name:24} {size:>8} {change:+9.1%} {marker}")
+    return ok
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "-k",
+        dest="patterns",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="only run the benchmarks matching the glob PATTERN",
+    )
+    parser.add_argument(
+        "--quick", action="store_true", help="skip the largest size of each input"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=0.5,
+        help="seconds to spend per benchmark and size",
+    )
+    parser.add_argument("--save", metavar="FILE", help="store the results as baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare against baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="relative slowdown considered a regression",
+    )
+    args = parser.parse_args()
+
+    # The benchmarks must not depend on the user's settings
+    os.environ["SPIN_DISABLE_GLOBAL_YAML"] = "1"
+    results = run(args.patterns, args.quick, args.budget)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "csspin": importlib.metadata.version("csspin"),
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "benchmarks": results,
+                },
+                f,
+                indent=2,
+            )
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["benchmarks"]
+        if not compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
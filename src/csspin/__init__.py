@@ -39,11 +39,14 @@ import packaging.version
 import platformdirs.unix
 
 if TYPE_CHECKING:
-    from typing import Any, Callable, Generator
+    from typing import Any, Callable, ContextManager, Generator, Mapping, Sequence
     from csspin.tree import ConfigTree
     from csspin.cli import GroupWithAliases
 
+import asyncio
 import collections
+import glob
+import hashlib
 import importlib.metadata
 import inspect
 import os
@@ -54,16 +57,20 @@ import shutil
 import subprocess
 import sys
 import tarfile
+import time
 import urllib.request
 import zipfile
-from contextlib import contextmanager, nullcontext
+from contextlib import ExitStack, contextmanager, nullcontext, suppress
 from traceback import format_exc
+from types import MappingProxyType
 
 import click
 import packaging
 import platformdirs
 from path import Path
 
+from csspin import fastcopy, rusage, scanner
+
 __all__ = [
     "debug",
     "echo",
@@ -78,14 +85,21 @@ __all__ = [
     "rmtree",
     "die",
     "Command",
+    "SecretMasker",
     "sh",
     "backtick",
+    "clear_backtick_cache",
+    "async_sh",
+    "async_backtick",
+    "gather_sh",
     "setenv",
+    "invalidate_subprocess_environment",
     "readbytes",
     "writebytes",
     "readtext",
     "writetext",
     "appendtext",
+    "atomic_write",
     "persist",
     "unpersist",
     "memoizer",
@@ -106,25 +120,126 @@ __all__ = [
     "EXPORTS",
 ]
 
-secrets: set[str] = set()
+SECRET_MASK = "*******"
+
+
+class _SecretSet(set):
+    """The set of secrets to hide from spin's output.
+
+    The secrets are compiled into a single regular expression, that is
+    rebuilt lazily after the set has been modified. Longer secrets come
+    first, so that secrets containing other secrets are masked entirely.
+    """
+
+    def __init__(self: _SecretSet, *args: Any) -> None:
+        super().__init__(*args)
+        self._matcher: re.Pattern | None = None
+        self._max_length = 0
+
+    @property
+    def matcher(self: _SecretSet) -> re.Pattern | None:
+        """The compiled matcher, or ``None`` if there are no secrets."""
+        if self._matcher is None and (candidates := [s for s in self if s]):
+            candidates.sort(key=len, reverse=True)
+            self._matcher = re.compile("|".join(map(re.escape, candidates)))
+            self._max_length = len(candidates[0])
+        return self._matcher
+
+    @property
+    def max_length(self: _SecretSet) -> int:
+        """The length of the longest secret."""
+        return self._max_length if self.matcher else 0
+
+
+def _invalidating(name: str) -> Callable:
+    method = getattr(set, name)
+
+    def wrapper(self: _SecretSet, *args: Any) -> Any:
+        self._matcher = None  # pylint: disable=protected-access
+        return method(self, *args)
+
+    wrapper.__name__ = name
+    return wrapper
+
+
+for _name in (
+    "add",
+    "clear",
+    "discard",
+    "pop",
+    "remove",
+    "update",
+    "difference_update",
+    "intersection_update",
+    "symmetric_difference_update",
+    "__iand__",
+    "__ior__",
+    "__isub__",
+    "__ixor__",
+):
+    setattr(_SecretSet, _name, _invalidating(_name))
+
+secrets: set[str] = _SecretSet()
 
 
 def obfuscate(msg: Iterable[str] | str) -> list[str] | str:
-    mask = "*******"
+    matcher = secrets.matcher  # type: ignore[attr-defined]
 
     if isinstance(msg, str):
-        new_msg = msg
-        for secret in secrets:
-            new_msg = new_msg.replace(secret, mask)
-        return new_msg
+        return matcher.sub(SECRET_MASK, msg) if matcher else msg
 
     elif isinstance(msg, Iterable):
-        msg_list: list[str] = []
-        for string in msg:
-            for secret in secrets:
-                string = string.replace(secret, mask)
-            msg_list.append(string)
-        return msg_list
+        if not matcher:
+            return list(msg)
+        return [matcher.sub(SECRET_MASK, string) for string in msg]
+
+
+class SecretMasker:
+    """Mask secrets in text that arrives in chunks, e.g. the output of a
+    subprocess that is read incrementally.
+
+    As a secret may be split across chunks, :py:meth:`feed` holds back the
+    end of the text received so far that may be the beginning of a secret;
+    :py:meth:`flush` returns what remains at the end of the stream.
+
+    >>> masker = SecretMasker()
+    >>> for chunk in iter(lambda: proc.stdout.read(4096), ""):
+    ...     sys.stdout.write(masker.feed(chunk))
+    >>> sys.stdout.write(masker.flush())
+
+    """
+
+    def __init__(self: SecretMasker) -> None:
+        self._pending = ""
+
+    def feed(self: SecretMasker, chunk: str) -> str:
+        """Add `chunk` to the stream and return the masked text that is
+        safe to be written."""
+        text = self._pending + chunk
+        if not (matcher := secrets.matcher):  # type: ignore[attr-defined]
+            self._pending = ""
+            return text
+
+        # Secrets starting before 'complete' can be matched with certainty,
+        # as the text contains as many characters as the longest secret.
+        complete = len(text) - secrets.max_length + 1  # type: ignore[attr-defined]
+        out = []
+        pos = 0
+        for match in matcher.finditer(text):
+            if match.start() >= complete:
+                break
+            out.append(text[pos : match.start()])  # noqa: E203
+            out.append(SECRET_MASK)
+            pos = match.end()
+        end = max(pos, complete)
+        out.append(text[pos:end])
+        self._pending = text[end:]
+        return "".join(out)
+
+    def flush(self: SecretMasker) -> str:
+        """Return the remaining masked text at the end of the stream."""
+        text, self._pending = self._pending, ""
+        return obfuscate(text)  # type: ignore[return-value]
 
 
 def echo(*msg: str, resolve: bool = False, **kwargs: Any) -> None:
@@ -347,11 +462,68 @@ def mkdir(path: str | Path) -> str:
     return path
 
 
-def rmtree(path: str | Path) -> None:
+# The processes deleting directories in the background
+_DELETING: list[subprocess.Popen] = []
+
+
+def _rmtree_background(path: Path) -> bool:
+    """Rename the directory `path` out of the way and delete it in a
+    detached process, along with the trash left over by deleters that were
+    killed. Return False if `path` can't be renamed."""
+    trash = path.dirname() / f".{path.basename()}.{os.urandom(4).hex()}.trash"
+    try:
+        # The trash is a sibling of path, so renaming it is atomic
+        path.rename(trash)
+    except OSError as exc:
+        debug(f"Can't move {path} out of the way: {exc}")
+        return False
+    cmd = [
+        sys.executable,
+        "-c",
+        (
+            "import shutil, sys\n"
+            "for trash in sys.argv[1:]: shutil.rmtree(trash, ignore_errors=True)"
+        ),
+        # This trash and the trash of killed deleters. Deleting trash another
+        # deleter is still working on does no harm.
+        *path.dirname().glob(f".{glob.escape(path.basename())}.*.trash"),
+    ]
+    # Reap the processes which are done
+    _DELETING[:] = [proc for proc in _DELETING if proc.poll() is None]
+    if sys.platform == "win32":
+        proc = subprocess.Popen(  # pylint: disable=consider-using-with
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=(
+                subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+            ),
+        )
+    else:
+        proc = subprocess.Popen(  # pylint: disable=consider-using-with
+            cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    _DELETING.append(proc)
+    return True
+
+
+def rmtree(path: str | Path, background: bool = False) -> None:
     """Recursively remove `path` and everything it contains.
     Can also remove single files. The argument
     is interpolated against the configuration tree.
 
+    With `background`, a directory is renamed and deleted by a detached
+    process, so the call returns immediately. The detached process also
+    deletes the renamed copies left behind by earlier deleters that were
+    killed. If the directory can't be
+    renamed, e.g. because files in it are in use on Windows, it is
+    deleted synchronously.
+
     Obviously, this should be used with care.
 
     """
@@ -360,10 +532,11 @@ def rmtree(path: str | Path) -> None:
     if sys.platform == "win32":
         echo(f"rm {path} -recurse -force")
     else:
-        echo(f"rm -rf {path}")
+        echo(f"rm -rf {path}{' &' if background else ''}")
 
     if (path := Path(path)).is_dir():
-        path.rmtree()
+        if not (background and _rmtree_background(path)):
+            path.rmtree()
     else:
         path.remove()
 
@@ -382,14 +555,27 @@ def mv(source: str | Path, target: str | Path) -> None:
     else:
         echo(f"mv {source} {target}")
 
-    shutil.move(source, target)
+    # Moves across file systems copy, so use the fast paths of copy
+    shutil.move(source, target, copy_function=fastcopy.copy_file)
 
 
-def copy(source: str | Path, target: str | Path) -> None:
+def copy(
+    source: str | Path, target: str | Path, mode: str = "auto", jobs: int | None = None
+) -> None:
     """Copy a file or directory recursively from `source` to `target` in case
     the `target` exists.
 
+    `mode` selects how files are copied: ``"auto"`` clones files on
+    copy-on-write file systems and copies within the kernel otherwise,
+    ``"reflink"`` only clones, ``"hardlink"`` links files instead of
+    copying them, and ``"copy"`` does a regular copy. Whatever is not
+    supported falls back to a regular copy. Directories are copied using
+    `jobs` threads, by default depending on the number of CPUs. See
+    :py:mod:`csspin.fastcopy` for details.
+
     """
+    if mode not in fastcopy.MODES:
+        die(f"Unknown copy mode {mode!r}, use one of {', '.join(fastcopy.MODES)}")
     if not exists((source := Path(interpolate1(source)).absolute())):
         die(f"{source} does not exist!")
     target = Path(interpolate1(target)).absolute()
@@ -403,12 +589,13 @@ def copy(source: str | Path, target: str | Path) -> None:
         echo(f"cp {opts}{source} {target}")
 
     if source_is_dir:
-        source.copytree(
-            (target / source.basename()).mkdir_p(),
-            dirs_exist_ok=True,
+        fastcopy.copy_tree(
+            source, (target / source.basename()).mkdir_p(), mode=mode, jobs=jobs
         )
     else:
-        source.copy2(target)
+        if target.is_dir():
+            target = target / source.basename()
+        fastcopy.copy_file(source, target, mode=mode)
 
 
 def die(*msg: Any, resolve: bool = True) -> None:
@@ -453,6 +640,87 @@ class Command:
         return sh(*cmd, **kwargs)
 
 
+# The generation counter of the environment, that is bumped by setenv() and
+# whenever the subprocess environment may have changed. Together with the
+# factory registered as spin.subprocess_environment it is the key of the cached
+# snapshot of the activated environment used by sh().
+_ENVIRON_GENERATION = 0
+_ENVIRON_SNAPSHOT: tuple | None = None
+
+
+def invalidate_subprocess_environment() -> None:
+    """Discard the cached snapshot of the subprocess environment.
+
+    :py:func:`sh` enters :py:data:`spin.subprocess_environment` only once
+    and reuses the resulting environment for subsequent commands. The
+    snapshot is discarded automatically when the environment is modified
+    (e.g. via :py:func:`setenv`), when another subprocess environment gets
+    registered and before plugin hooks are run by :py:func:`toporun`.
+    Plugins whose subprocess environment depends on anything else must call
+    this function when it changes.
+
+    """
+    global _ENVIRON_GENERATION, _ENVIRON_SNAPSHOT  # pylint: disable=global-statement
+    _ENVIRON_GENERATION += 1
+    _ENVIRON_SNAPSHOT = None
+
+
+def _subprocess_environ() -> Mapping[str, str] | None:
+    """Return a read-only snapshot of the activated subprocess environment,
+    or ``None`` if no subprocess environment is registered.
+
+    """
+    global _ENVIRON_SNAPSHOT  # pylint: disable=global-statement
+    factory = get_tree().spin.subprocess_environment
+    if factory is nullcontext:
+        return None
+
+    key = (_ENVIRON_GENERATION, factory)
+    if _ENVIRON_SNAPSHOT is not None:
+        snapshot_key, base, activated = _ENVIRON_SNAPSHOT
+        # Plugins may modify os.environ directly, so we also have to
+        # check whether the environment we activated is still the same.
+        if snapshot_key == key and base == os.environ:
+            return activated  # type: ignore[no-any-return]
+
+    base = os.environ.copy()
+    with factory():
+        activated = MappingProxyType(os.environ.copy())
+    _ENVIRON_SNAPSHOT = (key, base, activated)
+    return activated
+
+
+def _echo_command(cmd: Sequence) -> None:
+    def quote(arg: str) -> str:
+        if len(cmd) > 1 and " " in arg:
+            return f"'{arg}'"
+        return arg
+
+    echo(" ".join(quote(c) for c in cmd))
+
+
+# Context managers entered around each command run by sh and async_sh,
+# called with the command line and its working directory. They yield an
+# object whose ``done(returncode, *outputs)`` is called with the result of
+# the command. Modules importing csspin, like csspin.trace, can't be
+# imported by csspin, so they register themselves here.
+COMMAND_WRAPPERS: list[Callable[[str, str | None], ContextManager[Any]]] = []
+
+
+@contextmanager
+def _wrapped_command(cmd: str, cwd: str | None) -> Generator[Callable, None, None]:
+    """Run the block within the COMMAND_WRAPPERS of the command line `cmd`,
+    yielding a function passing its result to them."""
+    with ExitStack() as stack:
+        spans = [stack.enter_context(wrapper(cmd, cwd)) for wrapper in COMMAND_WRAPPERS]
+
+        def done(returncode: int | None, *outputs: bytes | str | None) -> None:
+            for span in spans:
+                span.done(returncode, *outputs)
+
+        yield done
+
+
 def sh(
     *cmd: Any, use_subprocess_environment: bool = True, **kwargs: Any
 ) -> subprocess.CompletedProcess | None:
@@ -472,10 +740,13 @@ def sh(
     :py:data:`spin.subprocess_environment` (e.g. the project's virtual
     environment, as set up by ``csspin-python``). When no such
     environment is configured, the command runs in spin's own
-    in-process environment.
+    in-process environment. The activated environment is cached across
+    calls, see :py:func:`invalidate_subprocess_environment`.
 
     Other keyword arguments are passed into
-    :py:func:`subprocess.run`.
+    :py:func:`subprocess.run`. The resources used by the command are
+    available as attribute ``rusage`` of the returned
+    :py:class:`subprocess.CompletedProcess`, see :py:mod:`csspin.rusage`.
 
     All positional arguments are interpolated against the
     configuration tree.
@@ -493,49 +764,42 @@ def sh(
         cmd = shlex.split(cmd[0].replace("\\", "\\\\"))
 
     if not kwargs.pop("silent", False):
-
-        def quote(arg: str) -> str:
-            if len(cmd) > 1 and " " in arg:
-                return f"'{arg}'"
-            return arg
-
-        echo(" ".join(quote(c) for c in cmd))
+        _echo_command(cmd)
 
     message = "Command '{cmd_}' failed with exit status {returncode}."
     cmd_ = cmd if isinstance(cmd, str) else subprocess.list2cmdline(cmd)  # type: ignore[unreachable] # noqa: E501
 
-    cfg = get_tree()
-    environment = (
-        cfg.spin.subprocess_environment if use_subprocess_environment else nullcontext
-    )
+    # The process environment is the activated subprocess environment (e.g.
+    # a venv activation), if there is one, updated by the passed 'env'.
+    activated = _subprocess_environ() if use_subprocess_environment else None
+    if argenv is not None:
+        env = dict(os.environ if activated is None else activated)
+        env.update(argenv)
+    else:
+        env = activated  # type: ignore[assignment]
 
+    before = rusage.snapshot()
     try:
-        with environment():
-            # Build the process environment *inside* the activated subprocess environment,
-            # so that changes it makes to os.environ (e.g. venv activation) are
-            # reflected in the spawned subprocess.
-            if argenv is not None:
-                env = dict(os.environ)
-                env.update(argenv)
-            else:
-                env = None
-            # Resolve the executable *after* activating the subprocess
-            # environment, so the command is found in the activated environment
-            # (e.g. the venv's Scripts directory) rather than against the
-            # unmodified PATH. This is Windows-only because there we pre-resolve
-            # the program via shutil.which (which reads the current os.environ);
-            # on POSIX subprocess resolves cmd[0] itself via the *spawned*
-            # process' PATH (the env we pass below), so it already honours the
-            # activated environment.
-            if sys.platform == "win32" and not shell:
-                executable = shutil.which(cmd[0])
-            debug(
-                f"subprocess.run({cmd}, {shell=}, {check=}, {argenv=},"
-                f" {executable=}, {kwargs=})",
-            )
+        # Resolve the executable against the PATH of the activated
+        # environment, so the command is found in the activated environment
+        # (e.g. the venv's Scripts directory) rather than against the
+        # unmodified PATH. This is Windows-only because there we pre-resolve
+        # the program via shutil.which; on POSIX subprocess resolves cmd[0]
+        # itself via the *spawned* process' PATH (the env we pass below), so
+        # it already honours the activated environment.
+        if sys.platform == "win32" and not shell:
+            executable = shutil.which(cmd[0], path=(env or os.environ).get("PATH"))
+        debug(
+            f"subprocess.run({cmd}, {shell=}, {check=}, {argenv=},"
+            f" {executable=}, {kwargs=})",
+        )
+        with _wrapped_command(
+            cmd[0] if len(cmd) == 1 else cmd_, kwargs.get("cwd")
+        ) as done:
             cpi = subprocess.run(
                 cmd, shell=shell, check=check, env=env, executable=executable, **kwargs
             )
+            done(cpi.returncode, cpi.stdout, cpi.stderr)
     except FileNotFoundError as ex:
         debug(format_exc())
         die(str(ex))
@@ -544,6 +808,10 @@ def sh(
         if check:
             die(message.format(cmd_=cmd_, returncode=ex.returncode))
         cpi = subprocess.CompletedProcess(args=cmd, returncode=ex.returncode)
+    finally:
+        usage = rusage.difference(before, rusage.snapshot())
+        rusage.account(usage)
+    cpi.rusage = usage  # type: ignore[attr-defined]
 
     if not check and cpi.returncode:
         warn(message.format(cmd_=cmd, returncode=cpi.returncode))
@@ -551,12 +819,239 @@ def sh(
     return cpi
 
 
-def backtick(*cmd: str, **kwargs: Any) -> str:
+def backtick(
+    *cmd: str,
+    cache: bool = False,
+    ttl: float | None = None,
+    cache_env: Iterable[str] = (),
+    **kwargs: Any,
+) -> str:
+    """Run a program like :py:func:`sh` and return its standard output as
+    string.
+
+    With ``cache=True``, the output is persisted in
+    ``{spin.spin_dir}/backtick.cache`` and reused by subsequent calls,
+    including those of later spin runs, without running the program
+    again. This is meant for commands that query static facts, like
+    ``python --version``. Cached results are keyed on the interpolated
+    command, the working directory, the environment variable ``PATH`` and
+    the variables listed in `cache_env`, and the path, modification time
+    and size of the executable. Results older than `ttl` seconds are not
+    reused. :py:func:`clear_backtick_cache` invalidates all cached results.
+
+    >>> backtick("git rev-parse --show-toplevel", cache=True, ttl=3600)
+
+    """
+    if cache:
+        key = _backtick_cache_key(cmd, cache_env, kwargs)
+        if key is not None:
+            return _cached_backtick(key, cmd, ttl, kwargs)
     kwargs["stdout"] = subprocess.PIPE
     cpi = sh(*cmd, **kwargs)
     return cpi.stdout.decode()  # type: ignore[no-any-return,union-attr]
 
 
+_BACKTICK_CACHE: tuple[str, dict] | None = None
+
+
+def _backtick_cache() -> tuple[str, dict]:
+    """Return the file name and contents of the backtick cache of the
+    current project."""
+    global _BACKTICK_CACHE  # pylint: disable=global-statement
+    fn = interpolate1("{spin.spin_dir}/backtick.cache")
+    if _BACKTICK_CACHE is None or _BACKTICK_CACHE[0] != fn:
+        try:
+            _BACKTICK_CACHE = (fn, unpersist(fn, {}) or {})
+        except (pickle.UnpicklingError, EOFError):
+            debug(format_exc())
+            _BACKTICK_CACHE = (fn, {})
+    return _BACKTICK_CACHE
+
+
+def _backtick_cache_key(
+    cmd: tuple, cache_env: Iterable[str], kwargs: dict
+) -> str | None:
+    args = interpolate(cmd)
+    if not args:
+        return None
+    activated = (
+        _subprocess_environ()
+        if kwargs.get("use_subprocess_environment", True)
+        else None
+    )
+    env = dict(os.environ if activated is None else activated)
+    env.update(kwargs.get("env") or {})
+    program = shlex.split(args[0])[0] if len(args) == 1 else args[0]
+    if not (executable := shutil.which(program, path=env.get("PATH"))):
+        # Let sh() report the missing program
+        return None
+    stat = os.stat(executable)
+    key = (
+        args,
+        os.path.abspath(kwargs.get("cwd") or os.getcwd()),
+        [(var, env.get(var)) for var in ("PATH", *sorted(cache_env))],
+        os.path.normcase(os.path.abspath(executable)),
+        stat.st_mtime_ns,
+        stat.st_size,
+    )
+    return hashlib.sha256(repr(key).encode()).hexdigest()
+
+
+def _cached_backtick(key: str, cmd: tuple, ttl: float | None, kwargs: dict) -> str:
+    output: str
+    fn, entries = _backtick_cache()
+    if (entry := entries.get(key)) is not None:
+        timestamp, output = entry
+        if ttl is None or time.time() - timestamp <= ttl:
+            debug(f"backtick: using cached output of {cmd}")
+            return output
+
+    kwargs["stdout"] = subprocess.PIPE
+    cpi = sh(*cmd, **kwargs)
+    output = cpi.stdout.decode()  # type: ignore[union-attr]
+    if not cpi.returncode:  # type: ignore[union-attr]
+        entries[key] = (time.time(), output)
+        if os.path.isdir(os.path.dirname(fn)):
+            # Other spin processes may read the cache at the same time.
+            with atomic_write(fn, "wb") as f:
+                pickle.dump(entries, f)
+    return output
+
+
+def clear_backtick_cache() -> None:
+    """Invalidate all results cached by :py:func:`backtick`."""
+    global _BACKTICK_CACHE  # pylint: disable=global-statement
+    _BACKTICK_CACHE = None
+    if exists(fn := interpolate1("{spin.spin_dir}/backtick.cache")):
+        os.remove(fn)
+
+
+async def async_sh(
+    *cmd: Any, use_subprocess_environment: bool = True, **kwargs: Any
+) -> subprocess.CompletedProcess:
+    """Coroutine version of :py:func:`sh`, using :py:mod:`asyncio`
+    subprocesses.
+
+    The positional arguments as well as `silent`, `shell`, `check`, `env`
+    and ``use_subprocess_environment`` behave just like for :py:func:`sh`,
+    including interpolation against the configuration tree and the
+    handling of failed commands. The `input` keyword argument is sent to
+    the standard input of the process; other keyword arguments are passed
+    into :py:func:`asyncio.create_subprocess_exec`. Output captured via
+    ``stdout=subprocess.PIPE`` and ``stderr=subprocess.PIPE`` is available
+    as bytes from the returned :py:class:`subprocess.CompletedProcess`.
+
+    Like :py:func:`sh`, `async_sh` uses a snapshot of the activated
+    subprocess environment, so commands running concurrently don't
+    interfere with each other.
+
+    >>> async def checks():
+    ...     await asyncio.gather(async_sh("flake8"), async_sh("mypy", "src"))
+
+    """
+    cmd = interpolate(cmd)  # type: ignore[assignment]
+    shell = kwargs.pop("shell", len(cmd) == 1)
+    check = kwargs.pop("check", True)
+    argenv = kwargs.pop("env", None)
+    stdin_data = kwargs.pop("input", None)
+    if stdin_data is not None:
+        kwargs["stdin"] = subprocess.PIPE
+
+    if sys.platform == "win32" and len(cmd) == 1:
+        cmd = shlex.split(cmd[0].replace("\\", "\\\\"))
+
+    if not kwargs.pop("silent", False):
+        _echo_command(cmd)
+
+    message = "Command '{cmd_}' failed with exit status {returncode}."
+    cmd_ = subprocess.list2cmdline(cmd)
+
+    activated = _subprocess_environ() if use_subprocess_environment else None
+    env = dict(os.environ if activated is None else activated)
+    if argenv is not None:
+        env.update(argenv)
+    if sys.platform == "win32" and not shell:
+        kwargs["executable"] = shutil.which(cmd[0], path=env.get("PATH"))
+
+    debug(f"asyncio subprocess ({cmd}, {shell=}, {check=}, {argenv=}, {kwargs=})")
+    with _wrapped_command(cmd[0] if len(cmd) == 1 else cmd_, kwargs.get("cwd")) as done:
+        try:
+            if not shell:
+                proc = await asyncio.create_subprocess_exec(*cmd, env=env, **kwargs)
+            elif sys.platform == "win32":
+                proc = await asyncio.create_subprocess_shell(cmd_, env=env, **kwargs)
+            else:
+                # This is what subprocess.run(cmd, shell=True) does on POSIX.
+                proc = await asyncio.create_subprocess_exec(
+                    "/bin/sh", "-c", *cmd, env=env, **kwargs
+                )
+        except FileNotFoundError as ex:
+            debug(format_exc())
+            die(str(ex))
+
+        try:
+            stdout, stderr = await proc.communicate(stdin_data)
+        except asyncio.CancelledError:
+            # Don't leave orphans behind, e.g. when another command of a
+            # gather_sh() call failed.
+            if proc.returncode is None:
+                proc.kill()
+            raise
+        done(proc.returncode, stdout, stderr)
+
+    cpi = subprocess.CompletedProcess(
+        args=cmd, returncode=proc.returncode, stdout=stdout, stderr=stderr  # type: ignore[arg-type]
+    )
+    if cpi.returncode:
+        if check:
+            die(message.format(cmd_=cmd_, returncode=cpi.returncode))
+        warn(message.format(cmd_=cmd, returncode=cpi.returncode))
+    return cpi
+
+
+async def async_backtick(*cmd: str, **kwargs: Any) -> str:
+    """Coroutine version of :py:func:`backtick`, running `cmd` via
+    :py:func:`async_sh` and returning its standard output as string.
+
+    """
+    kwargs["stdout"] = subprocess.PIPE
+    cpi = await async_sh(*cmd, **kwargs)
+    return cpi.stdout.decode()  # type: ignore[no-any-return]
+
+
+async def gather_sh(
+    *cmds: str | Iterable[str], jobs: int | None = None, **kwargs: Any
+) -> list[subprocess.CompletedProcess]:
+    """Run the commands `cmds` concurrently using :py:func:`async_sh`.
+
+    Each command is either a string, which is handled like a single
+    positional argument to :py:func:`sh`, or a sequence of arguments. At
+    most `jobs` commands are running at the same time, which defaults to
+    the number of CPUs. All keyword arguments are passed to each
+    :py:func:`async_sh` call. The results are returned in the order of
+    `cmds`.
+
+    As tasks are regular functions, use :py:func:`asyncio.run` to call
+    `gather_sh` from a task:
+
+    >>> results = asyncio.run(
+    ...     gather_sh("flake8", ["mypy", "src"], ["pylint", "src"], jobs=2)
+    ... )
+
+    """
+    semaphore = asyncio.Semaphore(jobs or os.cpu_count() or 1)
+
+    async def run(cmd: tuple) -> subprocess.CompletedProcess:
+        async with semaphore:
+            return await async_sh(*cmd, **kwargs)
+
+    return list(
+        await asyncio.gather(
+            *(run((cmd,) if isinstance(cmd, str) else tuple(cmd)) for cmd in cmds)
+        )
+    )
+
+
 #: EXPORTS is a list that contains all (key, value) tuples of environment variables
 #: that got set or unset via :py:func:`csspin.setenv` during the current spin execution.
 #:
@@ -609,6 +1104,7 @@ def setenv(*args: Any, **kwargs: Any) -> None:
                     value = value.replace(f"{{{key}}}", f"${key}")
         return value
 
+    invalidate_subprocess_environment()
     for key, value in kwargs.items():
         if sys.platform == "win32":
             key = key.upper()
@@ -698,6 +1194,36 @@ def writetext(fn: str | Path, data: str) -> int:
     return _write_file(fn, "w", data)
 
 
+@contextmanager
+def atomic_write(fn: str | Path, mode: str = "w") -> Generator:
+    """Open a temporary file next to `fn` for writing, and move it to
+    `fn` when the block completes, so concurrent readers never see a
+    partially written file.
+
+    `mode` is either ``"w"`` for text (UTF-8) or ``"wb"`` for bytes. If
+    the block raises, the temporary file is removed and `fn` is left
+    untouched.
+
+    The file name argument is interpolated against the configuration tree.
+
+    Example:
+
+    >>> with atomic_write("{spin.spin_dir}/state.json") as f:
+    ...     json.dump(state, f)
+
+    """
+    fn = interpolate1(fn)
+    tmpfn = f"{fn}.{os.getpid()}.tmp"
+    try:
+        with open(tmpfn, mode, encoding="utf-8" if "b" not in mode else None) as f:
+            yield f
+        os.replace(tmpfn, fn)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(tmpfn)
+        raise
+
+
 def appendtext(fn: str | Path, data: str) -> int:
     """Append `data`, which is text (Unicode object of type `str`) to the
     file named `fn`.
@@ -979,10 +1505,18 @@ def readyaml(fname: str | Path) -> ConfigTree:
 
 
 def download(url: str, location: str | Path, headers: dict | None = None) -> None:
-    """Download data from ``url`` to ``location`` using optional ``headers``."""
+    """Download data from ``url`` to ``location`` using optional ``headers``.
+
+    When provisioning from a bundle, the data is read from the bundle
+    instead (see :py:mod:`csspin.bundle`).
+    """
+    from csspin import bundle  # pylint: disable=cyclic-import
+
     url, location = interpolate((url, location))
     dirname = os.path.dirname(location)
     mkdir(dirname)
+    if bundle.restore(url, location):
+        return
     echo(f"Download {url} -> {location} ...")
 
     download_headers = {
@@ -999,6 +1533,7 @@ def download(url: str, location: str | Path, headers: dict | None = None) -> Non
     with urllib.request.urlopen(request) as response:
         data = response.read()
         writebytes(location, data)
+    bundle.record(url, location)
 
 
 def extract(archive: str | Path, extract_to: str | Path, member: str = "") -> None:
@@ -1280,10 +1815,22 @@ def getmtime(fn: str | Path) -> float:
     return os.path.getmtime(interpolate1(fn))
 
 
-def is_up_to_date(target: str | Path, sources: Iterable[str | Path]) -> bool:
+def _is_tree(source: str) -> bool:
+    return scanner.is_glob(source) or os.path.isdir(source)
+
+
+def is_up_to_date(
+    target: str | Path,
+    sources: Iterable[str | Path],
+    ignore: Iterable[str] = (),
+) -> bool:
     """Check whether `target` exists and is newer than all of the
     `sources`.
 
+    Sources may be files, directories (standing for all files below them)
+    and glob patterns. Directories and files matching one of the `ignore`
+    patterns are skipped when scanning directories.
+
     """
     if not exists(target):
         return False
@@ -1291,9 +1838,19 @@ def is_up_to_date(target: str | Path, sources: Iterable[str | Path]) -> bool:
         die(  # type: ignore[unreachable]
             f"Can't check if {target} is up to date, since 'sources' is not iterable."
         )
-    target_mtime = getmtime(target)
-    source_mtimes = [getmtime(src) for src in sources] + [0.0]
-    return target_mtime >= max(source_mtimes)
+    newest = 0
+    trees = []
+    for source in interpolate(sources):
+        if _is_tree(source):
+            trees.append(source)
+        else:
+            newest = max(newest, os.stat(source).st_mtime_ns)
+    if trees:
+        newest = max(
+            newest,
+            scanner.newest_mtime(trees, ignore=(*scanner.DEFAULT_IGNORE, *ignore)) or 0,
+        )
+    return os.stat(interpolate1(target)).st_mtime_ns >= newest
 
 
 def run_script(script: str | list, env: dict | None = None) -> None:
@@ -1328,6 +1885,13 @@ def get_sources(tree: ConfigTree) -> list:
     return sources  # type: ignore[no-any-return]
 
 
+# Functions called with the tree, the target, the rule, its recipe, sources
+# and outputs for each build rule being built, returning the recipe to run
+# instead, e.g. csspin.actioncache.cached. Like the COMMAND_WRAPPERS, they
+# register themselves here.
+RECIPE_WRAPPERS: list[Callable[..., Callable[[], None]]] = []
+
+
 def build_target(cfg: ConfigTree, target: str, phony: bool = False) -> None:
     info(f"target '{target}'{' (phony)' if phony else ''}")
     if (target_def := cfg.build_rules.get(target, None)) is None:
@@ -1343,14 +1907,26 @@ def build_target(cfg: ConfigTree, target: str, phony: bool = False) -> None:
     # First, build preconditions
     if sources:
         for source in sources:
-            build_target(cfg, source, False)
+            # Directories and globs only need rules for their own name
+            if source in cfg.build_rules or not _is_tree(interpolate1(source)):
+                build_target(cfg, source, False)
     if not phony:
-        if not is_up_to_date(target, sources):
+        if not is_up_to_date(target, sources, target_def.get("ignore", [])):
             info(f"build '{target}'")
             script = target_def.get("script", [])
             spinscript = target_def.get("spin", [])
-            run_script(script)
-            run_spin(spinscript)
+
+            def recipe() -> None:
+                run_script(script)
+                run_spin(spinscript)
+
+            for wrapper in RECIPE_WRAPPERS:
+                recipe = wrapper(
+                    cfg, target, target_def, recipe, inputs=sources, outputs=[target]
+                )
+            recipe()
+            # The recipe may have written files in scanned trees
+            scanner.clear_cache()
         else:
             info(f"{target} is up to date")
 
@@ -1411,6 +1987,12 @@ def invoke(hook: str, *args: Any, **kwargs: Any) -> None:
         info(f"{prefix} '{task_object.full_name}' done")
 
 
+# Context managers entered around each plugin hook run by toporun, called
+# with the tree, the plugin's and the hook's name, e.g. the plugin lock of
+# csspin.locking. Like the COMMAND_WRAPPERS, they register themselves here.
+HOOK_WRAPPERS: list[Callable[[ConfigTree, str, str], ContextManager[Any]]] = []
+
+
 def toporun(cfg: ConfigTree, *fn_names: Any, reverse: bool = False) -> None:
     """Run plugin functions named in 'fn_names' in topological order."""
     plugins = cfg.spin.topo_plugins
@@ -1427,7 +2009,14 @@ def toporun(cfg: ConfigTree, *fn_names: Any, reverse: bool = False) -> None:
             initf = getattr(pi_mod, func_name, None)
             if initf:
                 debug(f"  {pi_name}.{func_name}()")
-                initf(cfg)
+                # Hooks may create or change the subprocess environment,
+                # e.g. a virtual environment during provisioning.
+                invalidate_subprocess_environment()
+                with ExitStack() as stack:
+                    for wrapper in HOOK_WRAPPERS:
+                        stack.enter_context(wrapper(cfg, pi_name, func_name))
+                    stack.enter_context(rusage.hook(f"{pi_name}.{func_name}"))
+                    initf(cfg)
 
 
 def main(*args: Any, **kwargs: Any) -> None:
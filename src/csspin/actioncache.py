@@ -0,0 +1,324 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the action cache of ``extra_tasks`` and ``build_rules``.
+
+Task and rule definitions declaring ``inputs`` or ``outputs`` are cached:
+
+.. code-block:: yaml
+
+   extra_tasks:
+     protos:
+       script: protoc --python_out=build/gen src/*.proto
+       inputs:
+         files: ["src/*.proto"]
+         config: [python.version]
+         env: [PROTOC_OPTS]
+       outputs: [build/gen]
+
+``inputs`` is a list of files, directories and glob patterns, or a mapping
+of such ``files``, ``config`` keys and ``env`` variables. The key of an
+action is the hash of the name, the interpolated recipe (``script``,
+``spin`` and ``env``), the declared outputs, the platform and the inputs'
+contents and values. On a hit, the files of the outputs are restored from
+the cache instead of running the recipe; on a miss, the recipe runs and
+its outputs are stored.
+
+Build rules use their ``sources`` as inputs and their target as output,
+unless declared otherwise. Tasks without outputs are cached as having run
+successfully for their inputs.
+
+The cache is content-addressed: ``ac/<key>.json`` lists the output files
+and the hashes of their contents, which are stored in ``cas/``. It lives in
+``spin.action_cache``; ``spin.shared_action_cache`` optionally names a
+directory shared with other machines, e.g. on a network file system, which
+is read on local misses and written along with the local cache. Hashes of
+input files are memoized by modification time and size in
+``{spin.spin_dir}/action-cache-hashes``.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import os
+import pickle
+import platform
+import shutil
+import sys
+import time
+from typing import TYPE_CHECKING
+
+from path import Path
+
+from csspin import (
+    RECIPE_WRAPPERS,
+    atomic_write,
+    debug,
+    echo,
+    info,
+    interpolate,
+    interpolate1,
+    unpersist,
+    warn,
+)
+from csspin.scanner import scan
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Iterable
+
+    from csspin.tree import ConfigTree
+
+# Bump when the layout of the cache or the computation of keys changes
+VERSION = 1
+
+# The age in nanoseconds of files whose hashes are memoized
+RACY_NS = 2_000_000_000
+
+# The memoized hashes of files: (file name, {path: ((mtime, size), digest)})
+_HASHES: tuple[str, dict] | None = None
+
+
+def declared(definition: Any) -> bool:
+    """Return whether the task or rule `definition` is cached."""
+    return "inputs" in definition or "outputs" in definition
+
+
+def _as_list(value: Any) -> list:
+    if value is None:
+        return []
+    if isinstance(value, str) or not hasattr(value, "__iter__"):
+        return [value]
+    return list(value)
+
+
+def caches(cfg: ConfigTree) -> list[Path]:
+    """Return the directories of the local and the shared cache."""
+    dirs = [interpolate1(Path(cfg.spin.action_cache))]
+    if shared := cfg.spin.get("shared_action_cache"):
+        dirs.append(interpolate1(Path(shared)))
+    return dirs  # type: ignore[return-value]
+
+
+def file_digest(fn: str) -> str:
+    """Return the SHA-256 hash of the contents of file `fn`."""
+    digest = hashlib.sha256()
+    with open(fn, "rb") as f:
+        while chunk := f.read(1 << 20):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _relative(path: str, root: str) -> str:
+    return os.path.relpath(path, root).replace(os.sep, "/")
+
+
+def hash_files(cfg: ConfigTree, patterns: Iterable[str], root: str) -> dict[str, str]:
+    """Return the hashes of the contents of the files matching `patterns`,
+    by their path relative to `root`."""
+    global _HASHES  # pylint: disable=global-statement
+    fn = interpolate1("{spin.spin_dir}/action-cache-hashes")
+    if _HASHES is None or _HASHES[0] != fn:
+        try:
+            _HASHES = (fn, unpersist(fn, {}) or {})
+        except (pickle.UnpicklingError, EOFError):
+            debug(f"Ignoring the broken {fn}")
+            _HASHES = (fn, {})
+    memo = _HASHES[1]
+    hashes = {}
+    dirty = False
+    # Files modified just now may be modified again without changing their
+    # time stamp, so their hashes are not memoized.
+    recent = time.time_ns() - RACY_NS
+    for path, state in scan(patterns, root).items():
+        if (entry := memo.get(path)) is None or entry[0] != state:
+            entry = (state, file_digest(path))
+            if state[0] < recent:
+                memo[path] = entry
+                dirty = True
+        hashes[_relative(path, root)] = entry[1]
+    if dirty and os.path.isdir(os.path.dirname(fn)):
+        with atomic_write(fn, "wb") as f:
+            pickle.dump(memo, f)
+    return hashes
+
+
+def _config_value(cfg: ConfigTree, key: str) -> Any:
+    value: Any = cfg
+    for part in key.split("."):
+        value = value.get(part) if hasattr(value, "get") else None
+    return interpolate1(value) if isinstance(value, str) else value
+
+
+def action_key(
+    cfg: ConfigTree, name: str, definition: Any, inputs: Any, outputs: list
+) -> str:
+    """Return the key of the action `name` defined by `definition`."""
+    if not hasattr(inputs, "get"):
+        inputs = {"files": inputs}
+    root = str(cfg.spin.project_root)
+    env = definition.get("env") or {}
+    parts = [
+        VERSION,
+        name,
+        sys.platform,
+        platform.machine(),
+        interpolate(_as_list(definition.get("script"))),
+        interpolate(_as_list(definition.get("spin"))),
+        {var: interpolate1(str(value)) for var, value in env.items()},
+        interpolate(outputs),
+        sorted(
+            hash_files(cfg, interpolate(_as_list(inputs.get("files"))), root).items()
+        ),
+        [
+            (key, _config_value(cfg, key))
+            for key in sorted(_as_list(inputs.get("config")))
+        ],
+        [(var, os.environ.get(var)) for var in sorted(_as_list(inputs.get("env")))],
+    ]
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+def _blob(cache: Path, digest: str) -> Path:
+    return cache / "cas" / digest[:2] / digest
+
+
+def restore(cfg: ConfigTree, key: str) -> int | None:
+    """Restore the outputs of the action `key` from the first cache having
+    it. Return the number of files restored, or None on a miss."""
+    root = str(cfg.spin.project_root)
+    for cache in caches(cfg):
+        try:
+            with open(cache / "ac" / f"{key}.json", encoding="utf-8") as f:
+                files = json.load(f)["outputs"]
+        except (OSError, ValueError, KeyError):
+            continue
+        if not all(os.path.isfile(_blob(cache, digest)) for _, digest, _ in files):
+            debug(f"{cache}: incomplete entry {key}")
+            continue
+        for rel, digest, executable in files:
+            target = os.path.join(root, rel)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            tmp = f"{target}.{os.getpid()}.tmp"
+            # Don't copy the time stamp of the blob, so the outputs are
+            # newer than their sources.
+            shutil.copyfile(_blob(cache, digest), tmp)
+            if executable:
+                os.chmod(tmp, os.stat(tmp).st_mode | 0o111)
+            os.replace(tmp, target)
+        return len(files)
+    return None
+
+
+def store(cfg: ConfigTree, key: str, name: str, outputs: list) -> None:
+    """Store the outputs of the action `key` in the caches."""
+    root = str(cfg.spin.project_root)
+    snapshot: dict = {}
+    for pattern in interpolate(outputs):
+        if not (matches := scan([pattern], root)):
+            warn(f"{name} did not produce {pattern}, not caching it")
+            return
+        snapshot.update(matches)
+    files = [
+        (
+            _relative(path, root),
+            file_digest(path),
+            bool(os.stat(path).st_mode & 0o100),
+        )
+        for path in sorted(snapshot)
+    ]
+    entry = json.dumps({"name": name, "created": time.time(), "outputs": files})
+    for cache in caches(cfg):
+        try:
+            for (_, digest, _), path in zip(files, sorted(snapshot)):
+                if not os.path.isfile(blob := _blob(cache, digest)):
+                    os.makedirs(blob.dirname(), exist_ok=True)
+                    tmp = f"{blob}.{os.getpid()}.tmp"
+                    shutil.copyfile(path, tmp)
+                    os.replace(tmp, blob)
+            os.makedirs(cache / "ac", exist_ok=True)
+            with atomic_write(cache / "ac" / f"{key}.json") as f:
+                f.write(entry)
+        except OSError as exc:
+            warn(f"Can't store {name} in the action cache {cache}: {exc}")
+
+
+def stats(cfg: ConfigTree) -> dict:
+    """Return the hit and miss counts of the local cache."""
+    try:
+        with open(caches(cfg)[0] / "stats.json", encoding="utf-8") as f:
+            return json.load(f)  # type: ignore[no-any-return]
+    except (OSError, ValueError):
+        return {"hits": 0, "misses": 0}
+
+
+def _count(cfg: ConfigTree, hit: bool) -> None:
+    counts = stats(cfg)
+    counts["hits" if hit else "misses"] += 1
+    try:
+        os.makedirs(cache := caches(cfg)[0], exist_ok=True)
+        with atomic_write(cache / "stats.json") as f:
+            json.dump(counts, f)
+    except OSError as exc:
+        debug(f"Can't update the action cache statistics: {exc}")
+
+
+def run(
+    cfg: ConfigTree,
+    name: str,
+    definition: Any,
+    recipe: Callable[[], None],
+    *,
+    inputs: Any = (),
+    outputs: Iterable[str] = (),
+) -> None:
+    """Run `recipe` of the task or build rule `name` declared by
+    `definition`, unless its outputs can be restored from the cache.
+    `inputs` and `outputs` are the defaults for undeclared ones."""
+    outputs = _as_list(definition.get("outputs", outputs))
+    key = action_key(cfg, name, definition, definition.get("inputs", inputs), outputs)
+    if (restored := restore(cfg, key)) is not None:
+        _count(cfg, hit=True)
+        echo(f"{name}: restored {restored} files from the action cache")
+        return
+    _count(cfg, hit=False)
+    info(f"{name}: not in the action cache")
+    recipe()
+    store(cfg, key, name, outputs)
+
+
+def cached(
+    cfg: ConfigTree,
+    name: str,
+    definition: Any,
+    recipe: Callable[[], None],
+    *,
+    inputs: Any = (),
+    outputs: Iterable[str] = (),
+) -> Callable[[], None]:
+    """Return `recipe` running through the cache, if `definition` declares
+    it cached. Arguments are those of :py:func:`run`."""
+    if not declared(definition):
+        return recipe
+    return functools.partial(
+        run, cfg, name, definition, recipe, inputs=inputs, outputs=outputs
+    )
+
+
+RECIPE_WRAPPERS.append(cached)
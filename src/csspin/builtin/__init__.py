@@ -19,24 +19,37 @@
 through a plugin package and are always available.
 """
 
-import sys
+import tempfile
 
 import click
-import distro
 
 from csspin import (
+    Path,
+    Verbosity,
     abspath,
+    actioncache,
     argument,
+    bundle,
     confirm,
     die,
+    echo,
+    envcache,
+    get_tree,
+    group,
+    hostfacts,
+    interpolate1,
+    mkdir,
     option,
     parse_version,
+    pluginstore,
     rmtree,
     run_script,
     run_spin,
     sh,
+    sysreqs,
     task,
     toporun,
+    trace,
     tree,
     warn,
 )
@@ -45,10 +58,13 @@ from csspin.cli import (
     PREPEND_PROP,
     PROP,
     commands,
+    download_plugin_packages,
     finalize_cfg_tree,
     install_plugin_packages,
     load_plugins_into_tree,
+    yield_plugin_import_specs,
 )
+from csspin.watch import watch
 
 
 @task("run", add_help_option=False)
@@ -149,10 +165,19 @@ def schemadoc(  # type: ignore[no-untyped-def]
 
 
 class TaskDefinition:
-    def __init__(self, definition: dict) -> None:
+    def __init__(self, definition: dict, name: str = "") -> None:
         self._definition = definition
+        self._name = name
 
     def __call__(self) -> None:
+        if actioncache.declared(self._definition):
+            actioncache.run(
+                get_tree(), f"task {self._name}", self._definition, self.run
+            )
+        else:
+            self.run()
+
+    def run(self) -> None:
         env = self._definition.get("env", None)
         run_spin(self._definition.get("spin", []))
         run_script(self._definition.get("script", []), env)
@@ -166,7 +191,7 @@ def configure(cfg) -> None:  # type: ignore[no-untyped-def]
     for clause_name in ("extra_tasks", "tasks"):
         for task_name, task_definition in cfg.get(clause_name, {}).items():
             task(task_name, help=task_definition.get("help", ""))(
-                TaskDefinition(task_definition)
+                TaskDefinition(task_definition, task_name)
             )
 
 
@@ -184,12 +209,13 @@ def merge_dicts(a: dict, b: dict) -> None:
 
 
 def get_distro() -> dict:
-    dinfo = distro.info()
-    if sys.platform == "win32":
-        dinfo["id"] = "windows"
-        winver = sys.getwindowsversion()
-        dinfo["version"] = f"{winver.major}.{winver.minor}.{winver.build}"
-    return dinfo  # type: ignore[no-any-return]
+    facts = hostfacts.host_facts()
+    return {
+        "id": facts["distro"],
+        "version": facts["distro_version"],
+        "like": facts["distro_like"],
+        "codename": facts["distro_codename"],
+    }
 
 
 @task("system-provision", noenv=True)
@@ -211,10 +237,19 @@ def do_system_provisioning(  # type: ignore[no-untyped-def]
         " a future release. Please refer to the 'System requirements' section"
         " in csspin's documentation."
     )
-    # Install the plugins and build the full config tree
-    install_plugin_packages(cfg)
-    load_plugins_into_tree(cfg)
-    finalize_cfg_tree(cfg)
+    # Plugins that publish their system requirements in their schema don't
+    # have to be installed and loaded.
+    requirements = sysreqs.static_requirements(cfg, yield_plugin_import_specs(cfg))
+    if requirements is None:
+        # Install the plugins and build the full config tree
+        install_plugin_packages(cfg)
+        load_plugins_into_tree(cfg)
+        finalize_cfg_tree(cfg)
+        requirements = {}
+        for pi in cfg.spin.topo_plugins:
+            defaults = cfg.loaded[pi].defaults
+            if defaults.get("requires") and defaults.requires.get("system"):
+                requirements[pi] = defaults.requires.system
 
     if distroargs:
         distroname = distroargs[0]
@@ -225,19 +260,18 @@ def do_system_provisioning(  # type: ignore[no-untyped-def]
     # Check system requirements of individual plugins
     out: dict = {}
     supported = True
-    for pi in cfg.spin.topo_plugins:
-        defaults = cfg.loaded[pi].defaults
-        if defaults.get("requires") and defaults.requires.get("system"):
-            system_requirements = defaults.requires.system
-            if distroname not in system_requirements.keys():
-                warn(
-                    f"The '{pi}' plugin does not officially support"
-                    f" {distroname}. You can see which packages to"
-                    " manually install by running 'spin system-provision debian'"
-                )
-                supported = False
-            else:
-                merge_dicts(out, system_requirements.get(distroname, []))
+    for pi, system_requirements in requirements.items():
+        if not system_requirements:
+            continue
+        if distroname not in system_requirements.keys():
+            warn(
+                f"The '{pi}' plugin does not officially support"
+                f" {distroname}. You can see which packages to"
+                " manually install by running 'spin system-provision debian'"
+            )
+            supported = False
+        else:
+            merge_dicts(out, system_requirements.get(distroname, []))
 
     # Check system requirements defined within the configuration tree, usually
     # defined the projects' spinfile.yaml.
@@ -270,13 +304,11 @@ def distro_task(cfg) -> None:  # type: ignore[no-untyped-def]
     print(f"distro={repr(dinfo['id'])} version={parse_version(dinfo['version'])}")
 
 
-@task("provision", noenv=True)
-def provision(cfg) -> None:  # type: ignore[no-untyped-def]
-    """
-    Create or update a development environment.
-    """
+def _provision(cfg, find_links=None) -> None:  # type: ignore[no-untyped-def]
+    # The activation output depends on what is about to be provisioned
+    envcache.invalidate(cfg)
     # Install the plugins and build the full config tree
-    install_plugin_packages(cfg)
+    install_plugin_packages(cfg, find_links=find_links)
     load_plugins_into_tree(cfg)
     finalize_cfg_tree(cfg)
 
@@ -284,6 +316,174 @@ def provision(cfg) -> None:  # type: ignore[no-untyped-def]
     toporun(cfg, "finalize_provision")
 
 
+@task("provision", noenv=True)
+def provision(  # type: ignore[no-untyped-def]
+    cfg,
+    from_bundle: option(  # type: ignore[valid-type]
+        "--from-bundle",  # noqa: F722
+        type=click.Path(exists=True, dir_okay=False),
+        metavar="FILE",
+        help=(
+            "Install the plugin packages and read downloads from the bundle"  # noqa: F722
+            " FILE created by 'spin bundle create', without network access."  # noqa: F722
+        ),
+    ),
+) -> None:
+    """
+    Create or update a development environment.
+    """
+    if from_bundle:
+        with bundle.using(from_bundle) as wheels:
+            _provision(cfg, find_links=wheels)
+    else:
+        _provision(cfg)
+
+
+@group("bundle", noenv=True)
+def bundle_group(ctx) -> None:  # type: ignore[no-untyped-def]
+    """Manage bundles for provisioning without network access."""
+
+
+@bundle_group.task("create")
+def bundle_create(  # type: ignore[no-untyped-def]
+    cfg,
+    output: option(  # type: ignore[valid-type]
+        "-o",
+        "--output",
+        default="{spin.project_root}/spin-bundle.zip",
+        show_default=True,
+        metavar="FILE",
+        help="Where to write the bundle.",  # noqa: F722
+    ),
+) -> None:
+    """Create a bundle for provisioning the project offline.
+
+    Downloads the wheels of the plugin packages and their dependencies,
+    provisions the project into empty, temporary {spin.data} and
+    {spin.spin_dir} directories and records every artifact fetched while
+    doing so. The project's environment is left untouched. Use the bundle
+    via 'spin provision --from-bundle FILE'.
+    """
+    output = interpolate1(output)
+    with tempfile.TemporaryDirectory(prefix="spin-bundle-") as tmpdir:
+        wheels = Path(tmpdir) / "wheels"
+        download_plugin_packages(
+            cfg, wheels, "-q" if cfg.verbosity < Verbosity.INFO else None
+        )
+
+        # Artifacts already present are not fetched, so provisioning starts
+        # from scratch.
+        cfg.spin.data = mkdir(Path(tmpdir) / "data")
+        cfg.spin.spin_dir = mkdir(Path(tmpdir) / "spin")
+        with bundle.recording() as downloads:
+            _provision(cfg)
+            manifest = bundle.write(output, wheels, downloads)
+    echo(
+        f"Created {output} with {len(manifest['wheels'])} packages and"
+        f" {len(manifest['downloads'])} downloads"
+    )
+
+
+@task("watch")
+def watch_task(  # type: ignore[no-untyped-def]
+    cfg,
+    patterns: option(  # type: ignore[valid-type]
+        "--on",
+        "patterns",
+        multiple=True,
+        metavar="PATTERN",
+        help=(
+            "Watch the files matching PATTERN instead of the sources of"  # noqa: F722
+            " the task's build rule; can be given multiple times."  # noqa: F722
+        ),
+    ),
+    interval: option(  # type: ignore[valid-type]
+        "--interval",
+        type=float,
+        default=0.5,
+        show_default=True,
+        help="Seconds between polls for changes.",  # noqa: F722
+    ),
+    debounce: option(  # type: ignore[valid-type]
+        "--debounce",
+        type=float,
+        default=0.3,
+        show_default=True,
+        help="Seconds without further changes before re-running.",  # noqa: F722
+    ),
+    args,
+) -> None:
+    """
+    Run a task, and run it again whenever its sources change.
+
+    Without --on, the sources of the build rule 'task <name>' are watched.
+    The configuration tree is kept in memory and only rebuilt when the
+    spinfile or global.yaml change. Options of 'watch' must precede the
+    task name.
+    """
+    watch(cfg, list(args), patterns, interval, debounce)
+
+
+@group("trace", noenv=True)
+def trace_group(ctx) -> None:  # type: ignore[no-untyped-def]
+    """Inspect the trace logs of the commands run by spin."""
+
+
+@trace_group.task("summarize")
+def trace_summarize(  # type: ignore[no-untyped-def]
+    cfg,
+    by: option(  # type: ignore[valid-type]
+        "--by",
+        type=click.Choice(["task", "plugin", "cmd"]),
+        multiple=True,
+        help="Aggregate by task, plugin or command line; defaults to task and cmd.",  # noqa: F722,E501
+    ),
+    top: option(  # type: ignore[valid-type]
+        "--top",
+        type=int,
+        default=20,
+        show_default=True,
+        metavar="N",
+        help="Show the N most expensive entries per table.",  # noqa: F722
+    ),
+    files: argument(  # type: ignore[valid-type]
+        nargs=-1, type=click.Path(exists=True, dir_okay=False)
+    ),
+) -> None:
+    """Summarize the commands recorded with SPIN_TRACE=1.
+
+    Aggregates the commands recorded in FILES, by default in all trace
+    logs of the project in {spin.spin_dir}/traces, by task and by command
+    line, the most expensive first.
+    """
+    if not (files := files or trace.logs(cfg)):
+        die("No trace logs found, run spin with SPIN_TRACE=1 first.")
+    records = list(trace.read(files))
+    for key in by or ("task", "cmd"):
+        click.echo(trace.format_table(trace.aggregate(records, key)[:top], key))
+        click.echo()
+
+
+@group("action-cache", noenv=True)
+def action_cache_group(ctx) -> None:  # type: ignore[no-untyped-def]
+    """Manage the cache of extra tasks and build rules."""
+
+
+@action_cache_group.task("stats")
+def action_cache_stats(cfg) -> None:  # type: ignore[no-untyped-def]
+    """Print the hits and misses of the action cache."""
+    counts = actioncache.stats(cfg)
+    total = counts["hits"] + counts["misses"]
+    rate = counts["hits"] / total if total else 0.0
+    click.echo(f"hits: {counts['hits']}, misses: {counts['misses']}, rate: {rate:.0%}")
+
+
+@action_cache_group.task("clear")
+def action_cache_clear(cfg) -> None:  # type: ignore[no-untyped-def]
+    """Remove all entries from the local action cache."""
+    rmtree(actioncache.caches(cfg)[0])
+
+
 @task(noenv=True, short_help="Clean up project-local resources.")
 def cleanup(  # type: ignore[no-untyped-def]
     cfg,
@@ -299,11 +499,19 @@ def cleanup(  # type: ignore[no-untyped-def]
         is_flag=True,
         help="Skip confirmation when using --purge.",  # noqa: F722
     ),
+    wait: option(  # type: ignore[valid-type]
+        "--wait",
+        is_flag=True,
+        help="Wait until all files are deleted.",  # noqa: F722
+    ),
 ) -> None:
     """
     Clean up project-local resources that have been provisioned by spin, e.g.
     virtual environments and {project_root}/.spin. Also deletes {spin.data}
     if --purge is passed.
+
+    The plugin directory and {spin.data} are moved out of the way and
+    deleted in the background, unless --wait is passed.
     """
     # Load the plugins as far as they are available.
     load_plugins_into_tree(cfg, cleanup=True)
@@ -336,7 +544,11 @@ def cleanup(  # type: ignore[no-untyped-def]
     # to interpolation against property tree keys that does not exist.
 
     toporun(cfg, "cleanup", reverse=True)
-    rmtree(cfg.spin.spin_dir / "plugins")
+    pluginstore.unregister(cfg)
+    pluginstore.collect_garbage(cfg)
+    rmtree(cfg.spin.spin_dir / "plugins", background=not wait)
+    rmtree(cfg.spin.spin_dir / "backtick.cache")
+    rmtree(envcache.cache_dir(cfg))
 
     if purge:
-        rmtree(cfg.spin.data)
+        rmtree(cfg.spin.data, background=not wait)
@@ -0,0 +1,188 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing offline provisioning bundles.
+
+A bundle is a zip archive holding the wheels of the plugin packages of a
+project and their dependencies, every artifact fetched via
+:py:func:`csspin.download` while provisioning, and the manifest
+``bundle.json`` mapping the URLs of these artifacts to their members and
+SHA-256 digests.
+``spin bundle create`` creates a bundle, ``spin provision --from-bundle``
+installs the plugin packages from it and serves the downloads from it,
+without touching the network.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+
+from csspin import atomic_write, debug, die, echo
+
+if TYPE_CHECKING:
+    from typing import IO, Generator
+
+    from path import Path
+
+BUNDLE_VERSION = 1
+
+MANIFEST = "bundle.json"
+
+# The size of the chunks artifacts are hashed and copied in
+CHUNK_SIZE = 1 << 20
+
+# The directory holding the downloads recorded while creating a bundle,
+# and their copies by URL
+_RECORDING: tuple[str, dict[str, str]] | None = None
+
+# The bundle provisioning is served from, and its manifest
+_SOURCE: tuple[zipfile.ZipFile, dict] | None = None
+
+
+def member_name(url: str) -> str:
+    """Return the name of the member a download from `url` is stored as."""
+    digest = hashlib.sha256(url.encode()).hexdigest()[:16]
+    basename = os.path.basename(urlparse(url).path) or "download"
+    return f"downloads/{digest}-{basename}"
+
+
+class _HashingWriter:
+    """Writes to `stream`, computing the SHA-256 of the data written."""
+
+    def __init__(self, stream: IO[bytes] | None = None) -> None:
+        self.stream = stream
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data: bytes) -> None:
+        self.sha256.update(data)
+        if self.stream is not None:
+            self.stream.write(data)
+
+
+def file_digest(fn: str | Path) -> str:
+    """Return the SHA-256 of the file `fn`, read in chunks."""
+    hashing = _HashingWriter()
+    with open(fn, "rb") as f:
+        shutil.copyfileobj(f, hashing, CHUNK_SIZE)
+    return hashing.sha256.hexdigest()
+
+
+def record(url: str, location: str | Path) -> None:
+    """Record the file `location` downloaded from `url`, if a bundle is
+    being created."""
+    if _RECORDING is not None:
+        directory, downloads = _RECORDING
+        # Plugins may remove or modify downloads after extracting them
+        copy = os.path.join(directory, os.path.basename(member_name(url)))
+        downloads[url] = shutil.copyfile(location, copy)
+
+
+def restore(url: str, location: str | Path) -> bool:
+    """Copy the download from `url` to the file `location` from the bundle
+    provisioning is served from, verifying its digest. Return False if
+    there is no such bundle."""
+    if _SOURCE is None:
+        return False
+    archive, manifest = _SOURCE
+    if (member := manifest["downloads"].get(url)) is None:
+        die(f"{url} is not part of the bundle {archive.filename}")
+    echo(f"Extract {url} -> {location} from bundle ...")
+    debug(f"Reading {member} from {archive.filename}")
+    with archive.open(member) as src, atomic_write(location, "wb") as dst:
+        hashing = _HashingWriter(dst)
+        shutil.copyfileobj(src, hashing, CHUNK_SIZE)
+        if hashing.sha256.hexdigest() != manifest["sha256"][url]:
+            die(f"{member} of the bundle {archive.filename} is corrupt")
+    return True
+
+
+@contextlib.contextmanager
+def recording() -> Generator:
+    """Record the downloads made within the context, yielding a mapping of
+    the URLs to copies of the downloaded files, which are removed when the
+    context is left."""
+    global _RECORDING  # pylint: disable=global-statement
+    with tempfile.TemporaryDirectory(prefix="spin-downloads-") as directory:
+        _RECORDING = directory, {}
+        try:
+            yield _RECORDING[1]
+        finally:
+            _RECORDING = None
+
+
+def write(fn: str | Path, wheels: str | Path, downloads: dict) -> dict:
+    """Write the bundle `fn` from the wheels in the directory `wheels` and
+    `downloads` mapping URLs to files. Return the bundle's manifest."""
+    from csspin import get_tree
+
+    cfg = get_tree()
+    manifest: dict = {
+        "version": BUNDLE_VERSION,
+        "csspin": cfg.spin.version,
+        "project": cfg.spin.project_name,
+        "wheels": sorted(os.listdir(wheels)) if os.path.isdir(wheels) else [],
+        "downloads": {url: member_name(url) for url in sorted(downloads)},
+        "sha256": {url: file_digest(downloads[url]) for url in sorted(downloads)},
+    }
+    with atomic_write(fn, "wb") as f:
+        with zipfile.ZipFile(f, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr(MANIFEST, json.dumps(manifest, indent=1))
+            for name in manifest["wheels"]:
+                # Wheels are compressed already
+                archive.write(
+                    os.path.join(wheels, name),
+                    f"wheels/{name}",
+                    compress_type=zipfile.ZIP_STORED,
+                )
+            for url, member in manifest["downloads"].items():
+                archive.write(downloads[url], member)
+    return manifest
+
+
+@contextlib.contextmanager
+def using(fn: str | Path) -> Generator:
+    """Serve the downloads made within the context from the bundle `fn`,
+    yielding the directory holding the bundle's wheels."""
+    global _SOURCE  # pylint: disable=global-statement
+    try:
+        archive = zipfile.ZipFile(fn)  # pylint: disable=consider-using-with
+        manifest = json.loads(archive.read(MANIFEST))
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as exc:
+        die(f"{fn} is not a valid bundle: {exc}")
+    if manifest.get("version") != BUNDLE_VERSION:
+        archive.close()
+        die(f"{fn} has an unknown format")
+    with archive, tempfile.TemporaryDirectory(prefix="spin-bundle-") as tmpdir:
+        wheels = os.path.join(tmpdir, "wheels")
+        os.makedirs(wheels)
+        archive.extractall(
+            tmpdir, members=[f"wheels/{name}" for name in manifest["wheels"]]
+        )
+        _SOURCE = archive, manifest
+        try:
+            yield wheels
+        finally:
+            _SOURCE = None
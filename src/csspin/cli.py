@@ -50,14 +50,22 @@ from csspin import (
     config,
     debug,
     die,
+    envcache,
     exists,
     get_requires,
     get_tree,
+    hostfacts,
+    info,
     interpolate1,
+    locking,
+    manifest,
     memoizer,
     mkdir,
     obfuscate,
+    pluginlock,
+    pluginstore,
     readyaml,
+    rusage,
     schema,
     secrets,
     set_tree,
@@ -68,9 +76,12 @@ from csspin import (
     warn,
     writetext,
 )
+from csspin.graph import PluginGraph
+from csspin.pluginlock import yield_plugin_import_specs
 from csspin.tree import ConfigTree
 
 if TYPE_CHECKING:
+    import subprocess
     from typing import Callable
 
 
@@ -102,6 +113,11 @@ PROP: list[str] = []
 PREPEND_PROP: list[str] = []
 APPEND_PROP: list[str] = []
 DUMP = False
+DUMP_FORMAT = "text"
+DUMP_SELECT: str | None = None
+# The environment base passed on the command line, used when the tree is
+# rebuilt, e.g. by 'spin watch'.
+ENVBASE: str | None = None
 
 
 def find_spinfile(spinfile: str | None) -> str | None:
@@ -121,28 +137,20 @@ def find_spinfile(spinfile: str | None) -> str | None:
     return None
 
 
-def load_plugin(
-    cfg: tree.ConfigTree,
-    import_spec: str,
-    may_fail: bool = False,
-    indent: str = "  ",
-) -> ModuleType | None:
-    """Recursively load a plugin module.
+# Schema files of the plugins loaded by this process, recorded in the
+# plugin lock: maps module names to import spec, schema file and status.
+PLUGIN_SCHEMAS: dict[str, tuple[str, str | None, str | None]] = {}
 
-    Load the plugin given by 'import_spec' and its dependencies
-    specified in the module-level configuration key 'requires' (list
-    of absolute or relative import specs).
 
-    """
+def _import_plugin(
+    import_spec: str, may_fail: bool = False, indent: str = "  "
+) -> ModuleType | None:
     debug(f"{indent}import plugin {import_spec}")
-
-    mod = full_name = None
     try:
         # Invalidate the caches before dynamically importing modules that were
         # created after the interpreter was started.
         importlib.invalidate_caches()
-        mod = importlib.import_module(import_spec)
-        full_name = mod.__name__
+        return importlib.import_module(import_spec)
     except ModuleNotFoundError as exc:
         if may_fail:
             # We tolerate this only in context of cleanup, where imports may not
@@ -151,112 +159,177 @@ def load_plugin(
                 f"Plugin {import_spec} could not be loaded, it may need to be"
                 " provisioned"
             )
-        else:
-            raise ModuleNotFoundError(
-                f"Plugin {import_spec} could not be loaded, it may need to be"
-                " provisioned"
-            ) from exc
+            return None
+        raise ModuleNotFoundError(
+            f"Plugin {import_spec} could not be loaded, it may need to be provisioned"
+        ) from exc
 
-    if full_name and full_name not in cfg.loaded:
-        # This plugin module has not been imported so far --
-        # initialize it and recursively load dependencies
 
-        plugin_defaults = getattr(mod, "defaults", config())
-        # The subtree is either the module name for the plugin
-        # (excluding the package prefix), or __name__, if that is set.
-        settings_name = plugin_defaults.get("__name__", full_name.split(".")[-1])
-        debug(f"{indent}add subtree {settings_name}")
-        plugin_config_tree = cfg.setdefault(settings_name, config())
-        if not isinstance(plugin_config_tree, ConfigTree):
-            die(
-                f"The configuration of {import_spec} is invalid."
-                " Please check its configuration in spinfile.yaml"
-                " and global.yaml."
-            )
+# The defaults as declared by the plugin modules. After loading a plugin,
+# its 'defaults' refer to the plugin's subtree of the configuration tree.
+PLUGIN_DEFAULTS: dict[str, tree.ConfigTree] = {}
 
-        if not import_spec.startswith("csspin."):
-            try:
-                # Load the plugin specific schema for non-builtin plugins
-                plugin_name = import_spec.split(".")[-1]
-                debug(f"{indent}loading {plugin_name}_schema.yaml")
-                plugin_schema = schema.schema_load(  # type: ignore[attr-defined]
-                    os.path.join(
-                        os.path.dirname(mod.__file__),  # type: ignore[union-attr,arg-type]
-                        f"{plugin_name}_schema.yaml",
-                    )
-                ).properties[plugin_name]
-
-                # Assign the schema to the plugins sub-tree as well as to the
-                # global schema.
-                plugin_config_tree.schema = plugin_schema
-                # fmt: off
-                cfg._ConfigTree__schema.properties[settings_name] = (  # pylint: disable=protected-access
-                    plugin_schema
-                )
-                # fmt: on
-
-                tree.tree_merge(plugin_config_tree, plugin_schema.get_default())
-            except FileNotFoundError:
-                debug(format_exc())
-                warn(f"Plugin {import_spec} does not provide a schema.")
-            except KeyError:
-                debug(format_exc())
-                warn(f"Plugin {import_spec} does not provide a valid schema.")
-
-            if plugin_defaults:
-                tree.tree_update(
-                    plugin_config_tree,
-                    plugin_defaults,  # type: ignore[arg-type]
-                    keep=interpolate1("{spin.spinfile}"),
-                )
-        elif plugin_defaults:
-            tree.tree_update(
-                plugin_config_tree,
-                plugin_defaults,  # type: ignore[arg-type]
-                keep=interpolate1("{spin.spinfile}"),
+
+def _plugin_defaults(mod: ModuleType) -> tree.ConfigTree:
+    """Return a copy of the defaults declared by plugin module `mod`, so
+    that building a tree neither modifies them nor starts from the values
+    of a tree built before."""
+    defaults = getattr(mod, "defaults", None)
+    if defaults is None:
+        return config()
+    # pylint: disable=protected-access
+    if getattr(defaults, "_ConfigTree__parentinfo", None) is None:
+        # Not yet replaced by a subtree of a configuration tree
+        PLUGIN_DEFAULTS[mod.__name__] = defaults
+    return tree.tree_copy(PLUGIN_DEFAULTS.get(mod.__name__, defaults))  # type: ignore[no-any-return]
+
+
+def _initialize_plugin(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    cfg: tree.ConfigTree,
+    mod: ModuleType,
+    import_spec: str,
+    indent: str = "  ",
+    schema_file: str | None = None,
+    schema_status: str | None = None,
+) -> tree.ConfigTree:
+    """Add the subtree of plugin `mod` to the configuration tree.
+
+    The plugin's schema is read from `schema_file`, or searched next to
+    the module if not given. If `schema_status` tells that the schema is
+    missing or invalid, it is not searched for at all.
+    """
+    full_name = mod.__name__
+    plugin_defaults = _plugin_defaults(mod)
+    # The subtree is either the module name for the plugin
+    # (excluding the package prefix), or __name__, if that is set.
+    settings_name = plugin_defaults.get("__name__", full_name.split(".")[-1])
+    debug(f"{indent}add subtree {settings_name}")
+    plugin_config_tree = cfg.setdefault(settings_name, config())
+    if not isinstance(plugin_config_tree, ConfigTree):
+        die(
+            f"The configuration of {import_spec} is invalid."
+            " Please check its configuration in spinfile.yaml"
+            " and global.yaml."
+        )
+
+    if not import_spec.startswith("csspin."):
+        # Load the plugin specific schema for non-builtin plugins
+        plugin_name = import_spec.split(".")[-1]
+        if schema_file is None:
+            schema_file = os.path.join(
+                os.path.dirname(mod.__file__),  # type: ignore[arg-type,type-var]
+                f"{plugin_name}_schema.yaml",
+            )
+        try:
+            if schema_status == "missing":
+                raise FileNotFoundError(schema_file)
+            if schema_status == "invalid":
+                raise KeyError(plugin_name)
+            debug(f"{indent}loading {plugin_name}_schema.yaml")
+            plugin_schema = schema.schema_load(schema_file).properties[plugin_name]
+
+            # Assign the schema to the plugins sub-tree as well as to the
+            # global schema.
+            plugin_config_tree.schema = plugin_schema
+            # fmt: off
+            cfg._ConfigTree__schema.properties[settings_name] = (  # pylint: disable=protected-access
+                plugin_schema
             )
-        tree.tree_apply_directives(plugin_config_tree)
+            # fmt: on
+
+            tree.tree_merge(plugin_config_tree, plugin_schema.get_default())
+            schema_status = "ok"
+        except FileNotFoundError:
+            debug(format_exc())
+            warn(f"Plugin {import_spec} does not provide a schema.")
+            schema_status = "missing"
+        except KeyError:
+            debug(format_exc())
+            warn(f"Plugin {import_spec} does not provide a valid schema.")
+            schema_status = "invalid"
+        PLUGIN_SCHEMAS[full_name] = (import_spec, schema_file, schema_status)
+
+    if plugin_defaults:
+        tree.tree_update(
+            plugin_config_tree,
+            plugin_defaults,
+            keep=interpolate1("{spin.spinfile}"),
+        )
+    tree.tree_apply_directives(plugin_config_tree)
+    return plugin_config_tree  # type: ignore[no-any-return]
+
+
+def load_plugin(
+    cfg: tree.ConfigTree,
+    import_spec: str,
+    may_fail: bool = False,
+    indent: str = "  ",
+) -> ModuleType | None:
+    """Recursively load a plugin module.
+
+    Load the plugin given by 'import_spec' and its dependencies
+    specified in the module-level configuration key 'requires' (list
+    of absolute or relative import specs).
+
+    """
+    mod = _import_plugin(import_spec, may_fail, indent)
+
+    if mod and (full_name := mod.__name__) not in cfg.loaded:
+        # This plugin module has not been imported so far --
+        # initialize it and recursively load dependencies
+        plugin_config_tree = _initialize_plugin(cfg, mod, import_spec, indent)
 
         cfg.loaded[full_name] = mod
-        dependencies = set()
+        dependencies: dict[str, None] = {}
         for requirement in get_requires(plugin_config_tree, "spin"):
             if plugin := load_plugin(
                 cfg, requirement, may_fail=may_fail, indent=indent + "  "
             ):
                 # Only depend on installed plugins; This is sufficient here,
                 # since a plugin can only be absent if may_fail is set.
-                dependencies.add(plugin)
+                dependencies[plugin.__name__] = None
 
-        plugin_config_tree._requires = [  # pylint: disable=protected-access
-            dep.__name__
-            for dep in dependencies  # pylint: disable=protected-access # noqa: E501
-        ]
-        mod.defaults = plugin_config_tree  # type: ignore[union-attr]
+        # Keep the declaration order, so that the plugin order is stable
+        plugin_config_tree._requires = list(  # pylint: disable=protected-access
+            dependencies
+        )
+        mod.defaults = plugin_config_tree  # type: ignore[attr-defined]
     return mod
 
 
+def load_plugins_from_lock(cfg: tree.ConfigTree, lock: dict) -> None:
+    """Load the plugins recorded in the plugin lock in a single pass,
+    without discovering their dependencies and schemas."""
+    for record in lock["plugins"]:
+        if record["name"] in cfg.loaded:
+            continue
+        mod = _import_plugin(record["name"])
+        plugin_config_tree = _initialize_plugin(
+            cfg,
+            mod,  # type: ignore[arg-type]
+            record["import_spec"],
+            schema_file=record["schema"],
+            schema_status=record["schema_status"],
+        )
+        cfg.loaded[record["name"]] = mod
+        plugin_config_tree._requires = list(  # pylint: disable=protected-access
+            record["requires"]
+        )
+        mod.defaults = plugin_config_tree  # type: ignore[union-attr]
+
+    # The order has been computed when writing the lock already.
+    PluginGraph.seed(
+        lock["fingerprint"],
+        lock["topo_plugins"],
+        lock["topo_levels"],
+    )
+
+
 def reverse_toposort(nodes: Iterable, graph: dict) -> list:
     """Topologically sort nodes according to graph, which is a dict
     mapping nodes to dependencies.
     """
-    graph = dict(graph)  # don't destroy the input
-    counts = {n: 0 for n in nodes}
-    for targets in graph.values():
-        for n in targets:
-            counts[n] += 1
-    result = []  # type: ignore[var-annotated]
-    independent = {n for n in nodes if counts[n] == 0}
-    while independent:
-        n = independent.pop()
-        result.insert(0, n)
-        for m in graph.pop(n, ()):
-            counts[m] -= 1
-            if counts[m] == 0:
-                independent.add(m)
-    if graph:
-        die("dependency graph has at least one cycle")
-
-    return result
+    return PluginGraph(nodes, graph).order()
 
 
 # This is a click-style decorator that adds the basic command line
@@ -344,10 +417,30 @@ def base_options(fn: Callable) -> Callable:
                 " to analyze problems with spinfile.yaml and for plugin developers."
             ),
         ),
+        click.option(
+            "--dump-format",
+            type=click.Choice(tree.DUMP_FORMATS),
+            default=None,
+            help=(
+                "Format of the configuration tree dump: annotated 'text' (the"
+                " default), or one record per setting as 'json' or 'yaml'."
+                " Implies --dump."
+            ),
+        ),
+        click.option(
+            "--dump-select",
+            default=None,
+            metavar="KEY",
+            help=(
+                "Only dump the subtree or setting KEY, given as dotted path like"
+                " 'python.version'. Implies --dump."
+            ),
+        ),
         click.option(
             "--prepend-properties",
             "--pp",
             multiple=True,
+            shell_complete=manifest.complete_property,
             help=(
                 "Prepend to a setting in spin's configuration tree, using"
                 " 'property=value'. This only works for prepending to lists."
@@ -358,6 +451,7 @@ def base_options(fn: Callable) -> Callable:
             "--append-properties",
             "--ap",
             multiple=True,
+            shell_complete=manifest.complete_property,
             help=(
                 "Append to a setting in spin's configuration tree, using"
                 " 'property=value'. This only works for appending to lists."
@@ -368,6 +462,7 @@ def base_options(fn: Callable) -> Callable:
             "-p",
             "properties",
             multiple=True,
+            shell_complete=manifest.complete_property,
             help=(
                 "Override a setting in spin's configuration tree, using"
                 " 'property=value'. This only works for string properties. Example:"
@@ -417,7 +512,47 @@ def commands(ctx: click.Context, **kwargs: Any) -> None:
         _nested = True
 
 
+class SpinCommand(click.Command):
+    """The entry point, which completes the commands of the plugins, too."""
+
+    def _main_shell_completion(
+        self,
+        ctx_args: Any,
+        prog_name: str,
+        complete_var: str | None = None,
+    ) -> None:
+        if complete_var is None:
+            complete_var = f"_{prog_name.replace('-', '_')}_COMPLETE".upper()
+        instruction = os.environ.get(complete_var)
+        if not instruction:
+            return
+
+        from click.shell_completion import shell_complete
+
+        grp = commands if instruction.endswith("_source") else completion_group()
+        sys.exit(shell_complete(grp, ctx_args, prog_name, complete_var, instruction))
+
+
+def completion_group() -> click.Group:
+    """Return the main command group for completing the command line,
+    preferably built from the command manifest."""
+    if not (spinfile := find_spinfile(None)):
+        return commands
+    cfg = load_minimal_tree(spinfile, verbosity=Verbosity.QUIET, setenvs=False)
+    if (grp := manifest.command_group(cfg)) is None:
+        try:
+            load_plugins_into_tree(cfg)
+            finalize_cfg_tree(cfg)
+        except (click.Abort, ModuleNotFoundError):
+            # e.g. the project is not provisioned yet
+            return commands
+        manifest.update(cfg)
+        grp = manifest.command_group(cfg) or commands
+    return grp
+
+
 @click.command(
+    cls=SpinCommand,
     context_settings={
         "allow_extra_args": True,
         # Override the default help option name -- we want click to
@@ -440,6 +575,8 @@ def cli(  # type: ignore[return] # pylint: disable=too-many-arguments,too-many-p
     quiet: bool,
     verbose: int,
     dump: bool,
+    dump_format: str | None,
+    dump_select: str | None,
     properties: tuple,
     prepend_properties: tuple,
     append_properties: tuple,
@@ -454,17 +591,23 @@ def cli(  # type: ignore[return] # pylint: disable=too-many-arguments,too-many-p
         quiet = True
         verbose = -1
 
-    global DUMP  # pylint: disable=global-statement
+    global DUMP, DUMP_FORMAT, DUMP_SELECT, ENVBASE  # pylint: disable=global-statement
     PROP.extend(properties)
     PREPEND_PROP.extend(prepend_properties)
     APPEND_PROP.extend(append_properties)
+    dump = dump or bool(dump_format or dump_select)
     DUMP = dump
+    DUMP_FORMAT = dump_format or "text"
+    DUMP_SELECT = dump_select
+    ENVBASE = envbase
 
     verbosity = Verbosity(verbose)
     # We want to honor the '--quiet' and '--verbose' flags early, even if
     # the configuration tree has not yet been created, as subsequent
     # code uses 'echo' and/or 'log'.
     get_tree().verbosity = verbosity
+    # Report the resources used by commands with --verbose when done
+    ctx.call_on_close(lambda: rusage.report(info))
 
     # Find a project file and load it.
     if cwd:
@@ -489,37 +632,81 @@ def cli(  # type: ignore[return] # pylint: disable=too-many-arguments,too-many-p
         setenvs=not help,
     )
 
-    if ctx.args and ctx.args[0] in ("cleanup", "provision", "system-provision"):
+    if ctx.args and ctx.args[0] in (
+        "bundle",
+        "cleanup",
+        "provision",
+        "system-provision",
+    ):
         # Special case for tasks that modify the config tree themselves.
-        commands.main(ctx.args)
+        with locking.project_lock(cfg, exclusive=True):
+            commands.main(ctx.args)
         return None
-    try:
-        load_plugins_into_tree(cfg)
-    except ModuleNotFoundError as exc:
-        if help:
-            warn(
-                "To get the complete help output you might need to run 'spin provision'"
-                " first!"
-            )
-            commands.main(args=ctx.args)
-            return None
-        die(exc)
 
-    finalize_cfg_tree(cfg)
-    mkdir("{spin.data}")
+    if (help or "--help" in ctx.args) and not dump:
+        # Serve the help from the command manifest, without loading the
+        # plugins, as long as they didn't change.
+        if manifest.show_help(cfg, ctx, toplevel=help):
+            return None
 
-    if help:
-        # If help should be printed, we do so with exit-code 0
-        print(commands.get_help(ctx))
-        return None
+    run_commands(ctx, cfg, help, dump)
+    return None
 
-    if dump and not ctx.args:
-        # Otherwise help would be displayed right after the dump.
-        return None
 
-    # Invoke the main command group, which by now has all the
-    # sub-commands from the plugins.
-    commands.main(args=ctx.args)
+def run_commands(
+    ctx: click.Context, cfg: tree.ConfigTree, toplevel_help: bool, dump: bool
+) -> None:
+    """Load the plugins into `cfg` and run the command line of `ctx`, or
+    print the help of spin if `toplevel_help` is set."""
+    cache_env = ctx.args[:1] == ["env"] and not (dump or toplevel_help)
+    # The environment before plugins modify it
+    environ = dict(os.environ)
+    if cache_env:
+        # Fast path for shell hooks: serve the activation output from the
+        # cache, as long as the plugins and the environment didn't change.
+        key = envcache.fingerprint(
+            cfg, ctx.args, PROP + PREPEND_PROP + APPEND_PROP, environ
+        )
+        if (output := envcache.read(cfg, key)) is not None:
+            sys.stdout.write(output)
+            return
+
+    # Tasks may run in parallel, but not during provisioning
+    with locking.project_lock(cfg, exclusive=False):
+        try:
+            load_plugins_into_tree(cfg)
+        except ModuleNotFoundError as exc:
+            if toplevel_help:
+                warn(
+                    "To get the complete help output you might need to run 'spin"
+                    " provision' first!"
+                )
+                commands.main(args=ctx.args)
+                return
+            die(exc)
+
+        finalize_cfg_tree(cfg)
+        mkdir("{spin.data}")
+        manifest.update(cfg)
+
+        if toplevel_help:
+            # If help should be printed, we do so with exit-code 0
+            print(commands.get_help(ctx))
+            return
+
+        if dump and not ctx.args:
+            # Otherwise help would be displayed right after the dump.
+            return
+
+        # Invoke the main command group, which by now has all the
+        # sub-commands from the plugins.
+        if cache_env:
+            with envcache.recording(
+                cfg, ctx.args, PROP + PREPEND_PROP + APPEND_PROP, environ
+            ):
+                commands.main(args=ctx.args)
+        else:
+            commands.main(args=ctx.args)
 
 
 def find_plugin_packages(cfg: tree.ConfigTree) -> Generator:
@@ -530,17 +717,30 @@ def find_plugin_packages(cfg: tree.ConfigTree) -> Generator:
     yield from cfg.plugin_packages
 
 
-def yield_plugin_import_specs(cfg: tree.ConfigTree) -> Generator:
-    if not isinstance(cfg.plugins, list):
-        die("'plugins' configuration is invalid!")
-
-    for item in cfg.plugins:
-        if isinstance(item, dict):
-            for package, modules in item.items():
-                for module in modules:
-                    yield f"{package}.{module}"
-        else:
-            yield item
+def download_plugin_packages(
+    cfg: tree.ConfigTree, dest: str | Path, *pip_options: str | None, **kwargs: Any
+) -> subprocess.CompletedProcess | None:
+    """Download the plugin packages to the directory `dest`, passing
+    `pip_options` to pip and `kwargs` to :py:func:`csspin.sh`. Return None
+    if there are no plugin packages."""
+    if not (packages := list(find_plugin_packages(cfg))):
+        return None
+    cmd = [
+        sys.executable,
+        "-mpip",
+        "download",
+        *pip_options,
+        "--disable-pip-version-check",
+        "-d",
+        dest,
+        "--index-url",
+        "{spin.index_url}",
+    ]
+    if cfg.spin.extra_index:
+        cmd.extend(["--extra-index-url", cfg.spin.extra_index])
+    for pkg in packages:
+        cmd.extend(pkg.split())
+    return sh(*cmd, **kwargs)
 
 
 def load_minimal_tree(  # pylint: disable=too-many-locals,too-many-arguments
@@ -558,7 +758,7 @@ def load_minimal_tree(  # pylint: disable=too-many-locals,too-many-arguments
     debug(f"Loading {spinfile}")
     spinschema = schema.schema_load(Path(__file__).dirname() / "schema.yaml")
 
-    cfg = spinschema.get_default()  # type: ignore[call-arg]
+    cfg = spinschema.get_default()
     set_tree(cfg)
     cfg.verbosity = verbosity
     cfg.schema = spinschema
@@ -566,7 +766,9 @@ def load_minimal_tree(  # pylint: disable=too-many-locals,too-many-arguments
     if not userdata:
         die("The spinfile seems to be invalid!")
     tree.tree_update(cfg, userdata)
-    tree.tree_merge(cfg, DEFAULTS)
+    # DEFAULTS is shared by all trees built in this process
+    tree.tree_merge(cfg, tree.tree_copy(DEFAULTS))
+    tree.tree_merge(cfg, config(host=config(**hostfacts.host_facts())))
 
     # Merge user-specific globals if they exist
     if (
@@ -628,8 +830,14 @@ def load_plugins_into_tree(cfg: tree.ConfigTree, cleanup: bool = False) -> None:
     # objects.
     addsitedir(cfg.spin.spin_dir / "plugins")
 
-    for import_spec in yield_plugin_import_specs(cfg):
-        load_plugin(cfg, import_spec, may_fail=cleanup)
+    import_specs = list(yield_plugin_import_specs(cfg))
+    lock = None if cleanup else pluginlock.read_lock(cfg, import_specs)
+    if lock:
+        debug(f"loading plugins from {pluginlock.lock_path(cfg)}")
+        load_plugins_from_lock(cfg, lock)
+    else:
+        for import_spec in import_specs:
+            load_plugin(cfg, import_spec, may_fail=cleanup)
 
     # Create a topologically sorted list of the plugins by their
     # dependencies, which have been stored in "_requires" by
@@ -640,7 +848,19 @@ def load_plugins_into_tree(cfg: tree.ConfigTree, cleanup: bool = False) -> None:
     # 'python', which provides a Python installation).
     nodes = cfg.loaded.keys()
     graph = {n: getattr(mod.defaults, "_requires", []) for n, mod in cfg.loaded.items()}
-    cfg.spin.topo_plugins = reverse_toposort(nodes, graph)
+    declarations = {}
+    for name, mod in cfg.loaded.items():
+        requires = getattr(mod.defaults, "requires", None)
+        if isinstance(requires, tree.ConfigTree) and "spin" in requires:
+            declarations[name] = tree.tree_keyinfo(requires, "spin")
+    plugin_graph = PluginGraph(nodes, graph, declarations)
+    cfg.spin.topo_plugins = plugin_graph.order()
+    cfg.spin.topo_levels = plugin_graph.levels()
+
+    if not lock and not cleanup:
+        pluginlock.write_lock(
+            cfg, import_specs, PLUGIN_SCHEMAS, plugin_graph.fingerprint()
+        )
 
 
 def finalize_cfg_tree(cfg: tree.ConfigTree) -> None:
@@ -668,12 +888,19 @@ def finalize_cfg_tree(cfg: tree.ConfigTree) -> None:
     secrets.update(tree.tree_extract_secrets(cfg))
 
     if DUMP:
-        print(obfuscate(tree.tree_dump(cfg)))
+        # The dump is written incrementally, as it can get quite large
+        for line in tree.tree_dump_lines(cfg, DUMP_FORMAT, DUMP_SELECT):
+            click.echo(obfuscate(line), color=True)
 
 
-def install_plugin_packages(cfg: tree.ConfigTree) -> None:
+def install_plugin_packages(
+    cfg: tree.ConfigTree, find_links: str | None = None
+) -> None:
     """Install plugin packages which are not yet installed and extend the
     configuration tree.
+
+    If `find_links` is given, the packages are installed from the wheels in
+    that directory instead of the package index.
     """
     mkdir(plugin_dir := interpolate1(Path("{spin.spin_dir}") / "plugins"))
 
@@ -684,31 +911,39 @@ def install_plugin_packages(cfg: tree.ConfigTree) -> None:
     old_python_path = os.environ.get("PYTHONPATH", None)
     os.environ["PYTHONPATH"] = plugin_dir
 
+    pip_options = [
+        "-q" if cfg.verbosity < Verbosity.INFO else None,
+        "--disable-pip-version-check",
+    ]
+    if find_links:
+        pip_options.extend(["--no-index", "--find-links", find_links])
+    else:
+        pip_options.extend(["--index-url", "{spin.index_url}"])
+        if cfg.spin.extra_index:
+            pip_options.extend(["--extra-index-url", cfg.spin.extra_index])
+
     cmd = [
         f"{sys.executable}",
         "-mpip",
         "install",
-        "-q" if cfg.verbosity < Verbosity.INFO else None,
-        "--disable-pip-version-check",
+        *pip_options,
         "--upgrade",
         "-t",
         plugin_dir,
-        "--index-url",
-        "{spin.index_url}",
     ]
 
-    if cfg.spin.extra_index:
-        cmd.extend(["--extra-index-url", cfg.spin.extra_index])
-
     # Install all missing plugin-packages at once to avoid pip's dependency
     # resolver to fail without exit-zero, while using the "-t" (target) option
     # pointing to the plugin directory.
     with memoizer(plugin_dir / "packages.memo") as m:  # type: ignore[operator]
         if to_be_installed := set(find_plugin_packages(cfg)):
-            args = list(cmd)
-            for pkg in to_be_installed:
-                args.extend(pkg.split())
-            sh(*args)
+            if cfg.spin.shared_plugin_store:
+                pluginstore.install(cfg, plugin_dir, to_be_installed, pip_options)
+            else:
+                args = list(cmd)
+                for pkg in to_be_installed:
+                    args.extend(pkg.split())
+                sh(*args)
             for pkg in to_be_installed:
                 m.add(pkg)
 
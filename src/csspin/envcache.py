@@ -0,0 +1,176 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the cache of the activation output of ``spin env``.
+
+Shell hooks run ``spin env`` on every directory change, so its output is
+cached per shell flavor in ``{spin.spin_dir}/env-cache``. The cache is keyed
+on the fingerprint of the configuration tree, which is derived from the
+plugin lock (see :py:mod:`csspin.pluginlock`), the properties passed on the
+command line, the arguments of ``spin env`` and the process environment,
+which plugins read and which decides how values referring to environment
+variables are rendered. As long as the plugin lock is fresh, the cached
+output is served right after the minimal tree has been loaded, without
+importing any plugin.
+
+Provisioning and cleaning up a project discard the cache.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+from typing import TYPE_CHECKING
+
+from csspin import atomic_write, debug, pluginlock
+
+if TYPE_CHECKING:
+    from typing import Any, Generator, Iterable, Mapping
+
+    from path import Path
+
+    from csspin.tree import ConfigTree
+
+
+def cache_dir(cfg: ConfigTree) -> Path:
+    """Return the directory of the cached activation outputs."""
+    return cfg.spin.spin_dir / "env-cache"  # type: ignore[no-any-return]
+
+
+def invalidate(cfg: ConfigTree) -> None:
+    """Discard the cached activation outputs."""
+    shutil.rmtree(cache_dir(cfg), ignore_errors=True)
+
+
+def shell_flavor() -> str:
+    """Return the flavor of the user's shell the output is rendered for."""
+    if sys.platform == "win32":
+        return "powershell"
+    return os.path.basename(os.getenv("SHELL", "")) or "sh"
+
+
+# Variables which shells change with every command or directory change
+VOLATILE = ("_", "OLDPWD", "PWD", "SHLVL")
+
+
+def fingerprint(
+    cfg: ConfigTree,
+    args: Iterable[str],
+    properties: Iterable[str],
+    environ: Mapping[str, str],
+) -> str | None:
+    """Return the key of the activation output of ``spin env <args>``, or
+    None if the plugin lock is not fresh. `environ` is the environment spin
+    has been started with, before plugins modified it."""
+    lock = pluginlock.read_lock(cfg, list(pluginlock.yield_plugin_import_specs(cfg)))
+    if lock is None:
+        return None
+    variables = sorted(
+        (name, value) for name, value in environ.items() if name not in VOLATILE
+    )
+    digest = hashlib.sha256()
+    digest.update(
+        json.dumps(
+            [lock, list(args), list(properties), str(cfg.spin.spin_dir), variables],
+            sort_keys=True,
+        ).encode()
+    )
+    return digest.hexdigest()
+
+
+def read(cfg: ConfigTree, key: str | None) -> str | None:
+    """Return the cached output for `key`, if there is one."""
+    if key is None:
+        return None
+    fn = cache_dir(cfg) / f"{shell_flavor()}.json"
+    try:
+        with open(fn, encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        debug(f"{fn} is stale")
+        return None
+    return cached.get("output")
+
+
+def write(cfg: ConfigTree, key: str, output: str) -> None:
+    """Store `output` as activation output for `key`."""
+    directory = cache_dir(cfg)
+    fn = directory / f"{shell_flavor()}.json"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with atomic_write(fn) as f:
+            json.dump({"key": key, "output": output}, f)
+    except OSError as exc:
+        debug(f"Could not write {fn}: {exc}")
+
+
+class _Tee(io.TextIOBase):
+    """Text stream writing to `stream` and recording what is written."""
+
+    def __init__(self: _Tee, stream: Any) -> None:
+        self.stream = stream
+        self.recorded = io.StringIO()
+
+    def write(self: _Tee, text: str) -> int:
+        self.recorded.write(text)
+        return self.stream.write(text)  # type: ignore[no-any-return]
+
+    def flush(self: _Tee) -> None:
+        self.stream.flush()
+
+    def isatty(self: _Tee) -> bool:
+        return self.stream.isatty()  # type: ignore[no-any-return]
+
+    @property
+    def encoding(self: _Tee) -> str:  # type: ignore[override]
+        return self.stream.encoding  # type: ignore[no-any-return]
+
+
+@contextlib.contextmanager
+def recording(
+    cfg: ConfigTree,
+    args: Iterable[str],
+    properties: Iterable[str],
+    environ: Mapping[str, str],
+) -> Generator:
+    """Record the output written to stdout while running ``spin env`` and
+    cache it, if the command succeeds."""
+    tee = _Tee(sys.stdout)
+
+    def store() -> None:
+        if key := fingerprint(cfg, args, properties, environ):
+            write(cfg, key, tee.recorded.getvalue())
+
+    sys.stdout = tee
+    try:
+        yield
+    except SystemExit as exc:
+        if not exc.code:
+            store()
+        raise
+    else:
+        store()
+    finally:
+        sys.stdout = tee.stream
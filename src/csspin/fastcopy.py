@@ -0,0 +1,169 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the fast paths of :py:func:`csspin.copy` and
+:py:func:`csspin.mv`.
+
+Files are copied using the first method that works, depending on the mode:
+
+* ``reflink``: clone the file on copy-on-write file systems like Btrfs or
+  XFS (Linux only), sharing the data blocks until either file is modified
+* ``hardlink``: link the file, so source and target share their content
+  for good
+* ``auto``: a reflink, then ``os.copy_file_range``, which copies within
+  the kernel and can even clone or copy on the server side of network file
+  systems
+* ``copy``: a regular copy via :py:func:`shutil.copy2`
+
+Methods that are not supported by the platform or the file system fall
+back to a regular copy. Like the latter, copying a file onto itself or
+onto a hard link of itself raises :py:class:`shutil.SameFileError`, and
+existing targets are replaced rather than truncated. Directories are copied by a thread pool, which pays
+off for trees of many small files on machines with several CPUs and on
+network file systems, where the time is spent waiting on system calls.
+"""
+
+from __future__ import annotations
+
+import errno
+import itertools
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+MODES = ("auto", "copy", "reflink", "hardlink")
+
+# The ioctl for cloning a file, see ioctl_ficlone(2)
+FICLONE = 0x40049409
+
+# The block size for os.copy_file_range
+CHUNK = 1 << 30
+
+# Errors telling that a method is not supported by the file system
+UNSUPPORTED = {
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EXDEV,
+}
+
+# The methods known to fail for a device, so they are not tried for every
+# file
+_FAILED: set[tuple[Callable, int]] = set()
+
+
+def _unlink(target: str) -> None:
+    # Writing into an existing target would change the files linked to it
+    if os.path.lexists(target):
+        os.unlink(target)
+
+
+def _reflink(source: str, target: str) -> None:
+    if not sys.platform.startswith("linux"):
+        raise OSError(f"reflinks are not supported on {sys.platform}")
+    import fcntl  # pylint: disable=import-outside-toplevel
+
+    _unlink(target)
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+
+
+def _copy_range(source: str, target: str) -> None:
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(f"copy_file_range is not supported on {sys.platform}")
+    _unlink(target)
+    with open(source, "rb") as src, open(target, "wb") as dst:
+        while os.copy_file_range(src.fileno(), dst.fileno(), CHUNK):
+            pass
+
+
+def _hardlink(source: str, target: str) -> None:
+    _unlink(target)
+    os.link(source, target)
+
+
+_METHODS: dict[str, tuple[Callable, ...]] = {
+    "auto": (_reflink, _copy_range),
+    "copy": (),
+    "reflink": (_reflink,),
+    "hardlink": (_hardlink,),
+}
+
+
+def copy_file(source: str, target: str, mode: str = "auto") -> str:
+    """Copy the file `source` to the file `target` like
+    :py:func:`shutil.copy2`, using the fast path for `mode`. Return
+    `target`."""
+    methods = _METHODS[mode]
+    if methods and os.path.exists(target) and os.path.samefile(source, target):
+        raise shutil.SameFileError(f"{source!r} and {target!r} are the same file")
+    device = os.stat(source).st_dev if methods else 0
+    for method in methods:
+        if (method, device) in _FAILED:
+            continue
+        try:
+            method(source, target)
+        except OSError as exc:
+            if exc.errno in UNSUPPORTED or exc.errno is None:
+                _FAILED.add((method, device))
+            continue
+        if method is not _hardlink:
+            shutil.copystat(source, target)
+        return target
+    shutil.copy2(source, target)
+    return target
+
+
+def copy_tree(
+    source: str, target: str, mode: str = "auto", jobs: int | None = None
+) -> None:
+    """Copy the contents of directory `source` into directory `target`
+    like :py:func:`shutil.copytree` with ``dirs_exist_ok=True``, copying
+    files in `jobs` threads, by default one per CPU."""
+    directories: list[tuple[str, str]] = []
+    sources: list[str] = []
+    targets: list[str] = []
+    for root, dirnames, filenames in os.walk(source, followlinks=True):
+        rel = os.path.relpath(root, source)
+        target_root = target if rel == os.curdir else os.path.join(target, rel)
+        os.makedirs(target_root, exist_ok=True)
+        directories.append((root, target_root))
+        sources.extend(os.path.join(root, name) for name in filenames)
+        targets.extend(os.path.join(target_root, name) for name in filenames)
+        for name in dirnames:
+            os.makedirs(os.path.join(target_root, name), exist_ok=True)
+
+    if jobs is None:
+        jobs = min(32, os.cpu_count() or 1)
+    if jobs > 1 and len(sources) > 1:
+        with ThreadPoolExecutor(jobs) as pool:
+            # Consume the results to raise the first error
+            list(pool.map(copy_file, sources, targets, itertools.repeat(mode)))
+    else:
+        for src, dst in zip(sources, targets):
+            copy_file(src, dst, mode)
+
+    # Set the times of directories after their contents have been written
+    for src, dst in reversed(directories):
+        shutil.copystat(src, dst)
@@ -0,0 +1,187 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the dependency graph of plugins, which determines the
+order in which the hooks of plugins are run.
+
+Plugins declare the plugins they depend on via ``requires.spin``. The graph
+sorts them topologically, so that each plugin comes after all of its
+dependencies. The order is deterministic: among plugins that could go next,
+the one loaded first wins.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+from typing import TYPE_CHECKING
+
+from csspin import die
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+    from csspin.tree import KeyInfo
+
+
+class PluginGraph:
+    """Dependency graph of plugins.
+
+    `nodes` are the plugin names in load order, `graph` maps each plugin
+    to the plugins it depends on. `declarations` optionally maps a plugin
+    to the location of its ``requires.spin`` setting, which is used to
+    report cycles.
+    """
+
+    # Computed orders by fingerprint of the graph, as the same set of
+    # plugins is sorted several times, e.g. when provisioning.
+    _cache: dict[str, tuple[list, list]] = {}
+
+    def __init__(
+        self: PluginGraph,
+        nodes: Iterable,
+        graph: dict,
+        declarations: dict[str, KeyInfo] | None = None,
+    ) -> None:
+        self.nodes = list(dict.fromkeys(nodes))
+        index = {node: i for i, node in enumerate(self.nodes)}
+        # Dependencies in declaration order, ignoring the ones that are not
+        # part of the graph.
+        self.edges = {
+            node: list(
+                dict.fromkeys(dep for dep in graph.get(node, ()) if dep in index)
+            )
+            for node in self.nodes
+        }
+        self.declarations = declarations or {}
+        self._index = index
+
+    @classmethod
+    def seed(
+        cls: type[PluginGraph], fingerprint: str, order: list, levels: list
+    ) -> None:
+        """Provide a previously computed order for the graph identified by
+        `fingerprint`, e.g. from the plugin lock."""
+        cls._cache[fingerprint] = list(order), [list(level) for level in levels]
+
+    def fingerprint(self: PluginGraph) -> str:
+        """Return a hash identifying the plugins and their dependencies."""
+        digest = hashlib.sha256()
+        for node in self.nodes:
+            digest.update(repr((node, self.edges[node])).encode())
+        return digest.hexdigest()
+
+    def _sort(self: PluginGraph) -> tuple[list, list]:
+        fingerprint = self.fingerprint()
+        if (cached := self._cache.get(fingerprint)) is not None:
+            return cached
+
+        # Kahn's algorithm, using the load order as tie breaker
+        pending = {node: len(deps) for node, deps in self.edges.items()}
+        dependents: dict = {node: [] for node in self.nodes}
+        for node, deps in self.edges.items():
+            for dep in deps:
+                dependents[dep].append(node)
+
+        level = {}
+        ready: list[tuple[int, str]] = []
+        for node, count in pending.items():
+            if not count:
+                heapq.heappush(ready, (self._index[node], node))
+                level[node] = 0
+
+        order = []
+        while ready:
+            _, node = heapq.heappop(ready)
+            order.append(node)
+            for dependent in dependents[node]:
+                level[dependent] = max(level.get(dependent, 0), level[node] + 1)
+                pending[dependent] -= 1
+                if not pending[dependent]:
+                    heapq.heappush(ready, (self._index[dependent], dependent))
+
+        if len(order) < len(self.nodes):
+            self._report_cycle(set(self.nodes) - set(order))
+
+        levels: list[list] = []
+        for node in order:
+            if level[node] == len(levels):
+                levels.append([])
+            levels[level[node]].append(node)
+
+        self._cache[fingerprint] = order, levels
+        return order, levels
+
+    def order(self: PluginGraph) -> list:
+        """Return the plugins in topological order, dependencies first."""
+        return list(self._sort()[0])
+
+    def levels(self: PluginGraph) -> list[list]:
+        """Return the plugins grouped by their depth in the graph.
+
+        Plugins of the same level don't depend on each other, and only on
+        plugins of lower levels, so each level can be processed in
+        parallel once the previous levels are done.
+        """
+        return [list(level) for level in self._sort()[1]]
+
+    def find_cycle(self: PluginGraph, nodes: Iterable | None = None) -> list:
+        """Return a cycle as list of plugins, starting and ending with the
+        same plugin, or an empty list if the graph has no cycle."""
+        candidates = sorted(
+            self.nodes if nodes is None else nodes, key=self._index.__getitem__
+        )
+        done: set = set()
+        for start in candidates:
+            if start in done:
+                continue
+            path = [start]
+            on_path = {start: 0}
+            iterators = [iter(self.edges[start])]
+            while iterators:
+                for dep in iterators[-1]:
+                    if dep in on_path:
+                        return path[on_path[dep] :] + [dep]  # noqa: E203
+                    if dep not in done:
+                        on_path[dep] = len(path)
+                        path.append(dep)
+                        iterators.append(iter(self.edges[dep]))
+                        break
+                else:
+                    iterators.pop()
+                    node = path.pop()
+                    del on_path[node]
+                    done.add(node)
+        return []
+
+    def _report_cycle(self: PluginGraph, remaining: set) -> None:
+        cycle = self.find_cycle(remaining)
+        msg = ["dependency graph has at least one cycle: " + " -> ".join(cycle)]
+        for node in dict.fromkeys(cycle):
+            where = ""
+            if ki := self.declarations.get(node):
+                where = f" ({ki.file}:{ki.line})"
+            msg.append(f"  {node} requires {', '.join(self.edges[node])}{where}")
+        die("\n".join(msg), resolve=False)
+
+
+def toposort(nodes: Iterable, graph: dict, declarations: dict | None = None) -> list:
+    """Topologically sort nodes according to graph, which is a dict
+    mapping nodes to dependencies.
+    """
+    return PluginGraph(nodes, graph, declarations).order()
@@ -0,0 +1,135 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the facts about the host spin runs on.
+
+Detecting the distribution parses os-release and may even spawn
+``lsb_release``, so the facts are computed once per boot and stored in
+``{SPIN_DATA}/host-facts.json``, which is the default location of
+``spin.data``. They are recomputed when the boot id, the kernel or the
+os-release file change. The facts are available as ``host`` subtree of the
+configuration tree, e.g. ``{host.distro}`` or ``{host.cpus}``, and as facts
+of the YAML parser.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import platform
+import sys
+
+import distro
+
+from csspin import atomic_write, debug
+
+FACTS_VERSION = 1
+
+OS_RELEASE = ("/etc/os-release", "/usr/lib/os-release")
+
+# The facts of the current process, once they have been read or computed
+_FACTS: dict | None = None
+
+
+def facts_path() -> str:
+    """Return the path of the file the host facts are stored in."""
+    return os.path.join(os.environ["SPIN_DATA"], "host-facts.json")
+
+
+def _boot_id() -> str | None:
+    try:
+        with open("/proc/sys/kernel/random/boot_id", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def host_key() -> list:
+    """Return what identifies the host facts: the boot, the kernel and the
+    state of the os-release file."""
+    from csspin.pluginlock import file_state
+
+    release = next((fn for fn in OS_RELEASE if os.path.exists(fn)), None)
+    return [
+        FACTS_VERSION,
+        sys.platform,
+        _boot_id(),
+        platform.release(),
+        platform.version(),
+        file_state(release),
+    ]
+
+
+def compute() -> dict:
+    """Compute the host facts."""
+    info = distro.info()
+    if sys.platform == "win32":
+        winver = sys.getwindowsversion()
+        info["id"] = "windows"
+        info["version"] = f"{winver.major}.{winver.minor}.{winver.build}"
+    return {
+        "distro": info["id"],
+        "distro_version": info["version"],
+        "distro_like": info.get("like", ""),
+        "distro_codename": info.get("codename", ""),
+        "platform": sys.platform,
+        "arch": platform.machine(),
+        "cpus": os.cpu_count() or 1,
+        "libc": " ".join(platform.libc_ver()).strip(),
+    }
+
+
+def _write(fn: str, data: dict) -> None:
+    try:
+        os.makedirs(os.path.dirname(fn), exist_ok=True)
+        with atomic_write(fn) as f:
+            json.dump(data, f, indent=1)
+    except OSError as exc:
+        debug(f"Could not write {fn}: {exc}")
+
+
+def host_facts() -> dict:
+    """Return the host facts, computing them only if the stored ones are
+    outdated."""
+    global _FACTS  # pylint: disable=global-statement
+    if _FACTS is None:
+        fn = facts_path()
+        key = host_key()
+        try:
+            with open(fn, encoding="utf-8") as f:
+                stored = json.load(f)
+        except (OSError, ValueError):
+            stored = None
+        if isinstance(stored, dict) and stored.get("key") == key:
+            _FACTS = stored["facts"]
+        else:
+            _FACTS = compute()
+            _write(fn, {"key": key, "facts": _FACTS})
+    return dict(_FACTS)
+
+
+def yaml_facts() -> dict:
+    """Return the facts used by the YAML parser."""
+    return {
+        "win32": sys.platform == "win32",
+        "darwin": sys.platform == "darwin",
+        "linux": sys.platform.startswith("linux"),
+        "posix": os.name == "posix",
+        "nt": os.name == "nt",
+        **host_facts(),
+    }
@@ -0,0 +1,206 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the locks guarding projects and plugin data against
+concurrent spin processes.
+
+Tasks hold a shared lock on the project, so they can run in parallel, while
+``provision``, ``cleanup`` and friends hold an exclusive one. The
+provisioning and cleanup hooks of each plugin additionally hold an
+exclusive lock in ``{spin.data}/locks``, so projects sharing ``spin.data``
+only contend when provisioning the same plugin at the same time.
+
+The locks are advisory file locks of the operating system: :py:func:`flock`
+on POSIX and :py:func:`msvcrt.locking` on Windows, where all locks are
+exclusive. The operating system releases them when a process terminates, so
+locks of crashed processes never go stale. Exclusive holders record their
+process ID and command line in the lock file, to tell who is being waited
+for. Waiting gives up after ``spin.lock_timeout`` seconds.
+
+Processes started by a spin process holding the project lock, e.g. spin
+running spin in a task, don't lock the project again.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import sys
+import time
+from typing import TYPE_CHECKING
+
+from path import Path
+
+from csspin import HOOK_WRAPPERS, die, echo, interpolate1, mkdir
+
+if TYPE_CHECKING:
+    from typing import IO, Generator
+
+    from csspin.tree import ConfigTree
+
+# The environment variable telling subprocesses which project is locked
+LOCKED_PROJECT = "_SPIN_LOCKED_PROJECT"
+
+# msvcrt.locking prevents others from reading the locked range, so lock a
+# byte beyond the holder's record
+WIN32_OFFSET = 1 << 20
+
+
+class FileLock:
+    """An advisory lock on the file `path`."""
+
+    def __init__(self, path: str | Path, exclusive: bool = True) -> None:
+        self.path = Path(path)
+        self.exclusive = exclusive
+        self._file: IO[str] | None = None
+
+    def try_acquire(self) -> bool:
+        """Acquire the lock without blocking. Return whether it has been
+        acquired."""
+        f = open(  # pylint: disable=consider-using-with
+            self.path, "a+", encoding="utf-8"
+        )
+        try:
+            if sys.platform == "win32":
+                import msvcrt  # pylint: disable=import-outside-toplevel
+
+                f.seek(WIN32_OFFSET)
+                msvcrt.locking(  # type: ignore[attr-defined]
+                    f.fileno(), msvcrt.LK_NBLCK, 1  # type: ignore[attr-defined]
+                )
+            else:
+                import fcntl  # pylint: disable=import-outside-toplevel
+
+                fcntl.flock(
+                    f.fileno(),
+                    (fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+                    | fcntl.LOCK_NB,
+                )
+        except OSError:
+            f.close()
+            return False
+        if self.exclusive:
+            f.seek(0)
+            f.truncate()
+            f.write(f"{os.getpid()} {' '.join(sys.argv)}")
+            f.flush()
+        self._file = f
+        return True
+
+    def holder(self) -> str:
+        """Return who holds the lock, as far as known."""
+        try:
+            record = self.path.read_text(encoding="utf-8").strip()
+        except OSError:
+            record = ""
+        if not record:
+            return "another spin process"
+        pid, _, command = record.partition(" ")
+        return f"process {pid} ({command})" if command else f"process {pid}"
+
+    def release(self) -> None:
+        """Release the lock."""
+        if (f := self._file) is None:
+            return
+        self._file = None
+        if self.exclusive:
+            f.truncate(0)
+        f.close()  # releases the lock, too
+
+
+@contextlib.contextmanager
+def locked(
+    path: str | Path, exclusive: bool, timeout: float, what: str
+) -> Generator[None, None, None]:
+    """Hold the lock on the file `path` while the block runs, waiting at
+    most `timeout` seconds for other holders; 0 waits forever. `what`
+    describes the lock in messages."""
+    lock = FileLock(path, exclusive)
+    if not lock.try_acquire():
+        echo(f"Waiting for {what}, held by {lock.holder()}")
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while not lock.try_acquire():
+            if timeout and time.monotonic() >= deadline:
+                die(
+                    f"Timed out after {timeout}s waiting for {what}, held by"
+                    f" {lock.holder()}"
+                )
+            time.sleep(delay)
+            delay = min(2 * delay, 1.0)
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+@contextlib.contextmanager
+def project_lock(cfg: ConfigTree, exclusive: bool) -> Generator[None, None, None]:
+    """Hold the lock on the project while the block runs."""
+    spin_dir = Path(os.path.abspath(cfg.spin.spin_dir))
+    if os.environ.get(LOCKED_PROJECT) == spin_dir or (
+        not exclusive and not os.path.isdir(spin_dir)
+    ):
+        # Locked by the calling spin process already, or not provisioned,
+        # so there is nothing to guard.
+        yield
+        return
+    mkdir(spin_dir / "locks")
+    with locked(
+        spin_dir / "locks" / "project.lock",
+        exclusive,
+        cfg.spin.lock_timeout,
+        f"the {'exclusive' if exclusive else 'shared'} lock on {spin_dir}",
+    ):
+        os.environ[LOCKED_PROJECT] = spin_dir
+        try:
+            yield
+        finally:
+            os.environ.pop(LOCKED_PROJECT, None)
+
+
+def plugin_lock(
+    cfg: ConfigTree, plugin: str
+) -> contextlib.AbstractContextManager[None]:
+    """Return the context manager holding the lock on the data of
+    `plugin` in spin.data."""
+    locks = interpolate1(Path(cfg.spin.data)) / "locks"  # type: ignore[operator]
+    mkdir(locks)
+    return locked(
+        locks / f"{plugin}.lock",
+        True,
+        cfg.spin.lock_timeout,
+        f"the lock on the data of {plugin}",
+    )
+
+
+# Hooks modifying the data of plugins, which run under the plugin's lock
+LOCKED_HOOKS = ("provision", "finalize_provision", "cleanup")
+
+
+def hook_lock(
+    cfg: ConfigTree, plugin: str, hook: str
+) -> contextlib.AbstractContextManager[None]:
+    """Return the context manager holding the lock needed to run the hook
+    `hook` of `plugin`."""
+    if hook in LOCKED_HOOKS:
+        return plugin_lock(cfg, plugin)
+    return contextlib.nullcontext()
+
+
+HOOK_WRAPPERS.append(hook_lock)
@@ -0,0 +1,338 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the command manifest ``{spin.spin_dir}/commands.json``.
+
+Listing the commands of a project requires importing all plugins and
+running their ``configure`` hooks. After a successful run, the commands
+registered via :py:func:`csspin.task` and :py:func:`csspin.group` are
+recorded in the manifest, with their aliases, help texts, parameters,
+``noenv`` flags and nesting, together with the names of the properties of
+the configuration tree. As long as the manifest matches the plugin lock
+(see :py:mod:`csspin.pluginlock`), ``spin --help``, ``spin <task> --help``
+and the shell completion are served from the manifest, without importing
+any plugin.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import TYPE_CHECKING
+
+import click
+from click.shell_completion import CompletionItem
+
+from csspin import atomic_write, debug, pluginlock
+
+if TYPE_CHECKING:
+    from typing import Any
+
+    from path import Path
+
+    from csspin.cli import GroupWithAliases
+    from csspin.tree import ConfigTree
+
+MANIFEST_VERSION = 1
+
+# The property names offered when completing -p, --pp and --ap
+_PROPERTIES: list[str] = []
+
+_TYPES = {
+    "integer": click.INT,
+    "float": click.FLOAT,
+    "boolean": click.BOOL,
+    "path": click.Path(),
+    "file": click.Path(),
+}
+
+
+class ManifestStale(Exception):
+    """Raised when a command of the manifest is about to be run, i.e. the
+    command line asks for more than help."""
+
+
+def manifest_path(cfg: ConfigTree) -> Path:
+    """Return the path of the command manifest."""
+    return cfg.spin.spin_dir / "commands.json"  # type: ignore[no-any-return]
+
+
+def fingerprint(cfg: ConfigTree) -> str | None:
+    """Return the key of the manifest, or None if the plugin lock is not
+    fresh."""
+    lock = pluginlock.read_lock(cfg, list(pluginlock.yield_plugin_import_specs(cfg)))
+    if lock is None:
+        return None
+    digest = hashlib.sha256()
+    digest.update(json.dumps([lock, str(cfg.spin.spin_dir)], sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+def _jsonable(value: Any) -> bool:
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def describe_param(param: click.Parameter) -> dict:
+    """Return the description of the option or argument `param`."""
+    info = {
+        "kind": "option" if isinstance(param, click.Option) else "argument",
+        "name": param.name,
+        "opts": list(param.opts),
+        "secondary_opts": list(param.secondary_opts),
+        "type": param.type.name,
+        "choices": list(getattr(param.type, "choices", ()) or ()),
+        "metavar": param.make_metavar(),
+        "nargs": param.nargs,
+        "multiple": param.multiple,
+        "required": param.required,
+        "default": param.default if _jsonable(param.default) else None,
+    }
+    if isinstance(param, click.Option):
+        info.update(
+            help=param.help,
+            is_flag=param.is_flag,
+            count=param.count,
+            hidden=param.hidden,
+            show_default=param.show_default,
+        )
+    return info
+
+
+def describe_command(cmd: click.Command) -> dict:
+    """Return the description of command `cmd` and its subcommands."""
+    from csspin.cli import NOENV_COMMANDS
+
+    info: dict = {
+        "name": cmd.name,
+        "help": cmd.help,
+        "short_help": cmd.short_help,
+        "epilog": cmd.epilog,
+        "hidden": cmd.hidden,
+        "deprecated": cmd.deprecated,
+        "noenv": cmd.name in NOENV_COMMANDS,
+        "context_settings": {
+            key: value
+            for key, value in dict(cmd.context_settings).items()
+            if _jsonable(value)
+        },
+        "params": [describe_param(param) for param in cmd.params],
+    }
+    if isinstance(cmd, click.Group):
+        aliases = getattr(cmd, "_aliases", {})
+        info["commands"] = [
+            dict(
+                describe_command(sub),
+                aliases=[alias for alias, obj in aliases.items() if obj is sub],
+            )
+            for sub in cmd.commands.values()
+        ]
+    return info
+
+
+def property_names(tree: ConfigTree, prefix: str = "") -> list[str]:
+    """Return the names of the properties of `tree`, that can be set on
+    the command line."""
+    from csspin.tree import ConfigTree as _ConfigTree
+    from csspin.tree import tree_types
+
+    names = []
+    for key, value in sorted(tree.items()):
+        if not isinstance(key, str) or key.startswith("_"):
+            continue
+        if "internal" in tree_types(tree, key):
+            continue
+        if isinstance(value, _ConfigTree):
+            names.extend(property_names(value, f"{prefix}{key}."))
+        elif value is None or isinstance(value, (str, int, float, list)):
+            names.append(f"{prefix}{key}")
+    return names
+
+
+def update(cfg: ConfigTree) -> None:
+    """Record the commands and properties of the loaded plugins, if the
+    manifest is older than the plugin lock."""
+    from csspin.cli import commands
+
+    fn = manifest_path(cfg)
+    lock_state = pluginlock.file_state(pluginlock.lock_path(cfg))
+    state = pluginlock.file_state(fn)
+    if lock_state is None or (state is not None and state[0] > lock_state[0]):
+        return
+    if (key := fingerprint(cfg)) is None:
+        return
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "key": key,
+        "commands": describe_command(commands),
+        "properties": property_names(cfg),
+    }
+    try:
+        with atomic_write(fn) as f:
+            json.dump(manifest, f)
+    except OSError as exc:
+        debug(f"Could not write {fn}: {exc}")
+
+
+def read(cfg: ConfigTree) -> dict | None:
+    """Return the manifest, if it matches the plugin lock."""
+    fn = manifest_path(cfg)
+    try:
+        with open(fn, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("version") != MANIFEST_VERSION
+        or manifest.get("key") != fingerprint(cfg)
+    ):
+        debug(f"{fn} is stale")
+        return None
+    return manifest
+
+
+def _stale(*args: Any, **kwargs: Any) -> None:
+    raise ManifestStale()
+
+
+def build_param(info: dict) -> click.Parameter:
+    """Create the option or argument described by `info`."""
+    if info["choices"]:
+        param_type: Any = click.Choice(info["choices"])
+    else:
+        param_type = _TYPES.get(info["type"], click.STRING)
+    kwargs = {
+        "nargs": info["nargs"],
+        "required": info["required"],
+        "metavar": info["metavar"],
+        "default": info["default"],
+    }
+    if info["kind"] == "argument":
+        return click.Argument([info["name"]], type=param_type, **kwargs)
+    if info["is_flag"] or info["count"]:
+        param_type = None
+        del kwargs["nargs"]
+    secondary = info["secondary_opts"]
+    decls = [
+        f"{opt}/{secondary[i]}" if i < len(secondary) else opt
+        for i, opt in enumerate(info["opts"])
+    ]
+    return click.Option(
+        [*decls, info["name"]],
+        type=param_type,
+        help=info["help"],
+        is_flag=info["is_flag"] or None,
+        count=info["count"],
+        hidden=info["hidden"],
+        multiple=info["multiple"],
+        show_default=info["show_default"],
+        **kwargs,
+    )
+
+
+def build_command(info: dict) -> click.Command:
+    """Create a stand-in for the command described by `info`, which shows
+    help and completes, but can't be run."""
+    from csspin.cli import GroupWithAliases
+
+    kwargs = {
+        "name": info["name"],
+        "help": info["help"],
+        "short_help": info["short_help"],
+        "epilog": info["epilog"],
+        "hidden": info["hidden"],
+        "deprecated": info["deprecated"],
+        "context_settings": info["context_settings"],
+        "params": [build_param(param) for param in info["params"]],
+        "callback": _stale,
+    }
+    if "commands" not in info:
+        return click.Command(**kwargs)
+    # Groups are invoked before their subcommands parse their arguments
+    kwargs["callback"] = None
+    grp = GroupWithAliases(**kwargs)
+    for sub in info["commands"]:
+        cmd = build_command(sub)
+        grp.add_command(cmd)
+        for alias in sub["aliases"]:
+            grp.register_alias(alias, cmd)
+    return grp
+
+
+def command_group(cfg: ConfigTree) -> GroupWithAliases | None:
+    """Return a stand-in for the main command group, built from the
+    manifest, or None if the manifest is not fresh."""
+    from csspin.cli import commands
+
+    if (manifest := read(cfg)) is None:
+        return None
+    _PROPERTIES[:] = manifest["properties"]
+    grp = build_command(manifest["commands"])
+    # The options of spin itself complete the property names
+    grp.params = commands.params
+    return grp  # type: ignore[return-value]
+
+
+def asks_for_help(grp: click.Group, ctx: click.Context, args: list[str]) -> bool:
+    """Return whether ``--help`` in `args` is an option of the command of
+    `grp` given in `args`, and not one of its arguments, like in ``spin run
+    python --help``."""
+    cmd: click.Command = grp
+    for arg in args:
+        if arg == "--help":
+            return True
+        if isinstance(cmd, click.Group) and (sub := cmd.get_command(ctx, arg)):
+            cmd = sub
+        elif arg == "--" or not arg.startswith("-"):
+            # Arguments, or values of options, which aren't known here
+            return False
+    return False
+
+
+def show_help(cfg: ConfigTree, ctx: click.Context, toplevel: bool) -> bool:
+    """Show spin's help or the help of the command given in ``ctx.args``
+    from the manifest. Return False, if this is not possible."""
+    if (grp := command_group(cfg)) is None:
+        return False
+    if toplevel:
+        print(grp.get_help(ctx))
+        return True
+    if not asks_for_help(grp, ctx, list(ctx.args)):
+        return False
+    try:
+        grp.main(args=list(ctx.args), standalone_mode=False)
+    except (ManifestStale, click.ClickException):
+        return False
+    return True
+
+
+def complete_property(
+    ctx: click.Context, param: click.Parameter, incomplete: str
+) -> list[CompletionItem]:
+    """Complete the names of properties for -p, --pp and --ap."""
+    if "=" in incomplete:
+        return []
+    return [
+        CompletionItem(f"{name}=")
+        for name in _PROPERTIES
+        if name.startswith(incomplete)
+    ]
@@ -0,0 +1,190 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the plugin lock file ``{spin.spin_dir}/plugins.lock``.
+
+Discovering the plugins of a project requires importing each plugin, reading
+its ``requires.spin`` setting and probing for its schema file. After a
+successful discovery, the result is recorded in the lock file: the plugins in
+load order with their module and schema files, dependencies and package
+versions, as well as the topological order. As long as the lock is fresh,
+i.e. neither the plugin configuration, the project's spinfile, the user's
+``global.yaml``, csspin itself nor any of the recorded files changed, later
+runs load the plugins from the lock in a single pass.
+"""
+
+from __future__ import annotations
+
+import importlib.metadata
+import json
+import os
+import sys
+from typing import TYPE_CHECKING
+
+from csspin import atomic_write, debug, die, interpolate1
+
+if TYPE_CHECKING:
+    from typing import Generator, Iterable
+
+    from path import Path
+
+    from csspin.tree import ConfigTree
+
+LOCK_VERSION = 1
+
+
+def lock_path(cfg: ConfigTree) -> Path:
+    """Return the path of the plugin lock file."""
+    return cfg.spin.spin_dir / "plugins.lock"  # type: ignore[no-any-return]
+
+
+def file_state(fn: str | None) -> list | None:
+    """Return modification time and size of file `fn`, or None if it does
+    not exist."""
+    if not fn:
+        return None
+    try:
+        st = os.stat(fn)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def global_yaml_path() -> str | None:
+    """Return the path of the user's global.yaml, if it is used."""
+    if os.getenv("SPIN_DISABLE_GLOBAL_YAML"):
+        return None
+    return interpolate1(os.path.join("{SPIN_CONFIG}", "global.yaml"))
+
+
+def yield_plugin_import_specs(cfg: ConfigTree) -> Generator:
+    if not isinstance(cfg.plugins, list):
+        die("'plugins' configuration is invalid!")
+
+    for item in cfg.plugins:
+        if isinstance(item, dict):
+            for package, modules in item.items():
+                for module in modules:
+                    yield f"{package}.{module}"
+        else:
+            yield item
+
+
+def lock_inputs(cfg: ConfigTree, import_specs: Iterable[str]) -> dict:
+    """Return the inputs of the plugin discovery, that are not specific to a
+    single plugin."""
+    spinfile = os.path.abspath(cfg.spin.spinfile)
+    global_yaml = global_yaml_path()
+    return {
+        "csspin": cfg.spin.version,
+        "python": sys.executable,
+        "import_specs": list(import_specs),
+        "plugin_paths": [str(path) for path in cfg.plugin_paths],
+        "files": {
+            spinfile: file_state(spinfile),
+            "global.yaml": file_state(global_yaml),
+        },
+    }
+
+
+def _distribution_versions(names: Iterable[str]) -> dict:
+    """Map top-level package names to the versions of the distributions
+    providing them."""
+    packages = importlib.metadata.packages_distributions()
+    versions = {}
+    for name in names:
+        for dist in packages.get(name, ()):
+            try:
+                versions[name] = importlib.metadata.version(dist)
+                break
+            except importlib.metadata.PackageNotFoundError:
+                continue
+    return versions
+
+
+def write_lock(
+    cfg: ConfigTree,
+    import_specs: Iterable[str],
+    schemas: dict,
+    fingerprint: str,
+) -> None:
+    """Record the loaded plugins of the configuration tree in the lock.
+
+    `schemas` maps the plugin modules to a tuple of the import spec they
+    were loaded by, their schema file and its status ("ok", "missing" or
+    "invalid"), `fingerprint` is the fingerprint of the plugin graph.
+    """
+    toplevel = {name.split(".")[0] for name in cfg.loaded}
+    versions = _distribution_versions(toplevel)
+    plugins = []
+    for name, mod in cfg.loaded.items():
+        module_file = getattr(mod, "__file__", None)
+        import_spec, schema_file, status = schemas.get(name, (name, None, None))
+        plugins.append(
+            {
+                "name": name,
+                "import_spec": import_spec,
+                "file": module_file,
+                "file_state": file_state(module_file),
+                "schema": schema_file,
+                "schema_state": file_state(schema_file),
+                "schema_status": status,
+                "requires": list(getattr(mod.defaults, "_requires", [])),
+                "version": versions.get(name.split(".")[0]),
+            }
+        )
+
+    lock = {
+        "version": LOCK_VERSION,
+        "inputs": lock_inputs(cfg, import_specs),
+        "plugins": plugins,
+        "fingerprint": fingerprint,
+        "topo_plugins": list(cfg.spin.topo_plugins),
+        "topo_levels": [list(level) for level in cfg.spin.topo_levels],
+    }
+    fn = lock_path(cfg)
+    try:
+        with atomic_write(fn) as f:
+            json.dump(lock, f, indent=1)
+    except OSError as exc:
+        debug(f"Could not write {fn}: {exc}")
+
+
+def read_lock(cfg: ConfigTree, import_specs: Iterable[str]) -> dict | None:
+    """Return the plugin lock, if it is up to date, and None otherwise."""
+    fn = lock_path(cfg)
+    try:
+        with open(fn, encoding="utf-8") as f:
+            lock = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(lock, dict) or lock.get("version") != LOCK_VERSION:
+        debug(f"{fn} has an unknown format")
+        return None
+    if lock.get("inputs") != lock_inputs(cfg, import_specs):
+        debug(f"{fn} is stale, the plugin configuration changed")
+        return None
+    for plugin in lock["plugins"]:
+        if (
+            file_state(plugin["file"]) != plugin["file_state"]
+            or file_state(plugin["schema"]) != plugin["schema_state"]
+        ):
+            debug(f"{fn} is stale, {plugin['name']} changed")
+            return None
+    return lock
@@ -0,0 +1,232 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the plugin store shared by all projects.
+
+With ``spin.shared_plugin_store`` enabled, plugin packages are not
+installed into ``{spin.spin_dir}/plugins`` of each project, but once per
+distribution into ``{spin.data}/plugin-store``. Entries of the store are
+named by the distribution, its version and a hash of the installed
+artifact and the Python interpreter, so they are never modified once
+installed. The plugin directory of a project merely holds a path
+configuration file pointing to the entries the project uses.
+
+Each project records the entries it uses in ``refs/`` of the store.
+``spin cleanup`` drops the project's references and removes the entries no
+longer referenced by any project. Packages that can't be identified by
+their content, e.g. local directories or version control checkouts, are
+still installed into the plugin directory of the project.
+"""
+
+from __future__ import annotations
+
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import sysconfig
+import tempfile
+from typing import TYPE_CHECKING
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from path import Path
+
+from csspin import debug, interpolate1, mkdir, rmtree, sh, writetext
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+    from csspin.tree import ConfigTree
+
+# The path configuration file in the project's plugin directory
+PTH = "spin-plugin-store.pth"
+
+
+def store_dir(cfg: ConfigTree) -> Path:
+    """Return the directory of the shared plugin store."""
+    return Path(interpolate1(cfg.spin.data)) / "plugin-store"
+
+
+def _ref_file(cfg: ConfigTree) -> Path:
+    digest = hashlib.sha256(str(cfg.spin.spin_dir).encode()).hexdigest()
+    return store_dir(cfg) / "refs" / f"{digest[:16]}.json"
+
+
+def entry_name(item: dict) -> str | None:
+    """Return the name of the store entry for the distribution `item` of
+    pip's installation report, or None if it can't be stored."""
+    info = item.get("download_info", {})
+    if (archive := info.get("archive_info")) is None:
+        return None
+    meta = item["metadata"]
+    digest = hashlib.sha256(
+        json.dumps(
+            [
+                meta["name"],
+                meta["version"],
+                archive.get("hashes") or archive.get("hash") or info["url"],
+                sys.implementation.cache_tag,
+                sysconfig.get_platform(),
+            ],
+            sort_keys=True,
+        ).encode()
+    ).hexdigest()
+    name = re.sub(r"[-_.]+", "_", meta["name"]).lower()
+    return f"{name}-{meta['version']}-{digest[:16]}"
+
+
+def requirement(item: dict) -> list[str]:
+    """Return the requirement for installing the distribution `item` of
+    pip's installation report into the project's plugin directory."""
+    info = item["download_info"]
+    url = info["url"]
+    if vcs := info.get("vcs_info"):
+        return [f"{vcs['vcs']}+{url}@{vcs['commit_id']}"]
+    if (dir_info := info.get("dir_info")) is not None:
+        path = url2pathname(urlparse(url).path)
+        return ["-e", path] if dir_info.get("editable") else [path]
+    return [url]
+
+
+def resolve(packages: Iterable[str], pip_options: list) -> list[dict]:
+    """Resolve `packages` and their dependencies, returning the
+    distributions to be installed from pip's installation report."""
+    with tempfile.TemporaryDirectory(prefix="spin-store-") as tmpdir:
+        report = os.path.join(tmpdir, "report.json")
+        # The installation report needs pip 22.2
+        args = [
+            sys.executable,
+            "-mpip",
+            "install",
+            *pip_options,
+            "--dry-run",
+            "--ignore-installed",
+            "--report",
+            report,
+        ]
+        for pkg in packages:
+            args.extend(pkg.split())
+        sh(*args)
+        with open(report, encoding="utf-8") as f:
+            return json.load(f)["install"]  # type: ignore[no-any-return]
+
+
+def register(cfg: ConfigTree, entries: Iterable[str]) -> None:
+    """Record the store entries used by the project."""
+    fn = _ref_file(cfg)
+    mkdir(fn.dirname())
+    writetext(
+        fn,
+        json.dumps({"project": str(cfg.spin.spin_dir), "entries": sorted(entries)}),
+    )
+
+
+def unregister(cfg: ConfigTree) -> None:
+    """Drop the references of the project to store entries."""
+    fn = _ref_file(cfg)
+    if os.path.exists(fn):
+        os.unlink(fn)
+
+
+def _install_entry(store: Path, name: str, url: str, pip_options: list) -> None:
+    tmp = store / f".{name}.{os.getpid()}.tmp"
+    sh(
+        sys.executable,
+        "-mpip",
+        "install",
+        *pip_options,
+        "--no-deps",
+        "-t",
+        tmp,
+        url,
+    )
+    try:
+        os.replace(tmp, store / name)
+    except OSError:
+        # Installed by another project in the meantime
+        debug(f"{store / name} exists already")
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def install(
+    cfg: ConfigTree,
+    plugin_dir: str | Path,
+    packages: Iterable[str],
+    pip_options: list,
+) -> None:
+    """Install `packages` and their dependencies into the store and make
+    them available via the project's plugin directory `plugin_dir`."""
+    store = store_dir(cfg)
+    mkdir(store)
+    entries = {}
+    local = []
+    for item in resolve(packages, pip_options):
+        if (name := entry_name(item)) is None:
+            local.extend(requirement(item))
+        else:
+            entries[name] = item["download_info"]["url"]
+
+    # Reference the entries before installing them, so other projects
+    # don't collect them as garbage.
+    register(cfg, entries)
+    for name, url in entries.items():
+        if not os.path.isdir(store / name):
+            _install_entry(store, name, url, pip_options)
+        else:
+            debug(f"Using {store / name}")
+
+    if local:
+        sh(
+            sys.executable,
+            "-mpip",
+            "install",
+            *pip_options,
+            "--no-deps",
+            "--upgrade",
+            "-t",
+            plugin_dir,
+            *local,
+        )
+    writetext(Path(plugin_dir) / PTH, "".join(f"{store / name}\n" for name in entries))
+
+
+def collect_garbage(cfg: ConfigTree) -> None:
+    """Remove the store entries which are not referenced by any existing
+    project."""
+    store = store_dir(cfg)
+    if not os.path.isdir(store):
+        return
+    referenced = set()
+    for fn in glob.glob(os.path.join(store, "refs", "*.json")):
+        try:
+            with open(fn, encoding="utf-8") as f:
+                refs = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if not os.path.isdir(refs["project"]):
+            # The project is gone
+            os.unlink(fn)
+            continue
+        referenced.update(refs["entries"])
+    for name in sorted(os.listdir(store)):
+        if name != "refs" and not name.startswith(".") and name not in referenced:
+            rmtree(store / name)
@@ -0,0 +1,169 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the accounting of the resources used by the commands
+run by spin.
+
+:py:func:`csspin.sh` takes the difference of
+:py:func:`resource.getrusage` for the terminated children of spin before
+and after each command, and attaches it as :py:class:`ResourceUsage` to the
+returned :py:class:`subprocess.CompletedProcess` as attribute ``rusage``.
+The usage is summed up per plugin hook run by :py:func:`csspin.toporun`,
+or else per task, and reported when spin exits with ``--verbose``.
+
+This module doesn't import :py:mod:`csspin`, so :py:func:`csspin.sh` and
+:py:func:`csspin.toporun` can use it.
+
+The peak memory is that of the largest child so far, so it is only known
+for commands exceeding all previous ones. Commands running concurrently in
+threads are accounted to each other. The ``resource`` module is not
+available on Windows, where nothing is accounted.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import sys
+from typing import TYPE_CHECKING, NamedTuple
+
+import click
+
+if sys.platform != "win32":
+    import resource
+
+if TYPE_CHECKING:
+    from typing import Any, Callable, Generator
+
+
+class ResourceUsage(NamedTuple):
+    """The resources used by a command: the user and system CPU time in
+    seconds, the peak resident set size in bytes (None if unknown), the
+    number of blocks read and written and the number of voluntary and
+    involuntary context switches."""
+
+    user: float
+    system: float
+    maxrss: int | None
+    inblock: int
+    oublock: int
+    nvcsw: int
+    nivcsw: int
+
+
+# ru_maxrss is in bytes on macOS and in KiB elsewhere
+MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+# The plugin hook being run
+_HOOK: str | None = None
+
+# The usage and number of commands per hook or task
+_TOTALS: dict[str, tuple[ResourceUsage, int]] = {}
+
+
+def snapshot() -> Any:
+    """Return the resource usage of the terminated children of spin, or
+    None if it can't be determined."""
+    if sys.platform == "win32":
+        return None
+    # pylint: disable=possibly-used-before-assignment
+    return resource.getrusage(resource.RUSAGE_CHILDREN)
+
+
+def difference(before: Any, after: Any) -> ResourceUsage | None:
+    """Return the resources used between the snapshots `before` and
+    `after`."""
+    if before is None or after is None:
+        return None
+    return ResourceUsage(
+        user=after.ru_utime - before.ru_utime,
+        system=after.ru_stime - before.ru_stime,
+        maxrss=(
+            after.ru_maxrss * MAXRSS_UNIT
+            if after.ru_maxrss > before.ru_maxrss
+            else None
+        ),
+        inblock=after.ru_inblock - before.ru_inblock,
+        oublock=after.ru_oublock - before.ru_oublock,
+        nvcsw=after.ru_nvcsw - before.ru_nvcsw,
+        nivcsw=after.ru_nivcsw - before.ru_nivcsw,
+    )
+
+
+def add(a: ResourceUsage, b: ResourceUsage) -> ResourceUsage:
+    """Return the sum of `a` and `b`, with the larger peak memory."""
+    peaks = [rss for rss in (a.maxrss, b.maxrss) if rss is not None]
+    return ResourceUsage(
+        user=a.user + b.user,
+        system=a.system + b.system,
+        maxrss=max(peaks) if peaks else None,
+        inblock=a.inblock + b.inblock,
+        oublock=a.oublock + b.oublock,
+        nvcsw=a.nvcsw + b.nvcsw,
+        nivcsw=a.nivcsw + b.nivcsw,
+    )
+
+
+@contextlib.contextmanager
+def hook(name: str) -> Generator[None, None, None]:
+    """Account the commands run in the block to the plugin hook
+    `name`."""
+    global _HOOK  # pylint: disable=global-statement
+    previous, _HOOK = _HOOK, name
+    try:
+        yield
+    finally:
+        _HOOK = previous
+
+
+def account(usage: ResourceUsage | None) -> None:
+    """Add `usage` to the totals of the current plugin hook or task."""
+    if usage is None:
+        return
+    scope = _HOOK
+    if scope is None:
+        ctx = click.get_current_context(silent=True)
+        scope = getattr(ctx and ctx.command, "full_name", None) or "spin"
+    if (total := _TOTALS.get(scope)) is None:
+        _TOTALS[scope] = (usage, 1)
+    else:
+        _TOTALS[scope] = (add(total[0], usage), total[1] + 1)
+
+
+def format_usage(usage: ResourceUsage) -> str:
+    rss = "?" if usage.maxrss is None else f"{usage.maxrss / (1 << 20):.1f} MiB"
+    return (
+        f"user {usage.user:.2f}s, sys {usage.system:.2f}s, max rss {rss},"
+        f" blocks in/out {usage.inblock}/{usage.oublock},"
+        f" context switches {usage.nvcsw}/{usage.nivcsw}"
+    )
+
+
+def report(write: Callable[[str], None]) -> None:
+    """Report the resources used per plugin hook and task to `write`,
+    e.g. :py:func:`csspin.info`, and start over."""
+    totals = dict(_TOTALS)
+    _TOTALS.clear()
+    if not totals:
+        return
+    write("Resources used by commands:")
+    for scope, (usage, count) in sorted(
+        totals.items(),
+        key=lambda item: item[1][0].user + item[1][0].system,
+        reverse=True,
+    ):
+        write(f"  {scope} ({count} commands): {format_usage(usage)}")
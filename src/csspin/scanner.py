@@ -0,0 +1,222 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing file system scans based on `os.scandir`.
+
+A scan takes a list of patterns, which are file names, directory names (which
+include everything below them) or glob patterns supporting ``*``, ``?``,
+``[...]`` and ``**`` for any number of directories, and returns a snapshot
+mapping the matching files to their modification time and size. Directories
+and files whose name matches one of the `ignore` patterns are skipped.
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import re
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Generator, Iterable
+
+# Names that are never scanned when walking directories
+DEFAULT_IGNORE = (".git", ".hg", ".svn", ".spin", "__pycache__", ".tox")
+
+_MAGIC = re.compile(r"[*?[]")
+
+# The newest modification times of directories and glob patterns
+_NEWEST: dict[tuple, int | None] = {}
+
+
+def has_magic(pattern: str) -> bool:
+    """Return whether `pattern` is a glob pattern."""
+    return _MAGIC.search(pattern) is not None
+
+
+def is_glob(pattern: str, root: str = ".") -> bool:
+    """Return whether `pattern` is a glob pattern, and not an existing path
+    with glob characters in its name, like ``pages/[id].js``."""
+    return has_magic(pattern) and not os.path.exists(os.path.join(root, pattern))
+
+
+def glob_regex(pattern: str) -> re.Pattern:
+    """Translate glob `pattern` using ``/`` as separator into a regular
+    expression."""
+    parts = []
+    i, n = 0, len(pattern)
+    while i < n:
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[" and (end := pattern.find("]", i + 2)) > 0:
+            body = pattern[i + 1 : end]  # noqa: E203
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            parts.append(f"[{body}]")
+            i = end
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    return re.compile("".join(parts) + r"\Z")
+
+
+def split_pattern(pattern: str) -> tuple[str, str]:
+    """Split `pattern` into the longest leading directory without glob
+    characters and the rest."""
+    parts = pattern.split("/")
+    for i, part in enumerate(parts):
+        if has_magic(part):
+            return "/".join(parts[:i]), "/".join(parts[i:])
+    return pattern, ""
+
+
+def normalize(path: str) -> str:
+    """Return the absolute `path` using ``/`` as separator, as used in
+    snapshots."""
+    return os.path.abspath(path).replace(os.sep, "/")
+
+
+def _ignored(name: str, ignore: Iterable[str]) -> bool:
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in ignore)
+
+
+def _walk(
+    top: str, ignore: Iterable[str], maxdepth: int | None = None
+) -> Generator[tuple[str, os.stat_result], None, None]:
+    """Yield all files below directory `top` with their stat results."""
+    stack = [(top, 0)]
+    while stack:
+        path, depth = stack.pop()
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            if _ignored(entry.name, ignore):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if maxdepth is None or depth < maxdepth:
+                        stack.append((entry.path, depth + 1))
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            yield entry.path.replace(os.sep, "/"), st
+
+
+def matches(
+    pattern: str, root: str = ".", ignore: Iterable[str] = DEFAULT_IGNORE
+) -> Generator[tuple[str, os.stat_result], None, None]:
+    """Yield the absolute paths (using ``/`` as separator) of the files
+    matching `pattern` with their stat results, statting each file once. A
+    relative `pattern` is relative to `root`."""
+    pattern = str(pattern).replace(os.sep, "/")
+    if not os.path.isabs(pattern):
+        pattern = f"{str(root).replace(os.sep, '/')}/{pattern}"
+    base, rest = split_pattern(pattern) if is_glob(pattern) else (pattern, "")
+    base = normalize(base or "/")
+    if not rest:
+        try:
+            st = os.stat(base)
+        except OSError:
+            return
+        if os.path.isdir(base):
+            yield from _walk(base, ignore)
+        else:
+            yield base, st
+        return
+
+    regex = glob_regex(f"{base.rstrip('/')}/{rest}")
+    # Without "**", the pattern limits how deep the walk has to go
+    maxdepth = None if "**" in rest else rest.count("/")
+    for path, st in _walk(base, ignore, maxdepth):
+        if regex.match(path):
+            yield path, st
+
+
+def scan(
+    patterns: Iterable[str],
+    root: str = ".",
+    ignore: Iterable[str] = DEFAULT_IGNORE,
+) -> dict[str, tuple[int, int]]:
+    """Return a snapshot of the files matching `patterns`, mapping their
+    absolute paths (using ``/`` as separator) to modification time in
+    nanoseconds and size. Relative patterns are relative to `root`."""
+    ignore = tuple(ignore)
+    return {
+        path: (st.st_mtime_ns, st.st_size)
+        for pattern in patterns
+        for path, st in matches(pattern, root, ignore)
+    }
+
+
+def newest_mtime(
+    patterns: Iterable[str],
+    root: str = ".",
+    ignore: Iterable[str] = DEFAULT_IGNORE,
+) -> int | None:
+    """Return the newest modification time in nanoseconds of the files
+    matching `patterns`, or None if there are none.
+
+    The result for each directory or glob pattern is cached until
+    :py:func:`clear_cache` is called, so trees shared by several build
+    rules are scanned once."""
+    ignore = tuple(ignore)
+    newest = None
+    for pattern in patterns:
+        pattern = str(pattern)
+        key = (normalize(root), pattern, ignore)
+        if key in _NEWEST:
+            mtime = _NEWEST[key]
+        else:
+            mtime = max(
+                (st.st_mtime_ns for _, st in matches(pattern, root, ignore)),
+                default=None,
+            )
+            if is_glob(pattern, root) or os.path.isdir(os.path.join(root, pattern)):
+                _NEWEST[key] = mtime
+        if mtime is not None and (newest is None or mtime > newest):
+            newest = mtime
+    return newest
+
+
+def clear_cache() -> None:
+    """Forget the results of :py:func:`newest_mtime`, e.g. after files have
+    been written."""
+    _NEWEST.clear()
+
+
+def changes(old: dict, new: dict) -> list[str]:
+    """Return the sorted list of files that have been added, removed or
+    modified between snapshots `old` and `new`."""
+    changed = {path for path, state in new.items() if old.get(path) != state}
+    changed.update(path for path in old if path not in new)
+    return sorted(changed)
@@ -47,16 +47,36 @@ class BaseDescriptor:
     """
     Base class for descriptors providing methods for coercion and getting
     default values.
+
+    The common schema keys are stored in slots; any other keys of the
+    description go into a dictionary that is only created when needed.
     """
 
+    __slots__ = ("_keyinfo", "_extra", "type", "default", "help", "properties")
+
     def __init__(self: BaseDescriptor, description: dict | tree.ConfigTree) -> None:
         self._keyinfo = None
+        self._extra: dict | None = None
         self.type: list = []
         for key, value in description.items():
             setattr(self, key, value)
             if key == "default":
                 self._keyinfo = tree.tree_keyinfo(description, key)  # type: ignore[arg-type]
 
+    def __setattr__(self: BaseDescriptor, name: str, value: Any) -> None:
+        try:
+            object.__setattr__(self, name, value)
+        except AttributeError:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[name] = value
+
+    def __getattr__(self: BaseDescriptor, name: str) -> Any:
+        # Only called for unset slots and keys not having a slot
+        if name != "_extra" and (extra := self._extra) and name in extra:
+            return extra[name]
+        raise AttributeError(name)
+
     def coerce(self: BaseDescriptor, value: Any) -> Any:
         return value
 
@@ -81,6 +101,8 @@ def descriptor(tag: str) -> Callable:
 class PathDescriptor(BaseDescriptor):
     """Descriptor for handling file paths, coercing values to Path objects."""
 
+    __slots__ = ()
+
     def coerce(
         self: PathDescriptor, value: str | Callable | None
     ) -> str | Path | Callable | None:
@@ -93,6 +115,8 @@ class PathDescriptor(BaseDescriptor):
 class StringDescriptor(BaseDescriptor):
     """Descriptor for handling string values."""
 
+    __slots__ = ()
+
     def coerce(self: StringDescriptor, value: str | Callable) -> str | Callable:
         return str(value) if not callable(value) else value
 
@@ -101,6 +125,8 @@ class StringDescriptor(BaseDescriptor):
 class SecretDescriptor(BaseDescriptor):
     """Descriptor for handling string values."""
 
+    __slots__ = ()
+
     def coerce(self: SecretDescriptor, value: str | Callable) -> str | Callable:
         return str(value) if not callable(value) else value
 
@@ -109,6 +135,8 @@ class SecretDescriptor(BaseDescriptor):
 class IntDescriptor(BaseDescriptor):
     """Descriptor for handling integer values."""
 
+    __slots__ = ()
+
     def coerce(self: IntDescriptor, value: int | Callable) -> int | Callable:
         return int(value) if not callable(value) else value
 
@@ -117,6 +145,8 @@ class IntDescriptor(BaseDescriptor):
 class FloatDescriptor(BaseDescriptor):
     """Descriptor for handling float values."""
 
+    __slots__ = ()
+
     def coerce(self: FloatDescriptor, value: float | Callable) -> float | Callable:
         return float(value) if not callable(value) else value
 
@@ -125,6 +155,8 @@ class FloatDescriptor(BaseDescriptor):
 class BoolDescriptor(BaseDescriptor):
     """Descriptor for handling boolean values."""
 
+    __slots__ = ()
+
     def coerce(self: BoolDescriptor, value: bool | str | Callable) -> bool | Callable:
         return bool(value) if not callable(value) else value
 
@@ -139,6 +171,8 @@ class ListDescriptor(BaseDescriptor):
     lists.
     """
 
+    __slots__ = ()
+
     def coerce(self: ListDescriptor, value: Iterable | Callable) -> list | Callable:
         if isinstance(value, str):
             return list(value.split())
@@ -157,6 +191,8 @@ class ObjectDescriptor(BaseDescriptor):
     properties.
     """
 
+    __slots__ = ()
+
     def __init__(self: ObjectDescriptor, description: dict) -> None:
         super().__init__(description)
         if not hasattr(self, "properties"):
@@ -186,7 +222,7 @@ class ObjectDescriptor(BaseDescriptor):
         return value
 
 
-def build_descriptor(description: dict) -> Type[BaseDescriptor]:
+def build_descriptor(description: dict) -> BaseDescriptor:
     description["type"] = description.get("type", "object").split()
     factory = DESCRIPTOR_REGISTRY.get(description["type"][0])
     if factory is None:
@@ -194,11 +230,11 @@ def build_descriptor(description: dict) -> Type[BaseDescriptor]:
     return factory(description)  # type: ignore[return-value,misc]
 
 
-def schema_load(fn: str) -> Type[BaseDescriptor]:
+def schema_load(fn: str) -> BaseDescriptor:
     props = tree.tree_load(fn)
     return build_schema(props)
 
 
-def build_schema(props: tree.ConfigTree) -> Type[BaseDescriptor]:
+def build_schema(props: tree.ConfigTree) -> BaseDescriptor:
     desc = {"type": "object", "properties": props}
     return build_descriptor(desc)
@@ -0,0 +1,218 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the static lookup of the system requirements of plugins.
+
+Plugins can publish their system requirements as static metadata in their
+schema file, by declaring defaults for ``requires.system`` and
+``requires.spin``:
+
+.. code-block:: yaml
+
+   myplugin:
+     type: object
+     properties:
+       requires:
+         type: object
+         properties:
+           spin:
+             type: list
+             default: [csspin_python.python]
+           system:
+             type: object
+             default:
+               debian:
+                 apt: [libpq-dev]
+
+``spin system-provision`` reads these from the schema files of installed
+plugin packages, or from the wheels of the plugin packages, which are
+downloaded to ``{spin.spin_dir}/wheels`` without being installed. This way
+neither plugin packages are installed nor plugins imported. If any plugin
+doesn't publish its system requirements statically, None is returned and
+the plugins have to be loaded.
+"""
+
+from __future__ import annotations
+
+import glob
+import os
+import subprocess
+import zipfile
+from typing import TYPE_CHECKING
+
+import ruamel.yaml
+
+from csspin import debug, interpolate1, pluginlock
+from csspin.graph import PluginGraph
+
+if TYPE_CHECKING:
+    from typing import Iterable
+
+    from path import Path
+
+    from csspin.tree import ConfigTree
+
+
+def wheel_dir(cfg: ConfigTree) -> Path:
+    """Return the directory plugin package wheels are downloaded to."""
+    return cfg.spin.spin_dir / "wheels"  # type: ignore[no-any-return]
+
+
+def schema_name(import_spec: str) -> str:
+    """Return the name of the schema file of plugin `import_spec`
+    relative to an import path, using ``/`` as separator."""
+    *package, name = import_spec.split(".")
+    return "/".join((*package, f"{name}_schema.yaml"))
+
+
+def search_path(cfg: ConfigTree) -> list[str]:
+    """Return the directories plugins are imported from, i.e. the local
+    plugin paths and the plugin directory, including the directories
+    added by its ``.pth`` files. spin's own ``sys.path`` is not searched,
+    as it may hold other versions of the plugin packages."""
+    paths = [
+        str(interpolate1(cfg.spin.project_root / localpath))
+        for localpath in cfg.plugin_paths
+    ]
+    paths.append(plugin_dir := str(cfg.spin.spin_dir / "plugins"))
+    for pth in sorted(glob.glob(os.path.join(plugin_dir, "*.pth"))):
+        with open(pth, encoding="utf-8") as f:
+            paths.extend(
+                line
+                for line in f.read().splitlines()
+                if not line.startswith(("#", "import")) and os.path.isdir(line)
+            )
+    return paths
+
+
+def _read_wheels(cfg: ConfigTree) -> dict[str, str]:
+    """Map the schema files in the downloaded wheels to their content."""
+    schemas = {}
+    for wheel in sorted(glob.glob(os.path.join(wheel_dir(cfg), "*.whl"))):
+        try:
+            with zipfile.ZipFile(wheel) as zf:
+                for name in zf.namelist():
+                    if name.endswith("_schema.yaml"):
+                        schemas[name] = zf.read(name).decode("utf-8")
+        except (OSError, zipfile.BadZipFile) as exc:
+            debug(f"Can't read {wheel}: {exc}")
+    return schemas
+
+
+def download_wheels(cfg: ConfigTree) -> bool:
+    """Download the wheels of the plugin packages without their
+    dependencies; return whether that succeeded."""
+    from csspin.cli import download_plugin_packages
+
+    cpi = download_plugin_packages(
+        cfg,
+        wheel_dir(cfg),
+        "-q",
+        "--no-deps",
+        "--only-binary=:all:",
+        check=False,
+        silent=True,
+        stdout=subprocess.DEVNULL,
+    )
+    return cpi is not None and cpi.returncode == 0
+
+
+class SchemaSource:
+    """Finds the schema files of plugins in the import path and in the
+    downloaded wheels of plugin packages."""
+
+    def __init__(self: SchemaSource, cfg: ConfigTree, paths: Iterable[str]) -> None:
+        self.cfg = cfg
+        self.paths = list(paths)
+        self.wheels: dict[str, str] | None = None
+
+    def read(self: SchemaSource, import_spec: str) -> str | None:
+        """Return the schema of plugin `import_spec`, or None if it can't be
+        found."""
+        name = schema_name(import_spec)
+        for path in self.paths:
+            fn = os.path.join(path, *name.split("/"))
+            if os.path.isfile(fn):
+                with open(fn, encoding="utf-8") as f:
+                    return f.read()
+        if self.wheels is None:
+            self.wheels = _read_wheels(self.cfg)
+            if name not in self.wheels and download_wheels(self.cfg):
+                self.wheels = _read_wheels(self.cfg)
+        return self.wheels.get(name)
+
+
+def parse_requires(import_spec: str, text: str | None) -> tuple | None:
+    """Return the static ``requires.spin`` and ``requires.system``
+    declarations of the plugin's schema `text`, or None if the schema
+    doesn't declare its system requirements. Declaring them takes an
+    explicit default of ``requires.system`` and a ``requires.spin``
+    property, since the plugin may compute undeclared ones at runtime."""
+    if text is None:
+        return None
+    try:
+        data = ruamel.yaml.YAML(typ="safe").load(text)
+        requires = data[import_spec.split(".")[-1]]["properties"]["requires"]
+        properties = requires["properties"]
+        system = properties["system"]["default"] or {}
+        spin = properties["spin"].get("default") or []
+    except (ruamel.yaml.YAMLError, KeyError, TypeError, AttributeError):
+        return None
+    if isinstance(spin, str):
+        spin = spin.split()
+    return list(spin), system
+
+
+def static_requirements(cfg: ConfigTree, import_specs: Iterable[str]) -> dict | None:
+    """Return the system requirements of the plugins `import_specs` and
+    their dependencies by plugin in topological order, or None if any
+    plugin doesn't publish them statically."""
+    import_specs = list(import_specs)
+    if lock := pluginlock.read_lock(cfg, import_specs):
+        # The plugin lock knows all plugins and their schema files
+        declared: dict = {}
+        for plugin in lock["plugins"]:
+            if plugin["name"].startswith("csspin."):
+                continue
+            text = None
+            if plugin["schema"] and os.path.isfile(plugin["schema"]):
+                with open(plugin["schema"], encoding="utf-8") as f:
+                    text = f.read()
+            if (parsed := parse_requires(plugin["name"], text)) is None:
+                debug(f"{plugin['name']} has no static system requirements")
+                return None
+            declared[plugin["name"]] = parsed[1]
+        return {
+            name: declared[name] for name in lock["topo_plugins"] if name in declared
+        }
+
+    source = SchemaSource(cfg, search_path(cfg))
+    graph: dict = {}
+    system: dict = {}
+    pending = list(import_specs)
+    while pending:
+        import_spec = pending.pop(0)
+        if import_spec in graph or import_spec.startswith("csspin."):
+            continue
+        if (parsed := parse_requires(import_spec, source.read(import_spec))) is None:
+            debug(f"{import_spec} has no static system requirements")
+            return None
+        graph[import_spec], system[import_spec] = parsed
+        pending.extend(graph[import_spec])
+    order = PluginGraph(graph, graph).order()
+    return {name: system[name] for name in order}
@@ -0,0 +1,226 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing the trace log of the commands run by spin.
+
+When the environment variable ``SPIN_TRACE`` is set to a value other than
+``0``, every command run by :py:func:`csspin.sh` and :py:func:`csspin.async_sh`
+-- and thus by :py:class:`csspin.Command` and :py:func:`csspin.run_script`
+-- is recorded as one JSON object per line in
+``{spin.spin_dir}/traces/<time>-<pid>.jsonl``, one file per spin process.
+Each record holds:
+
+* ``cmd``: the interpolated command line, with secrets masked
+* ``task`` and ``plugin``: the task being run and the plugin that ran the
+  command, if known
+* ``cwd``: the working directory of the command
+* ``start`` and ``duration``: the start time in seconds since the epoch and
+  the duration in seconds
+* ``returncode``: the exit code, null if the command could not be started
+* ``output``: the number of bytes of output captured by spin, null if the
+  output went to the terminal
+
+``spin trace summarize`` aggregates the records by task and by command.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import TYPE_CHECKING
+
+import click
+
+from csspin import COMMAND_WRAPPERS, debug, get_tree, obfuscate
+
+if TYPE_CHECKING:
+    from typing import Any, Generator, Iterable, TextIO
+
+    from path import Path
+
+    from csspin.tree import ConfigTree
+
+ENV = "SPIN_TRACE"
+
+_FILE: TextIO | None = None
+
+
+def enabled() -> bool:
+    """Return whether commands are traced."""
+    return os.environ.get(ENV, "0") not in ("", "0")
+
+
+def trace_dir(cfg: ConfigTree) -> Path:
+    """Return the directory of the trace logs."""
+    return cfg.spin.spin_dir / "traces"  # type: ignore[no-any-return]
+
+
+def _origin() -> tuple[str | None, str | None]:
+    """Return the name of the current task and of the plugin running the
+    command."""
+    task = None
+    if (ctx := click.get_current_context(silent=True)) is not None:
+        task = getattr(ctx.command, "full_name", None)
+    plugin = None
+    loaded = get_tree().get("loaded", {})
+    frame = sys._getframe(1)  # pylint: disable=protected-access
+    while frame is not None:
+        name = frame.f_globals.get("__name__")
+        if name != "csspin" and name in loaded:
+            plugin = name
+            break
+        frame = frame.f_back  # type: ignore[assignment]
+    return task, plugin
+
+
+def record(event: dict) -> None:
+    """Append `event` to the trace log of this spin process."""
+    global _FILE  # pylint: disable=global-statement
+    if _FILE is None:
+        try:
+            directory = trace_dir(get_tree())
+            fn = directory / f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.jsonl"
+            os.makedirs(directory, exist_ok=True)
+            _FILE = open(  # pylint: disable=consider-using-with
+                fn, "a", encoding="utf-8"
+            )
+        except (AttributeError, KeyError, OSError) as exc:
+            # e.g. before the project has been loaded
+            debug(f"Can't write the trace log: {exc}")
+            return
+    _FILE.write(json.dumps(event) + "\n")
+    _FILE.flush()
+
+
+def output_size(*outputs: bytes | str | None) -> int | None:
+    """Return the number of bytes of the captured `outputs`, or None if
+    nothing was captured."""
+    sizes = [
+        len(out.encode() if isinstance(out, str) else out)
+        for out in outputs
+        if out is not None
+    ]
+    return sum(sizes) if sizes else None
+
+
+class Span:
+    """The result of a traced command, to be filled in by the caller."""
+
+    __slots__ = ("returncode", "output")
+
+    def __init__(self) -> None:
+        self.returncode: int | None = None
+        self.output: int | None = None
+
+    def done(self, returncode: int | None, *outputs: bytes | str | None) -> None:
+        self.returncode = returncode
+        self.output = output_size(*outputs)
+
+
+@contextlib.contextmanager
+def command(cmd: str, cwd: str | None) -> Generator[Span, None, None]:
+    """Trace running the command line `cmd` in `cwd` while the block runs.
+    Failures raised as :py:class:`subprocess.CalledProcessError` are
+    recorded, too."""
+    span = Span()
+    if not enabled():
+        yield span
+        return
+    task, plugin = _origin()
+    start = time.time()
+    started = time.perf_counter()
+    try:
+        yield span
+    except subprocess.CalledProcessError as exc:
+        span.done(exc.returncode, exc.stdout, exc.stderr)
+        raise
+    finally:
+        record(
+            {
+                "cmd": obfuscate(cmd),
+                "task": task,
+                "plugin": plugin,
+                "cwd": os.path.abspath(cwd or os.curdir),
+                "start": start,
+                "duration": time.perf_counter() - started,
+                "returncode": span.returncode,
+                "output": span.output,
+            }
+        )
+
+
+COMMAND_WRAPPERS.append(command)
+
+
+def read(files: Iterable[str]) -> Generator[dict, None, None]:
+    """Yield the records of the trace logs `files`, skipping broken
+    lines."""
+    for fn in files:
+        with open(fn, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def logs(cfg: ConfigTree) -> list[str]:
+    """Return the trace logs of the project, oldest first."""
+    return sorted(glob.glob(os.path.join(trace_dir(cfg), "*.jsonl")))
+
+
+def aggregate(records: Iterable[dict], key: str) -> list[dict[str, Any]]:
+    """Aggregate `records` by the field `key`, returning the count, total
+    and maximum duration, failures and captured output per value, the most
+    expensive first."""
+    groups: dict[str, dict[str, Any]] = {}
+    for rec in records:
+        name = rec.get(key) or "-"
+        group = groups.setdefault(
+            name,
+            {key: name, "count": 0, "total": 0.0, "max": 0.0, "failed": 0, "output": 0},
+        )
+        group["count"] += 1
+        group["total"] += rec["duration"]
+        group["max"] = max(group["max"], rec["duration"])
+        group["failed"] += rec["returncode"] != 0
+        group["output"] += rec.get("output") or 0
+    return sorted(groups.values(), key=lambda group: group["total"], reverse=True)
+
+
+def format_table(rows: list[dict[str, Any]], key: str, width: int = 60) -> str:
+    """Format the aggregated `rows` as text table."""
+    lines = [
+        f"{key:{width}} {'count':>6} {'total s':>9} {'mean s':>8} {'max s':>8}"
+        f" {'failed':>6} {'output':>10}"
+    ]
+    for row in rows:
+        name = row[key]
+        if len(name) > width:
+            name = name[: width - 3] + "..."
+        lines.append(
+            f"{name:{width}} {row['count']:6} {row['total']:9.2f}"
+            f" {row['total'] / row['count']:8.2f} {row['max']:8.2f}"
+            f" {row['failed']:6} {row['output']:10}"
+        )
+    return "\n".join(lines)
@@ -21,11 +21,12 @@
 
 from __future__ import annotations
 
-import inspect
+import io
+import json
 import os
 import re
 import sys
-from collections import OrderedDict, namedtuple
+from collections import namedtuple
 from types import ModuleType
 from typing import TYPE_CHECKING
 
@@ -37,7 +38,9 @@ from csspin import (  # pylint: disable=cyclic-import
     Verbosity,
     debug,
     die,
+    hostfacts,
     interpolate1,
+    obfuscate,
     warn,
 )
 from csspin.schema import DESCRIPTOR_REGISTRY
@@ -52,11 +55,55 @@ KeyInfo = namedtuple("KeyInfo", ["file", "line"])
 ParentInfo = namedtuple("ParentInfo", ["parent", "key"])
 
 
-class ConfigTree(OrderedDict):
-    """A specialization of `OrderedDict` that we use to store the
+# Source files of settings are interned in a process-wide table, so that
+# each key's location is recorded as a single integer packing the file's
+# index and the line number instead of a `KeyInfo` tuple per key.
+_SOURCE_FILES: list[str] = []
+_SOURCE_FILE_INDEX: dict[str, int] = {}
+
+
+def _source_file_index(fn: str) -> int:
+    try:
+        return _SOURCE_FILE_INDEX[fn]
+    except KeyError:
+        index = _SOURCE_FILE_INDEX[fn] = len(_SOURCE_FILES)
+        _SOURCE_FILES.append(fn)
+        return index
+
+
+class _KeyInfoMap(dict):
+    """Mapping of keys to their `KeyInfo`, storing packed integers
+    rather than tuples for locations with integer line numbers."""
+
+    __slots__ = ()
+
+    def __setitem__(self: _KeyInfoMap, key: Hashable, ki: KeyInfo) -> None:
+        file, line = ki
+        if type(line) is int and 0 <= line < 1 << 32:  # noqa: E721
+            index = _source_file_index(str(file))
+            super().__setitem__(key, index << 32 | line)
+        else:
+            super().__setitem__(key, ki)
+
+    def __getitem__(self: _KeyInfoMap, key: Hashable) -> KeyInfo:
+        ki = super().__getitem__(key)
+        if type(ki) is int:  # noqa: E721
+            return KeyInfo(_SOURCE_FILES[ki >> 32], ki & 0xFFFFFFFF)
+        return ki  # type: ignore[no-any-return]
+
+    def get(self: _KeyInfoMap, key: Hashable, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def __reduce__(self: _KeyInfoMap) -> tuple:
+        # The file table is per process, so pickle the decoded locations
+        return (self.__class__, (), None, None, ((k, self[k]) for k in self))
+
+
+class ConfigTree(dict):
+    """A specialization of `dict` that we use to store the
     configuration tree internally.
 
-    `ConfigTree` has three features over `OrderedDict`: first, it
+    `ConfigTree` has three features over `dict`: first, it
     behaves like a "bunch", i.e. items can be access as dot
     expressions (``config.myprop``). Second, each subtree is linked to
     its parent, to enable the computation of full names:
@@ -75,16 +122,25 @@ class ConfigTree(OrderedDict):
     names used.
     """
 
+    __slots__ = ("__keyinfo", "__parentinfo", "__schema")
+
     def __init__(self: ConfigTree, *args: Any, **kwargs: dict) -> None:
         ofsframes = kwargs.pop("__ofs_frames__", 0)
         super().__init__(*args, **kwargs)
-        self.__keyinfo = {}
+        self.__keyinfo = _KeyInfoMap()
         self.__parentinfo = None  # pylint: disable=unused-private-member
-        for key, value in self.items():
-            self.__keyinfo[key] = _call_location(2 + ofsframes)  # type: ignore[operator]
-            if isinstance(value, ConfigTree):
-                # pylint: disable=protected-access,unused-private-member
-                value.__parentinfo = ParentInfo(self, key)
+        if self:
+            ki = _call_location(2 + ofsframes)  # type: ignore[operator]
+            for key, value in self.items():
+                self.__keyinfo[key] = ki
+                if isinstance(value, ConfigTree):
+                    # pylint: disable=protected-access,unused-private-member
+                    value.__parentinfo = ParentInfo(self, key)
+
+    def __repr__(self: ConfigTree) -> str:
+        if not self:
+            return f"{self.__class__.__name__}()"
+        return f"{self.__class__.__name__}({list(self.items())!r})"
 
     def __setitem__(self: ConfigTree, key: Hashable, value: Any) -> None:
         super().__setitem__(key, value)
@@ -136,7 +192,7 @@ def tree_set_descriptor(
 
     desc = desc_type(**kwargs)
     schema.properties[key] = desc
-    if isinstance(tree[key], OrderedDict):
+    if isinstance(tree[key], ConfigTree):
         setattr(tree[key], "_ConfigTree__schema", desc)
 
 
@@ -206,14 +262,12 @@ def tree_sanitize(cfg: ConfigTree) -> None:
 
 
 def tree_update_key(tree: ConfigTree, key: Hashable, value: Any) -> None:
-    OrderedDict.__setitem__(tree, key, value)  # type: ignore[assignment]
+    dict.__setitem__(tree, key, value)
 
 
 def _call_location(depth: int) -> KeyInfo:
-    fn, lno, _, _, _ = inspect.getframeinfo(
-        sys._getframe(depth)  # pylint: disable=protected-access
-    )
-    return KeyInfo(fn, lno)
+    frame = sys._getframe(depth)  # pylint: disable=protected-access
+    return KeyInfo(frame.f_code.co_filename, frame.f_lineno)
 
 
 def _set_callsite(tree: ConfigTree, key: Hashable, depth: int, value: Any) -> None:
@@ -265,6 +319,30 @@ def tree_load(fn: str) -> ConfigTree | Any:
     return parse_yaml(data, fn)
 
 
+def tree_copy(value: Any) -> Any:
+    """Return a deep copy of configuration tree `value`, including the
+    tracking information. Lists and dictionaries are copied as well, all
+    other values are shared."""
+    if isinstance(value, ConfigTree):
+        copy = ConfigTree()
+        for key, item in value.items():
+            item = tree_copy(item)
+            dict.__setitem__(copy, key, item)
+            if isinstance(item, ConfigTree):
+                tree_set_parent(item, copy, key)
+        # The packed locations can be copied as they are
+        # pylint: disable=protected-access
+        dict.update(copy._ConfigTree__keyinfo, value._ConfigTree__keyinfo)
+        if (schema := getattr(value, "_ConfigTree__schema", None)) is not None:
+            copy._ConfigTree__schema = schema
+        return copy
+    if isinstance(value, list):
+        return [tree_copy(item) for item in value]
+    if isinstance(value, dict):
+        return {key: tree_copy(item) for key, item in value.items()}
+    return value
+
+
 def tree_walk(config: ConfigTree, indent: str = "") -> Generator:
     """Walk configuration tree depth-first, yielding:
     - Key
@@ -276,10 +354,18 @@ def tree_walk(config: ConfigTree, indent: str = "") -> Generator:
     - Descriptor
     """
     for key, value in sorted(config.items()):
-        yield key, value, tree_keyname(config, key), tree_keyinfo(
-            config,
+        yield (
             key,
-        ), tree_types(config, key), indent, tree_get_descriptor(config, key)
+            value,
+            tree_keyname(config, key),
+            tree_keyinfo(
+                config,
+                key,
+            ),
+            tree_types(config, key),
+            indent,
+            tree_get_descriptor(config, key),
+        )
         if isinstance(value, ConfigTree):
             for key, value, fullname, info, types, subindent, desc in tree_walk(
                 value, indent + "  "
@@ -287,94 +373,232 @@ def tree_walk(config: ConfigTree, indent: str = "") -> Generator:
                 yield key, value, fullname, info, types, subindent, desc
 
 
-def tree_dump(tree: ConfigTree) -> str:
-    """Print the configuration tree in a human-readable format."""
-    text = []
+DUMP_FORMATS = ("text", "json", "yaml")
 
-    grey, reset = "\033[90m", "\033[0m"
 
-    def write(line: str, internal: bool = False) -> None:
-        output = f"{grey}{line}{reset}" if internal else line
-        text.append(output)
+def tree_dump(tree: ConfigTree, fmt: str = "text", select: str | None = None) -> str:
+    """Print the configuration tree in a human-readable format."""
+    return "\n".join(tree_dump_lines(tree, fmt, select))
+
+
+def _dump_plain(value: Any) -> Any:
+    """Convert a value of the configuration tree into plain JSON/YAML
+    compatible data, masking secrets on the way."""
+    if value is None or isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        # Plain numbers, as enums like Verbosity are not representable
+        return int(value) if isinstance(value, int) else float(value)
+    if isinstance(value, str):
+        return obfuscate(str(value))
+    if isinstance(value, dict):
+        return {
+            str(key): _dump_plain(item)
+            for key, item in value.items()
+            if not isinstance(item, (DESCRIPTOR_REGISTRY["object"], ModuleType))
+        }
+    if isinstance(value, (list, tuple)):
+        return [_dump_plain(item) for item in value]
+    return obfuscate(repr(value))
+
+
+def _dump_selection(
+    tree: ConfigTree, select: str | None
+) -> tuple[ConfigTree, tuple | None, str]:
+    """Resolve the dotted path `select` to the subtree to dump, the keys to
+    include from it and the prefix of their names."""
+    config, keys, prefix = tree, None, ""
+    if select:
+        *path, last = select.split(".")
+        for name in path:
+            if not isinstance(config.get(name), ConfigTree):
+                die(f"Can't dump '{select}': '{name}' is not a subtree.")
+            config = config[name]
+            prefix += f"{name}."
+        if last not in config:
+            die(f"Can't dump '{select}': no such setting.")
+        if isinstance(config[last], ConfigTree):
+            config, keys, prefix = config[last], None, f"{prefix}{last}."
+        else:
+            keys = (last,)
+    return config, keys, prefix
+
+
+def _dump_walk(
+    config: ConfigTree,
+    prefix: str,
+    keys: Iterable | None,
+    show_internal: bool,
+    depth: int = 0,
+) -> Generator:
+    """Single walk through the tree yielding the settings to dump."""
+    filterout = (DESCRIPTOR_REGISTRY["object"], ModuleType)
+    for key in sorted(config) if keys is None else keys:
+        value = config[key]
+        if isinstance(value, filterout):
+            continue
+        types = tree_types(config, key)
+        is_internal = "internal" in types
+        if is_internal and not show_internal:
+            continue
+        name = f"{prefix}{key}"
+        yield name, key, value, tree_keyinfo(config, key), types, is_internal, depth
+        if isinstance(value, ConfigTree):
+            yield from _dump_walk(value, f"{name}.", None, show_internal, depth + 1)
+
+
+def _dump_records(settings: Iterable, fmt: str) -> Generator:
+    """Generate the "json" or "yaml" dump of the `settings` walked by
+    :py:func:`_dump_walk`."""
+    records = (
+        {
+            "key": name,
+            "value": _dump_plain(value),
+            "file": str(info.file),
+            "line": info.line,
+            "types": list(types),
+        }
+        for name, _, value, info, types, _, _ in settings
+        if not isinstance(value, ConfigTree)
+    )
+    if fmt == "json":
+        yield "["
+        separator = " "
+        for record in records:
+            yield f"{separator}{json.dumps(record)}"
+            separator = ","
+        yield "]"
+        return
 
+    yaml = ruamel.yaml.YAML(typ="safe", pure=True)
+    yaml.default_flow_style = False
+    empty = True
+    for record in records:
+        stream = io.StringIO()
+        yaml.dump([record], stream)
+        yield stream.getvalue().rstrip("\n")
+        empty = False
+    if empty:
+        yield "[]"
+
+
+def _location_shortener(verbosity: Verbosity) -> Callable[[KeyInfo], str]:
+    """Return a function shortening the location of a setting to the tag
+    of its row in the text dump."""
+    csspin_dir = os.path.dirname(os.path.abspath(__file__))
     cwd = os.getcwd()
     home = os.path.expanduser("~")
+    short_files: dict[str, str | None] = {}
 
     def shorten_filename_line(info: KeyInfo) -> str:
-        if (
-            tree.verbosity < Verbosity.DEBUG
-            and Path(info.file).absolute().dirname()
-            == Path(__file__).absolute().dirname()
-        ):
-            return "csspin"
+        # Shortening only depends on the file, so it is done once per
+        # source file.
+        try:
+            short = short_files[info.file]
+        except KeyError:
+            if (
+                verbosity < Verbosity.DEBUG
+                and os.path.dirname(os.path.abspath(info.file)) == csspin_dir
+            ):
+                short = None
+            elif info.file.startswith(cwd):
+                short = info.file[len(cwd) + 1 :]  # noqa: E203
+            elif info.file.startswith(home):
+                short = f"~{info.file[len(home):]}"
+            else:
+                short = info.file
+            short_files[info.file] = short
+        return "csspin" if short is None else f"{short}:{info.line}"
+
+    return shorten_filename_line
 
-        if info.file.startswith(cwd):
-            return f"{info.file[len(cwd) + 1 :]}:{info.line}"  # noqa: E203
-        if info.file.startswith(home):
-            return f"~{info.file[len(home):]}:{info.line}"
-        return f"{info.file}:{info.line}"
 
+def _dump_text(
+    config: ConfigTree, keys: Iterable | None, verbosity: Verbosity
+) -> Generator:
+    """Generate the annotated, human-readable dump of `config`."""
     filterout = (DESCRIPTOR_REGISTRY["object"], ModuleType)
+    show_internal = verbosity > Verbosity.NORMAL
+    shorten_filename_line = _location_shortener(verbosity)
+
+    def locations(config: ConfigTree, keys: Iterable | None) -> Generator:
+        """Yield the locations of the settings dumped as text."""
+        for _, _, value, info, _, _, _ in _dump_walk(config, "", keys, show_internal):
+            yield info
+            if isinstance(value, list):
+                for element in value:
+                    if isinstance(element, ConfigTree):
+                        yield from locations(element, None)
+
+    # The text format aligns the key column behind the location tags. A
+    # first walk only measures the tags, so the rows can be written while
+    # walking the tree a second time instead of being buffered.
     tagcolumn = max(
-        (
-            len(shorten_filename_line(info) + ":")
-            for _, _, _, info, _, _, _ in tree_walk(tree)
-        ),
+        (len(shorten_filename_line(info)) + 1 for info in locations(config, keys)),
         default=0,
     )
-    separator = "|"
-
-    def build_tree_dump(tree: ConfigTree, key_prefix: str = "", ind: str = "") -> None:
-        """Build the tree dump of passed configuration tree.
-
-        :param tree: The tree to iterate through
-        :param key_prefix: The prefix of the keys (only applicable for recursive
-            calls to align with the top-level data type, e.g. "list")
-        :param ind: Additional indention for the output
-        """
+    grey, reset = "\033[90m", "\033[0m"
 
-        for key, value, _, info, types, indent, _ in tree_walk(tree):
-            is_internal = "internal" in types
-            if is_internal and not tree.verbosity > Verbosity.NORMAL:
-                continue
-            indent += ind
-            key = key_prefix + key
+    def row(tag: str, text: str, is_internal: bool) -> str:
+        line = f"{tag.ljust(tagcolumn + 1)}|{text}"
+        return f"{grey}{line}{reset}" if is_internal else line
 
+    def rows(
+        config: ConfigTree, keys: Iterable | None, ind: str = "", item: bool = False
+    ) -> Generator:
+        for _, key, value, info, _, is_internal, depth in _dump_walk(
+            config, "", keys, show_internal
+        ):
+            indent = ind + "  " * depth
+            if item:
+                # The first key of a list item carries the dash
+                indent, item = f"{ind[:-2]}- ", False
             tag = shorten_filename_line(info) + ":"
-            space = (tagcolumn - len(tag) + 1) * " "
-
-            if isinstance(value, filterout):
-                continue
-
             if isinstance(value, list):
-                if value:
-                    write(f"{tag}{space}{separator}{indent}{key}:", is_internal)
-                    blank_location = len(f"{tag}{space}") * " "
-                    for item in value:
-                        if isinstance(item, filterout):
-                            continue
-
-                        if isinstance(item, str):
-                            write(
-                                f"{blank_location}{separator}{indent}  - {repr(item)}",
-                                is_internal,
-                            )
-                        elif isinstance(item, ConfigTree):
-                            build_tree_dump(item, key_prefix="- ", ind=indent + "  ")
-                else:
-                    write(f"{tag}{space}{separator}{indent}{key}: []", is_internal)
+                if not value:
+                    yield row(tag, f"{indent}{key}: []", is_internal)
+                    continue
+                yield row(tag, f"{indent}{key}:", is_internal)
+                for element in value:
+                    if isinstance(element, filterout):
+                        continue
+                    if isinstance(element, ConfigTree):
+                        item_indent = indent.replace("-", " ") + "    "
+                        yield from rows(element, None, item_indent, True)
+                    else:
+                        text = f"{indent}  - {obfuscate(repr(element))}"
+                        yield row("", text, is_internal)
             elif isinstance(value, dict):
-                if value:
-                    write(f"{tag}{space}{separator}{indent}{key}:", is_internal)
-                else:
-                    write(f"{tag}{space}{separator}{indent}{key}: {{}}", is_internal)
+                text = f"{indent}{key}:" if value else f"{indent}{key}: {{}}"
+                yield row(tag, text, is_internal)
             else:
-                write(
-                    f"{tag}{space}{separator}{indent}{key}: {repr(value)}", is_internal
-                )
+                yield row(tag, f"{indent}{key}: {obfuscate(repr(value))}", is_internal)
 
-    build_tree_dump(tree)
-    return "\n".join(text)
+    yield from rows(config, keys)
+
+
+def tree_dump_lines(
+    tree: ConfigTree, fmt: str = "text", select: str | None = None
+) -> Generator:
+    """Generate the dump of the configuration tree line by line.
+
+    `fmt` is one of :py:data:`DUMP_FORMATS`: "text" is the annotated,
+    human-readable format known from ``spin --dump``, "json" yields a
+    JSON array and "yaml" a YAML sequence, with one record per key
+    carrying the dotted name, value, source location and types of the
+    setting. `select` is a dotted path like ``python.version``, limiting
+    the dump to that subtree or setting. Values of secrets are masked.
+    """
+    if fmt not in DUMP_FORMATS:
+        die(f"Unknown dump format '{fmt}', use one of {', '.join(DUMP_FORMATS)}.")
+
+    verbosity = tree.get("verbosity", Verbosity.NORMAL)
+    config, keys, prefix = _dump_selection(tree, select)
+    if fmt == "text":
+        yield from _dump_text(config, keys, verbosity)
+    else:
+        show_internal = verbosity > Verbosity.NORMAL
+        yield from _dump_records(_dump_walk(config, prefix, keys, show_internal), fmt)
 
 
 def directive_append(target: ConfigTree, key: Hashable, value: Any) -> None:
@@ -606,13 +830,7 @@ RE_VAR = re.compile(r"\$(\w+)")
 
 class YamlParser:
     def __init__(self: YamlParser, fn: str, facts: dict, variables: dict) -> None:
-        self._facts = {
-            "win32": sys.platform == "win32",
-            "darwin": sys.platform == "darwin",
-            "linux": sys.platform.startswith("linux"),
-            "posix": os.name == "posix",
-            "nt": os.name == "nt",
-        }
+        self._facts = hostfacts.yaml_facts()
         self._var = {}
 
         self._facts.update(facts)
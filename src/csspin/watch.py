@@ -0,0 +1,199 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright 2026 CONTACT Software GmbH
+# https://www.contact-software.com/
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Module implementing ``spin watch``, which re-runs a task in-process whenever
+its sources change.
+
+The loaded configuration tree and plugins stay in memory between runs. Files
+are watched by polling stat snapshots taken by :py:mod:`csspin.scanner`; a
+burst of changes, e.g. when switching branches, triggers a single run once the
+files stopped changing for the debounce period. Only changes to the spinfile
+or the user's global.yaml cause the configuration tree to be rebuilt.
+"""
+
+from __future__ import annotations
+
+import time
+from traceback import format_exc
+from typing import TYPE_CHECKING
+
+import click
+
+from csspin import debug, die, echo, get_sources, toporun, warn
+from csspin.scanner import changes, normalize, scan
+
+if TYPE_CHECKING:
+    from typing import Callable, Iterable
+
+    from csspin.tree import ConfigTree
+
+
+class Watcher:
+    """Polls the files matching `patterns` for changes."""
+
+    def __init__(
+        self: Watcher,
+        patterns: Iterable[str],
+        root: str = ".",
+        interval: float = 0.5,
+        debounce: float = 0.3,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.patterns = list(patterns)
+        self.root = root
+        self.interval = interval
+        self.debounce = debounce
+        self._sleep = sleep
+        self.snapshot = scan(self.patterns, self.root)
+
+    def poll(self: Watcher) -> list[str]:
+        """Return the files changed since the last poll."""
+        snapshot = scan(self.patterns, self.root)
+        changed = changes(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        return changed
+
+    def wait(self: Watcher) -> list[str]:
+        """Block until files changed and then didn't change for the
+        debounce period; return all files changed meanwhile."""
+        changed: set[str] = set()
+        while not changed:
+            self._sleep(self.interval)
+            changed.update(self.poll())
+        while True:
+            self._sleep(self.debounce)
+            if not (more := self.poll()):
+                return sorted(changed)
+            changed.update(more)
+
+
+def task_sources(cfg: ConfigTree, task_name: str) -> list[str]:
+    """Return the sources of the build rule ``task <task_name>`` including
+    the sources of the rules producing them."""
+    sources: dict[str, None] = {}
+    pending = [f"task {task_name}"]
+    seen = set()
+    while pending:
+        target = pending.pop(0)
+        if target in seen:
+            continue
+        seen.add(target)
+        rule = cfg.build_rules.get(target)
+        if rule is None:
+            if not target.startswith("task "):
+                sources[target] = None
+            continue
+        for source in get_sources(rule):
+            pending.append(str(source))
+            if str(source) not in cfg.build_rules:
+                sources[str(source)] = None
+    return list(sources)
+
+
+def config_files(cfg: ConfigTree) -> list[str]:
+    """Return the files the configuration tree is built from."""
+    from csspin.pluginlock import global_yaml_path
+
+    files = [str(cfg.spin.spinfile)]
+    if global_yaml := global_yaml_path():
+        files.append(global_yaml)
+    return files
+
+
+def run_task(args: list[str]) -> bool:
+    """Run spin task `args` in-process and return whether it succeeded."""
+    from csspin.cli import commands
+
+    echo("spin", " ".join(args))
+    try:
+        commands.main(args=list(args), standalone_mode=False)
+    except SystemExit as exc:
+        return not exc.code
+    except (click.ClickException, click.Abort):
+        return False
+    except Exception:  # pylint: disable=broad-exception-caught
+        warn(format_exc())
+        return False
+    return True
+
+
+def reload_tree(cfg: ConfigTree) -> ConfigTree:
+    """Build the configuration tree anew, e.g. after the spinfile changed."""
+    from csspin.cli import (
+        ENVBASE,
+        finalize_cfg_tree,
+        load_minimal_tree,
+        load_plugins_into_tree,
+    )
+
+    cfg = load_minimal_tree(
+        cfg.spin.spinfile,
+        cwd=str(cfg.spin.project_root),
+        envbase=ENVBASE,
+        verbosity=cfg.verbosity,
+    )
+    load_plugins_into_tree(cfg)
+    finalize_cfg_tree(cfg)
+    toporun(cfg, "init")
+    return cfg
+
+
+def watch(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    cfg: ConfigTree,
+    args: list[str],
+    patterns: Iterable[str] = (),
+    interval: float = 0.5,
+    debounce: float = 0.3,
+    watcher_factory: Callable[..., Watcher] = Watcher,
+) -> None:
+    """Run task `args` and run it again whenever the files matching
+    `patterns` change, until interrupted.
+
+    Without `patterns`, the sources of the task's build rule are watched.
+    """
+    if not args:
+        die("Usage: spin watch [--on PATTERN]... TASK [ARGS]...")
+    patterns = list(patterns) or task_sources(cfg, args[0])
+    if not patterns:
+        die(
+            f"Don't know which files to watch for '{args[0]}': add 'sources'"
+            f" to the build rule 'task {args[0]}' or use --on PATTERN."
+        )
+
+    root = str(cfg.spin.project_root)
+    settings = {normalize(fn) for fn in config_files(cfg)}
+    watcher = watcher_factory([*patterns, *settings], root, interval, debounce)
+    debug(f"watching {' '.join(patterns)}")
+    run_task(args)
+    try:
+        while True:
+            echo(f"watching {len(watcher.snapshot)} files (press Ctrl+C to stop)")
+            changed = watcher.wait()
+            debug(f"changed: {' '.join(changed)}")
+            if reload := settings.intersection(changed):
+                echo(f"reloading configuration, {', '.join(sorted(reload))} changed")
+                try:
+                    cfg = reload_tree(cfg)
+                except (click.ClickException, click.Abort):
+                    continue
+                except Exception:  # pylint: disable=broad-exception-caught
+                    warn(format_exc())
+                    continue
+            run_task(args)
+    except KeyboardInterrupt:
+        echo("stopped watching")
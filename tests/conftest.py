@@ -10,6 +10,7 @@ from __future__ import annotations
 
 import contextlib
 import os
+import sys
 from typing import TYPE_CHECKING
 
 from click.testing import CliRunner
@@ -20,8 +21,10 @@ from csspin.tree import ConfigTree
 
 if TYPE_CHECKING:
     import pathlib
+    from typing import Any, Generator
 
 from path import Path
+from synthetic import SyntheticProject, generate
 
 
 @fixture()
@@ -100,3 +103,17 @@ def directive_spinfile() -> Path:
     load_plugins_into_tree(cfg)
     finalize_cfg_tree(cfg)
     return cfg
+
+
+@fixture()
+def synthetic_project(tmp_path: Path) -> Generator:
+    """Factory writing a synthetic project below tmp_path, see
+    tests/synthetic.py for the parameters."""
+
+    def make(**kwargs: Any) -> SyntheticProject:
+        return generate(tmp_path / "synthetic", **kwargs)
+
+    yield make
+    # The plugin modules are specific to this project
+    for name in [name for name in sys.modules if name.split(".")[0] == "synth"]:
+        del sys.modules[name]
@@ -0,0 +1,207 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Generator of synthetic spin projects of configurable size.
+
+A synthetic project consists of a spinfile, a global.yaml and a package of
+local plugins with schemas. The plugins are arranged in `depth` levels of
+`width` plugins each; every plugin requires `fanout` plugins of the level
+below via ``requires.spin``. Settings refer to each other in interpolation
+chains of length `chain`, within plugins and from the spinfile into the
+plugins. Plugins record the order of their provision hooks in
+``{spin.spin_dir}/provision.log``.
+
+Everything is local, so spin can load and provision the project without
+network access, e.g. to measure and profile startup at scale:
+
+    python tests/synthetic.py /tmp/big --width 10 --depth 5 --keys 50
+    SPIN_CONFIG=/tmp/big/config spin -C /tmp/big --dump
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+
+class SyntheticProject:
+    """A generated project: its directory, spinfile and global.yaml, the
+    plugin import specs in the order they are listed in the spinfile and
+    the import specs each plugin requires."""
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self: SyntheticProject,
+        root: str,
+        spinfile: str,
+        global_yaml: str,
+        plugins: list[str],
+        requires: dict[str, list[str]],
+    ) -> None:
+        self.root = root
+        self.spinfile = spinfile
+        self.global_yaml = global_yaml
+        self.plugins = plugins
+        self.requires = requires
+
+    @property
+    def config_dir(self: SyntheticProject) -> str:
+        """The directory to use as SPIN_CONFIG to include the global.yaml."""
+        return os.path.dirname(self.global_yaml)
+
+
+PLUGIN_TEMPLATE = '''\
+"""Synthetic plugin {name} on level {level}."""
+
+from csspin import config, echo, task
+
+defaults = config(
+    requires=config(spin={requires!r}),
+)
+
+
+def configure(cfg):
+    pass
+
+
+def init(cfg):
+    pass
+
+
+def provision(cfg):
+    with open(cfg.spin.spin_dir / "provision.log", "a", encoding="utf-8") as f:
+        f.write("{name}\\n")
+
+
+@task("{task}")
+def run(cfg):
+    echo(cfg.{name}.k{last})
+'''
+
+
+def _write(fn: str, text: str) -> None:
+    os.makedirs(os.path.dirname(fn), exist_ok=True)
+    with open(fn, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def generate(  # pylint: disable=too-many-arguments,too-many-locals
+    root: str,
+    width: int = 3,
+    depth: int = 3,
+    fanout: int = 2,
+    keys: int = 10,
+    chain: int = 3,
+    project_keys: int = 100,
+    package: str = "synth",
+) -> SyntheticProject:
+    """Write a synthetic project to directory `root`.
+
+    Each plugin has `keys` settings, the spinfile another `project_keys`.
+    """
+    root = os.path.abspath(root)
+    chain = max(chain, 1)
+    names = [[f"l{level}_{i}" for i in range(width)] for level in range(depth)]
+    requires: dict[str, list[str]] = {}
+
+    _write(os.path.join(root, "plugins", package, "__init__.py"), "")
+    for level, plugins in enumerate(names):
+        for i, name in enumerate(plugins):
+            deps = []
+            if level:
+                for k in range(min(fanout, width)):
+                    deps.append(f"{package}.{names[level - 1][(i + k) % width]}")
+            requires[f"{package}.{name}"] = deps
+
+            # Each setting refers to the previous one, restarting the chain
+            # every `chain` keys; chains start at a setting of a dependency.
+            schema = [f"{name}:", "  type: object", f"  help: Plugin {name}"]
+            schema.append("  properties:")
+            for j in range(keys):
+                if j % chain:
+                    value = f"{{{name}.k{j - 1}}}/{j}"
+                elif deps:
+                    dep = deps[j // chain % len(deps)].rsplit(".", 1)[-1]
+                    value = f"{{{dep}.k0}}/{name}"
+                else:
+                    value = f"{{spin.data}}/{name}"
+                schema.extend(
+                    (
+                        f"    k{j}:",
+                        "      type: str",
+                        f"      help: Setting {j} of {name}",
+                        f"      default: {value!r}",
+                    )
+                )
+            directory = os.path.join(root, "plugins", package)
+            _write(os.path.join(directory, f"{name}_schema.yaml"), "\n".join(schema))
+            _write(
+                os.path.join(directory, f"{name}.py"),
+                PLUGIN_TEMPLATE.format(
+                    name=name,
+                    level=level,
+                    requires=deps,
+                    task=name.replace("_", "-"),
+                    last=max(keys - 1, 0),
+                ),
+            )
+
+    # List the top level first, so that loading recurses into dependencies
+    plugins = [f"{package}.{name}" for level in reversed(names) for name in level]
+    spinfile = ["spin:", "  project_name: synthetic", "plugin_paths:", "  - plugins"]
+    spinfile.append("plugins:")
+    spinfile.extend(f"  - {spec}" for spec in plugins)
+    spinfile.append("project:")
+    top = names[-1] if names else []
+    for n in range(project_keys):
+        if n % chain:
+            value = f"{{project.k{n - 1}}}/{n}"
+        elif top and keys:
+            value = f"{{{top[n // chain % len(top)]}.k{keys - 1}}}"
+        else:
+            value = f"value{n}"
+        spinfile.append(f"  k{n}: {value!r}")
+    _write(os.path.join(root, "spinfile.yaml"), "\n".join(spinfile) + "\n")
+
+    global_yaml = os.path.join(root, "config", "global.yaml")
+    lines = ["project:", "  user: synthetic"]
+    for name in top:
+        lines.extend((f"{name}:", f"  k0: '{{spin.data}}/global/{name}'"))
+    _write(global_yaml, "\n".join(lines) + "\n")
+
+    return SyntheticProject(
+        root, os.path.join(root, "spinfile.yaml"), global_yaml, plugins, requires
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("root", help="directory to write the project to")
+    parser.add_argument("--width", type=int, default=3, help="plugins per level")
+    parser.add_argument("--depth", type=int, default=3, help="levels of plugins")
+    parser.add_argument("--fanout", type=int, default=2, help="dependencies per plugin")
+    parser.add_argument("--keys", type=int, default=10, help="settings per plugin")
+    parser.add_argument(
+        "--chain", type=int, default=3, help="length of interpolation chains"
+    )
+    parser.add_argument(
+        "--project-keys", type=int, default=100, help="settings in the spinfile"
+    )
+    args = parser.parse_args()
+    project = generate(
+        args.root,
+        width=args.width,
+        depth=args.depth,
+        fanout=args.fanout,
+        keys=args.keys,
+        chain=args.chain,
+        project_keys=args.project_keys,
+    )
+    print(f"{len(project.plugins)} plugins written to {project.root}")
+    print(f"Use SPIN_CONFIG={project.config_dir} to include its global.yaml")
+
+
+if __name__ == "__main__":
+    main()
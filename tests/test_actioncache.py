@@ -0,0 +1,103 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of the action cache."""
+
+from __future__ import annotations
+
+import shutil
+from typing import TYPE_CHECKING
+
+import pytest
+
+import csspin
+from csspin import actioncache, config
+
+if TYPE_CHECKING:
+    from path import Path
+
+    from csspin.tree import ConfigTree
+
+
+@pytest.fixture
+def project(cfg: ConfigTree, tmp_path: Path) -> Path:
+    cfg.spin.project_root = tmp_path
+    cfg.spin.spin_dir = tmp_path / ".spin"
+    cfg.spin.action_cache = tmp_path / "cache"
+    (tmp_path / ".spin").mkdir()
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.txt").write_text("a")
+    return tmp_path
+
+
+def test_action_cache(
+    cfg: ConfigTree, project: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Outputs are restored on hits and the recipe runs on misses, also
+    if only config values or environment variables changed"""
+    runs = []
+
+    def recipe() -> None:
+        runs.append(1)
+        (project / "build").makedirs_p()
+        (project / "build" / "out.txt").write_text(
+            (project / "src" / "a.txt").read_text()
+        )
+
+    definition = config(
+        script=["generate"],
+        inputs=config(files=["src/*.txt"], config=["spin.project_name"], env=["X"]),
+        outputs=["build"],
+    )
+    actioncache.run(cfg, "task gen", definition, recipe)
+    assert len(runs) == 1
+    shutil.rmtree(project / "build")
+    actioncache.run(cfg, "task gen", definition, recipe)
+    assert len(runs) == 1
+    assert (project / "build" / "out.txt").read_text() == "a"
+
+    (project / "src" / "a.txt").write_text("b")
+    actioncache.run(cfg, "task gen", definition, recipe)
+    assert len(runs) == 2
+    monkeypatch.setenv("X", "1")
+    actioncache.run(cfg, "task gen", definition, recipe)
+    assert len(runs) == 3
+    cfg.spin.project_name = "other"
+    actioncache.run(cfg, "task gen", definition, recipe)
+    assert len(runs) == 4
+    assert actioncache.stats(cfg) == {"hits": 1, "misses": 4}
+
+    # Local misses are served from the shared cache
+    cfg.spin.shared_action_cache = project / "shared"
+    cfg.spin.project_name = "shared"
+    actioncache.run(cfg, "task gen", definition, recipe)
+    assert len(runs) == 5
+    shutil.rmtree(project / "cache")
+    shutil.rmtree(project / "build")
+    actioncache.run(cfg, "task gen", definition, recipe)
+    assert len(runs) == 5
+    assert (project / "build" / "out.txt").read_text() == "b"
+
+
+def test_build_rule(cfg: ConfigTree, project: Path) -> None:
+    """Build rules declaring outputs are cached, using their sources as
+    inputs"""
+    target = "build/rule.txt"
+    cfg.build_rules = config(
+        **{
+            target: config(
+                sources=["src/a.txt"],
+                script=["mkdir -p build && cp src/a.txt build/rule.txt"],
+                outputs=[target],
+            )
+        }
+    )
+    with csspin.cd(project):
+        csspin.build_target(cfg, target)
+        (project / target).unlink()
+        csspin.build_target(cfg, target)
+    assert (project / target).read_text() == "a"
+    assert actioncache.stats(cfg) == {"hits": 1, "misses": 1}
@@ -11,14 +11,18 @@ implemented in src/spin/__init__.py
 
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import os
 import pickle
+import shutil
 import subprocess
 import sys
 import tarfile
+import time
 import zipfile
 from pathlib import Path as PathlibPath
-from typing import TYPE_CHECKING, Callable
+from typing import TYPE_CHECKING, Callable, Generator
 from unittest import mock
 from unittest.mock import patch
 
@@ -112,6 +116,42 @@ def test_echo_extended(function: Callable, message: str, mocker: MockerFixture)
         ), f"None of the expected values found in {call.args[0]=}"
 
 
+def test_obfuscate(mocker: MockerFixture) -> None:
+    """
+    csspin.obfuscate masks all secrets in strings and lists of strings, even
+    if secrets overlap
+    """
+    # pylint: disable=protected-access
+    mocker.patch("csspin.secrets", csspin._SecretSet())
+    assert csspin.obfuscate("nothing to hide") == "nothing to hide"
+    assert csspin.obfuscate(("a", "b")) == ["a", "b"]
+
+    csspin.secrets.update(("abc", "abcdef", ""))
+    assert csspin.obfuscate("xxabcdefyy abc") == "xx*******yy *******"
+    assert csspin.obfuscate(["1abc", "2"]) == ["1*******", "2"]
+
+    # Changes to the set of secrets are picked up
+    csspin.secrets.add("yy")
+    assert csspin.obfuscate("abcdefyy") == "**************"
+    csspin.secrets.clear()
+    assert csspin.obfuscate("abcdefyy") == "abcdefyy"
+
+
+def test_secret_masker(mocker: MockerFixture) -> None:
+    """
+    csspin.SecretMasker masks secrets in streamed text, even if they are split
+    across chunks
+    """
+    # pylint: disable=protected-access
+    mocker.patch("csspin.secrets", csspin._SecretSet(("abc", "abcdef")))
+    text = "1abcdef2abc3ab"
+    for size in range(1, len(text) + 1):
+        masker = csspin.SecretMasker()
+        chunks = [text[i : i + size] for i in range(0, len(text), size)]  # noqa: E203
+        out = "".join(masker.feed(chunk) for chunk in chunks) + masker.flush()
+        assert out == "1*******2*******3ab", f"{size=}"
+
+
 def test_directory_changer(
     tmp_path: PathlibPath,
     cfg: ConfigTree,
@@ -200,6 +240,29 @@ def test_rmtree_file(tmp_path: PathlibPath) -> None:
     assert not csspin.exists(tmp_file)
 
 
+def test_rmtree_background(tmp_path: PathlibPath, mocker: MockerFixture) -> None:
+    """csspin.rmtree moves directories out of the way and deletes them in
+    the background, or synchronously if they can't be moved"""
+    xxx = tmp_path / "xxx"
+    csspin.mkdir(xxx / "sub")
+    # Left behind by a deleter that was killed
+    csspin.mkdir(tmp_path / ".xxx.0badf00d.trash" / "sub")
+    csspin.rmtree(xxx, background=True)
+    assert not csspin.exists(xxx)
+    for _ in range(100):
+        if not os.listdir(tmp_path):
+            break
+        time.sleep(0.1)
+    assert not os.listdir(tmp_path)
+
+    csspin.mkdir(xxx / "sub")
+    mocker.patch("path.Path.rename", side_effect=OSError)
+    popen = mocker.patch("subprocess.Popen")
+    csspin.rmtree(xxx, background=True)
+    assert not csspin.exists(xxx)
+    assert not popen.called
+
+
 def test_mv(tmp_path: PathlibPath) -> None:
     """csspin.mv is able to move and rename files and directories"""
     from tempfile import mktemp
@@ -251,6 +314,63 @@ def test_copy(tmp_path: PathlibPath) -> None:
     assert (target_dir / "directory" / "file.txt").is_file()
 
 
+@pytest.mark.parametrize("mode", ("auto", "copy", "reflink", "hardlink"))
+def test_copy_modes(tmp_path: PathlibPath, mode: str) -> None:
+    """csspin.copy copies trees in any mode, falling back to a regular copy
+    where the mode is not supported"""
+    tmp_path = PathlibPath(tmp_path)
+    source_dir = tmp_path / "directory"
+    for i in range(20):
+        (subdir := source_dir / f"sub{i % 3}").mkdir(parents=True, exist_ok=True)
+        (subdir / f"file{i}.txt").write_text(f"content {i}")
+    target_dir = tmp_path / "target"
+    target_dir.mkdir()
+
+    csspin.copy(source_dir, target_dir, mode=mode, jobs=4)
+    for source in source_dir.rglob("*.txt"):
+        target = target_dir / "directory" / source.relative_to(source_dir)
+        assert target.read_text() == source.read_text()
+        assert target.stat().st_mtime == source.stat().st_mtime
+        assert (target.stat().st_ino == source.stat().st_ino) == (mode == "hardlink")
+
+    csspin.copy(source_dir / "sub0" / "file0.txt", target_dir, mode=mode)
+    assert (target_dir / "file0.txt").read_text() == "content 0"
+
+    with pytest.raises(click.Abort):
+        csspin.copy(source_dir, target_dir, mode="teleport")
+
+
+@pytest.mark.parametrize("mode", ("auto", "copy", "reflink", "hardlink"))
+def test_copy_onto_itself(tmp_path: PathlibPath, mode: str) -> None:
+    """csspin.copy refuses to copy a file onto itself or a hard link of
+    itself"""
+    source = PathlibPath(tmp_path) / "source.txt"
+    source.write_text("content")
+    link = PathlibPath(tmp_path) / "link.txt"
+    os.link(source, link)
+    for target in (source, link):
+        with pytest.raises(shutil.SameFileError):
+            csspin.copy(source, target, mode=mode)
+        assert source.read_text() == "content"
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "copy_file_range"), reason="copy_file_range is not available"
+)
+def test_copy_replaces_links(tmp_path: PathlibPath) -> None:
+    """csspin.copy replaces a target that is a hard link, instead of writing
+    through it"""
+    source = PathlibPath(tmp_path) / "source.txt"
+    source.write_text("content")
+    link = PathlibPath(tmp_path) / "link.txt"
+    os.link(source, link)
+    other = PathlibPath(tmp_path) / "other.txt"
+    other.write_text("other")
+    csspin.copy(other, link, mode="auto")
+    assert link.read_text() == "other"
+    assert source.read_text() == "content"
+
+
 def test_die() -> None:
     """csspin.die will raise click.Abort"""
     with pytest.raises(click.Abort, match="You shall not pass!"):
@@ -336,6 +456,166 @@ def test_backtick(mocker: MockerFixture) -> None:
     csspin.sh.assert_called_with("hostname", stdout=-1)
 
 
+def test_backtick_cache(
+    cfg: ConfigTree,
+    mocker: MockerFixture,
+    monkeypatch: pytest.MonkeyPatch,
+    tmp_path: Path,
+) -> None:
+    """
+    csspin.backtick with cache=True runs the command only once, persisting
+    the result in spin_dir until it is invalidated
+    """
+    cfg.spin.spin_dir = tmp_path
+    spy = mocker.spy(csspin, "sh")
+    cmd = (sys.executable, "-c", "print(42)")
+
+    assert csspin.backtick(*cmd, cache=True, silent=True).strip() == "42"
+    assert csspin.backtick(*cmd, cache=True, silent=True).strip() == "42"
+    assert spy.call_count == 1
+    assert (tmp_path / "backtick.cache").exists()
+
+    # Results are also reused by other spin processes
+    mocker.patch("csspin._BACKTICK_CACHE", None)
+    assert csspin.backtick(*cmd, cache=True, silent=True).strip() == "42"
+    assert spy.call_count == 1
+
+    # ... but not if they are too old, or the environment changed
+    csspin.backtick(*cmd, cache=True, ttl=-1, silent=True)
+    assert spy.call_count == 2
+    monkeypatch.setenv("_SPIN_BACKTICK", "1")
+    csspin.backtick(*cmd, cache=True, cache_env=["_SPIN_BACKTICK"], silent=True)
+    csspin.backtick(*cmd, cache=True, cache_env=["_SPIN_BACKTICK"], silent=True)
+    assert spy.call_count == 3
+    monkeypatch.setenv("_SPIN_BACKTICK", "2")
+    csspin.backtick(*cmd, cache=True, cache_env=["_SPIN_BACKTICK"], silent=True)
+    assert spy.call_count == 4
+
+    csspin.clear_backtick_cache()
+    assert not (tmp_path / "backtick.cache").exists()
+    csspin.backtick(*cmd, cache=True, silent=True)
+    assert spy.call_count == 5
+
+
+def test_sh_subprocess_environment_cache(
+    cfg: ConfigTree, mocker: MockerFixture
+) -> None:
+    """
+    csspin.sh enters the subprocess environment only once and reuses the
+    activated environment until the environment changes
+    """
+    entered = 0
+
+    @contextlib.contextmanager
+    def subprocess_environment() -> Generator:
+        nonlocal entered
+        entered += 1
+        os.environ["_SPIN_ACTIVATED"] = "yes"
+        try:
+            yield
+        finally:
+            del os.environ["_SPIN_ACTIVATED"]
+
+    mocker.patch("subprocess.run")
+    cfg.spin.subprocess_environment = subprocess_environment
+    try:
+        for _ in range(3):
+            csspin.sh("abc", silent=True)
+        assert entered == 1
+        assert subprocess.run.call_args.kwargs["env"]["_SPIN_ACTIVATED"] == "yes"  # type: ignore[attr-defined] # noqa: E501
+        assert "_SPIN_ACTIVATED" not in os.environ
+
+        csspin.setenv(_SPIN_CACHE_TEST="1")
+        csspin.sh("abc", silent=True)
+        assert entered == 2
+        assert subprocess.run.call_args.kwargs["env"]["_SPIN_CACHE_TEST"] == "1"  # type: ignore[attr-defined] # noqa: E501
+
+        # Direct modifications of os.environ are detected as well
+        os.environ["_SPIN_CACHE_TEST"] = "2"
+        csspin.sh("abc", env={"_OJDS": "x"}, silent=True)
+        assert entered == 3
+        env = subprocess.run.call_args.kwargs["env"]  # type: ignore[attr-defined]
+        assert (env["_SPIN_CACHE_TEST"], env["_OJDS"]) == ("2", "x")
+
+        csspin.sh("abc", use_subprocess_environment=False, silent=True)
+        assert entered == 3
+        assert subprocess.run.call_args.kwargs["env"] is None  # type: ignore[attr-defined]
+    finally:
+        os.environ.pop("_SPIN_CACHE_TEST", None)
+        cfg.spin.subprocess_environment = contextlib.nullcontext
+
+
+def test_async_sh(cfg: ConfigTree) -> None:
+    """
+    csspin.async_sh runs commands asynchronously while honoring the 'check',
+    'env' and 'input' arguments just like csspin.sh
+    """
+    cpi = asyncio.run(
+        csspin.async_sh(
+            sys.executable,
+            "-c",
+            "import os, sys; print(os.environ['_OJDS'], sys.stdin.read())",
+            env={"_OJDS": "x"},
+            input=b"y",
+            stdout=subprocess.PIPE,
+        )
+    )
+    assert cpi.returncode == 0
+    assert cpi.stdout.split() == [b"x", b"y"]
+
+    fail = (sys.executable, "-c", "import sys; sys.exit(3)")
+    with pytest.raises(click.Abort, match=".*failed with exit status 3.*"):
+        asyncio.run(csspin.async_sh(*fail))
+
+    with mock.patch("csspin.warn") as spin_warn:
+        cpi = asyncio.run(csspin.async_sh(*fail, check=False))
+        assert cpi.returncode == 3
+        assert "failed with exit status 3" in spin_warn.call_args.args[0]
+
+    with pytest.raises(click.Abort, match=".*FileNotFoundTrigger.*"):
+        asyncio.run(csspin.async_sh("FileNotFoundTrigger", shell=False))
+
+
+def test_async_backtick(cfg: ConfigTree) -> None:
+    """csspin.async_backtick returns the output of the command"""
+    output = asyncio.run(
+        csspin.async_backtick(sys.executable, "-c", "print('hello')", silent=True)
+    )
+    assert output.strip() == "hello"
+
+
+def test_gather_sh(cfg: ConfigTree) -> None:
+    """
+    csspin.gather_sh runs all commands, not exceeding the number of concurrent
+    jobs and returning the results in order
+    """
+    running = 0
+    max_running = 0
+    async_sh = csspin.async_sh
+
+    async def counting_async_sh(*cmd: Any, **kwargs: Any) -> Any:
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        try:
+            return await async_sh(*cmd, **kwargs)
+        finally:
+            running -= 1
+
+    with mock.patch("csspin.async_sh", counting_async_sh):
+        results = asyncio.run(
+            csspin.gather_sh(
+                *([sys.executable, "-c", f"print({i})"] for i in range(5)),
+                jobs=2,
+                stdout=subprocess.PIPE,
+            )
+        )
+    assert [cpi.stdout.strip() for cpi in results] == [
+        str(i).encode() for i in range(5)
+    ]
+    assert max_running == 2
+
+
 def test__read_file(minimum_yaml_path: str) -> None:
     """csspin._read_file reads from file and returns the content"""
     # pylint: disable=protected-access
@@ -421,6 +701,21 @@ def test_appendtext(tmp_path: PathlibPath) -> None:
         assert f.read() == content * 2
 
 
+def test_atomic_write(tmp_path: PathlibPath) -> None:
+    """csspin.atomic_write replaces the file only if writing succeeded"""
+    ofile = tmp_path / "test.txt"
+    with csspin.atomic_write(ofile) as f:
+        f.write("Lone line")
+    assert csspin.readtext(ofile) == "Lone line"
+
+    with pytest.raises(ValueError):
+        with csspin.atomic_write(ofile) as f:
+            f.write("Another line")
+            raise ValueError
+    assert csspin.readtext(ofile) == "Lone line"
+    assert os.listdir(tmp_path) == ["test.txt"]
+
+
 def test_persist(tmp_path: PathlibPath) -> None:
     """csspin.persist writes Python object(s) to file"""
     ofile = tmp_path / "test.pkl"
@@ -711,6 +1006,74 @@ def test_is_up_to_date(tmp_path: PathlibPath, mocker: MockerFixture) -> None:
     assert not csspin.is_up_to_date(path2, [path1, path3])
 
 
+def test_is_up_to_date_trees(cfg: ConfigTree, tmp_path: PathlibPath) -> None:
+    """csspin.is_up_to_date compares against the newest file matching
+    directory and glob sources, skipping ignored ones"""
+    tmp_path = PathlibPath(tmp_path)
+    (tmp_path / "src" / "sub").mkdir(parents=True)
+    (tmp_path / "src" / "sub" / "a.py").write_text("a")
+    (tmp_path / "src" / "b.txt").write_text("b")
+    target = tmp_path / "target"
+    target.write_text("target")
+    os.utime(target, ns=(2_000_000_000, 2_000_000_000))
+    os.utime(tmp_path / "src" / "sub" / "a.py", ns=(1_000_000_000, 1_000_000_000))
+    os.utime(tmp_path / "src" / "b.txt", ns=(3_000_000_000, 3_000_000_000))
+
+    with csspin.cd(tmp_path):
+        assert csspin.is_up_to_date("target", ["src/**/*.py"])
+        assert not csspin.is_up_to_date("target", ["src"])
+        assert csspin.is_up_to_date("target", ["src"], ignore=["*.txt"])
+        assert csspin.is_up_to_date("target", ["src/*.nothing"])
+
+        # Scans of trees are cached until the cache is cleared
+        os.utime(tmp_path / "src" / "sub" / "a.py", ns=(4_000_000_000,) * 2)
+        assert csspin.is_up_to_date("target", ["src/**/*.py"])
+        csspin.scanner.clear_cache()
+        assert not csspin.is_up_to_date("target", ["src/**/*.py"])
+
+
+def test_is_up_to_date_literal_paths(cfg: ConfigTree, tmp_path: PathlibPath) -> None:
+    """csspin.is_up_to_date takes existing sources with glob characters in
+    their names literally"""
+    tmp_path = PathlibPath(tmp_path)
+    (tmp_path / "pages" / "[id]").mkdir(parents=True)
+    (tmp_path / "pages" / "[id].js").write_text("page")
+    (tmp_path / "pages" / "i.js").write_text("matched by the glob")
+    (tmp_path / "pages" / "[id]" / "index.js").write_text("index")
+    target = tmp_path / "target"
+    target.write_text("target")
+    os.utime(target, ns=(2_000_000_000,) * 2)
+    os.utime(tmp_path / "pages" / "[id].js", ns=(1_000_000_000,) * 2)
+    os.utime(tmp_path / "pages" / "i.js", ns=(3_000_000_000,) * 2)
+    os.utime(tmp_path / "pages" / "[id]" / "index.js", ns=(1_000_000_000,) * 2)
+
+    with csspin.cd(tmp_path):
+        assert csspin.is_up_to_date("target", ["pages/[id].js", "pages/[id]"])
+        os.utime(tmp_path / "pages" / "[id].js", ns=(3_000_000_000,) * 2)
+        assert not csspin.is_up_to_date("target", ["pages/[id].js"])
+        os.utime(tmp_path / "pages" / "[id]" / "index.js", ns=(3_000_000_000,) * 2)
+        csspin.scanner.clear_cache()
+        assert not csspin.is_up_to_date("target", ["pages/[id]"])
+
+
+def test_build_target_glob_sources(cfg: ConfigTree, tmp_path: PathlibPath) -> None:
+    """csspin.build_target rebuilds targets whose glob sources changed,
+    without requiring rules for the globs"""
+    tmp_path = PathlibPath(tmp_path)
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.txt").write_text("a")
+    cfg["build_rules"] = csspin.config(
+        out=csspin.config(sources=["src/*.txt"], script=["cat src/*.txt > out"])
+    )
+    with csspin.cd(tmp_path):
+        csspin.build_target(cfg, "out")
+        assert (tmp_path / "out").read_text() == "a"
+        os.utime(tmp_path / "out", ns=(1_000_000_000,) * 2)
+        (tmp_path / "src" / "b.txt").write_text("b")
+        csspin.build_target(cfg, "out")
+    assert (tmp_path / "out").read_text() == "ab"
+
+
 def test_run_script(mocker: MockerFixture) -> None:
     """csspin.run_script calls csspin.sh using the expected arguments"""
     mocker.patch("csspin.sh")
@@ -0,0 +1,119 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of the provisioning bundles."""
+
+from __future__ import annotations
+
+import json
+import zipfile
+from pathlib import Path as PathlibPath
+from typing import TYPE_CHECKING
+
+import click
+import pytest
+from conftest import chdir
+
+from csspin import bundle, cli
+
+if TYPE_CHECKING:
+    from click.testing import CliRunner
+    from path import Path
+    from pytest_mock import MockerFixture
+
+    from csspin.tree import ConfigTree
+
+PLUGIN = """
+from csspin import download, exists
+
+def provision(cfg):
+    if not exists("{{spin.spin_dir}}/artifact.txt"):
+        download("{url}", "{{spin.spin_dir}}/artifact.txt")
+"""
+
+
+def test_provision_from_bundle(
+    cli_runner: CliRunner, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """spin provision --from-bundle serves the downloads recorded by spin
+    bundle create without touching the network, even if they were present
+    when the bundle was created"""
+    artifact = tmp_path / "artifact.txt"
+    artifact.write_text("artifact")
+    url = PathlibPath(artifact).as_uri()
+    (tmp_path / "plugins").mkdir()
+    (tmp_path / "plugins" / "bundleplugin.py").write_text(PLUGIN.format(url=url))
+    (tmp_path / "plugins" / "bundleplugin_schema.yaml").write_text(
+        "bundleplugin:\n  type: object\n  help: Test plugin\n"
+    )
+    (tmp_path / "spinfile.yaml").write_text(
+        "plugin_paths: [plugins]\nplugins: [bundleplugin]\n"
+    )
+
+    (tmp_path / ".spin").mkdir()
+    (tmp_path / ".spin" / "artifact.txt").write_text("provisioned")
+
+    with chdir(tmp_path):
+        res = cli_runner.invoke(cli.cli, ["bundle", "create", "-o", "offline.zip"])
+        assert res.exit_code == 0, res.output
+        with zipfile.ZipFile(tmp_path / "offline.zip") as archive:
+            manifest = json.loads(archive.read(bundle.MANIFEST))
+            assert manifest["downloads"] == {url: bundle.member_name(url)}
+            assert archive.read(bundle.member_name(url)) == b"artifact"
+        assert (tmp_path / ".spin" / "artifact.txt").read_text() == "provisioned"
+
+        artifact.unlink()
+        (tmp_path / ".spin" / "artifact.txt").unlink()
+        mocker.patch("csspin.urllib.request.urlopen", side_effect=AssertionError)
+        res = cli_runner.invoke(cli.cli, ["provision", "--from-bundle", "offline.zip"])
+    assert res.exit_code == 0, res.output
+    assert (tmp_path / ".spin" / "artifact.txt").read_text() == "artifact"
+
+
+def test_download_not_in_bundle(cfg: ConfigTree, tmp_path: Path) -> None:
+    """Downloads missing in the bundle fail instead of using the network"""
+    fn = tmp_path / "empty.zip"
+    bundle.write(fn, tmp_path / "wheels", {})
+    with bundle.using(fn), pytest.raises(click.Abort):
+        bundle.restore("https://example.com/missing.tgz", tmp_path / "missing.tgz")
+    assert not bundle.restore(
+        "https://example.com/missing.tgz", tmp_path / "missing.tgz"
+    )
+
+
+def test_corrupt_download(
+    cfg: ConfigTree, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Downloads are verified against their digest when restored from the
+    bundle"""
+    url = "https://example.com/artifact.tgz"
+    (tmp_path / "artifact.tgz").write_bytes(b"artifact")
+    fn = tmp_path / "bundle.zip"
+    bundle.write(fn, tmp_path / "wheels", {url: tmp_path / "artifact.tgz"})
+    with bundle.using(fn):
+        assert bundle.restore(url, tmp_path / "restored.tgz")
+    assert (tmp_path / "restored.tgz").read_bytes() == b"artifact"
+
+    mocker.patch("csspin.bundle.file_digest", return_value="0" * 64)
+    bundle.write(fn, tmp_path / "wheels", {url: tmp_path / "artifact.tgz"})
+    with bundle.using(fn), pytest.raises(click.Abort):
+        bundle.restore(url, tmp_path / "corrupt.tgz")
+    assert not (tmp_path / "corrupt.tgz").exists()
+
+
+def test_install_plugin_packages_from_bundle(
+    cfg: ConfigTree, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """csspin.cli.install_plugin_packages installs from the bundle's wheels
+    instead of the package index"""
+    cfg.spin.spin_dir = tmp_path
+    mocker.patch("csspin.cli.find_plugin_packages", return_value=("csspin-foo",))
+    sh = mocker.patch("csspin.cli.sh")
+    cli.install_plugin_packages(cfg, find_links="/bundle/wheels")
+    args = sh.call_args.args
+    assert "--no-index" in args
+    assert args[args.index("--find-links") + 1] == "/bundle/wheels"
+    assert "--index-url" not in args
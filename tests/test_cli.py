@@ -58,6 +58,12 @@ def test_secret_obfuscation(
     assert interpolated_secret not in res.output
     assert secret_from_configure not in res.output
 
+    for fmt in ("json", "yaml"):
+        res = cli_runner.invoke(cli.cli, [*args, "--dump-format", fmt])
+        assert res.exit_code == 0
+        assert interpolated_secret not in res.output
+        assert secret_from_configure not in res.output
+
 
 def test_cleanup(
     cli_runner: CliRunner,
@@ -366,6 +372,109 @@ def test_load_plugins_into_tree(
         assert "  add subtree builtin" in captured.out
 
 
+def test_plugin_lock(
+    tmp_path: PathlibPath,
+    dummy_yaml_path: str,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    """
+    csspin.cli.load_plugins_into_tree records the discovered plugins in
+    plugins.lock and loads them from there as long as the lock is fresh
+    """
+    import json
+
+    def load() -> ConfigTree:
+        cfg = cli.load_minimal_tree(
+            spinfile=dummy_yaml_path,
+            cwd=os.getcwd(),
+            envbase=tmp_path,
+            verbosity=Verbosity.DEBUG,
+        )
+        cli.load_plugins_into_tree(cfg)
+        return cfg
+
+    lockfile = tmp_path / ".spin" / "plugins.lock"
+    discovered = load()
+    assert "loading plugins from" not in capsys.readouterr().out
+    lock = json.loads(lockfile.read_text())
+    assert [plugin["name"] for plugin in lock["plugins"]] == list(discovered.loaded)
+    assert lock["topo_plugins"] == discovered.spin.topo_plugins
+    dummy = lock["plugins"][-1]
+    assert dummy["schema"].endswith("dummy_schema.yaml")
+    assert dummy["schema_status"] == "ok"
+
+    locked = load()
+    captured = capsys.readouterr()
+    assert f"loading plugins from {lockfile}" in captured.out
+    assert "import plugin csspin_dummy.dummy" in captured.out
+    assert list(locked.loaded) == list(discovered.loaded)
+    assert locked.spin.topo_plugins == discovered.spin.topo_plugins
+    # The schema descriptors are built for each tree
+    assert locked.dummy.schema.properties.keys() == (
+        discovered.dummy.schema.properties.keys()
+    )
+    del locked.dummy["schema"], discovered.dummy["schema"]
+    assert locked.dummy == discovered.dummy
+
+    # A stale lock is ignored and rewritten
+    dummy["file_state"] = [0, 0]
+    lockfile.write_text(json.dumps(lock))
+    load()
+    assert "loading plugins from" not in capsys.readouterr().out
+    assert json.loads(lockfile.read_text())["plugins"][-1]["file_state"] != [0, 0]
+
+
+def test_env_cache(
+    cli_runner: CliRunner,
+    tmp_path: PathlibPath,
+    mocker: MockerFixture,
+    monkeypatch: MonkeyPatch,
+) -> None:
+    """The output of 'spin env' is cached and served without loading the
+    plugins, as long as they didn't change"""
+    (tmp_path / "plugins").mkdir()
+    plugin = tmp_path / "plugins" / "envplugin.py"
+    plugin.write_text(
+        "from csspin import task\n@task()\ndef env():\n    print('export FOO=bar')\n"
+    )
+    (tmp_path / "plugins" / "envplugin_schema.yaml").write_text(
+        "envplugin:\n  type: object\n  help: Test plugin\n"
+    )
+    spinfile = tmp_path / "spinfile.yaml"
+    spinfile.write_text("plugin_paths: [plugins]\nplugins: [envplugin]\n")
+    monkeypatch.setenv("SHELL", "/bin/bash")
+    with chdir(tmp_path):
+        res = cli_runner.invoke(cli.cli, ["env"])
+        assert res.exit_code == 0
+        assert res.output == "export FOO=bar\n"
+        assert (tmp_path / ".spin" / "env-cache" / "bash.json").exists()
+
+        load_plugins = mocker.patch(
+            "csspin.cli.load_plugins_into_tree", side_effect=AssertionError
+        )
+        res = cli_runner.invoke(cli.cli, ["env"])
+        assert res.exit_code == 0
+        assert res.output == "export FOO=bar\n"
+        load_plugins.assert_not_called()
+
+        # Changing a plugin invalidates the cache
+        plugin.write_text(plugin.read_text() + "\n")
+        mocker.stopall()
+        load_plugins = mocker.spy(cli, "load_plugins_into_tree")
+        res = cli_runner.invoke(cli.cli, ["env"])
+        assert res.output == "export FOO=bar\n"
+        load_plugins.assert_called_once()
+
+        # So does a different environment, but not a different directory
+        monkeypatch.setenv("PWD", "/elsewhere")
+        cli_runner.invoke(cli.cli, ["env"])
+        load_plugins.assert_called_once()
+        monkeypatch.setenv("SPIN_TEST_ENV_CACHE", "1")
+        res = cli_runner.invoke(cli.cli, ["env"])
+        assert res.output == "export FOO=bar\n"
+        assert load_plugins.call_count == 2
+
+
 def test_plugin_directives(
     monkeypatch: MonkeyPatch,
     dummy_yaml_path: str,
@@ -0,0 +1,59 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of the plugin dependency graph."""
+
+import pytest
+from click import Abort
+
+from csspin import graph
+from csspin.tree import KeyInfo
+
+
+def test_order_is_deterministic() -> None:
+    """csspin.graph.PluginGraph orders dependencies first, using the load
+    order among independent plugins"""
+    edges = {
+        "app": ["venv"],
+        "venv": ["python"],
+        "python": [],
+        "lint": ["python"],
+        "docs": [],
+    }
+    plugin_graph = graph.PluginGraph(edges.keys(), edges)
+    assert plugin_graph.order() == ["python", "venv", "app", "lint", "docs"]
+    assert plugin_graph.levels() == [["python", "docs"], ["venv", "lint"], ["app"]]
+
+    # Same graph, same fingerprint, independent of the order of the dict
+    reordered = dict(reversed(edges.items()))
+    assert (
+        graph.PluginGraph(edges.keys(), reordered).fingerprint()
+        == plugin_graph.fingerprint()
+    )
+    assert (
+        graph.PluginGraph(reversed(edges), edges).fingerprint()
+        != plugin_graph.fingerprint()
+    )
+
+
+def test_cycle_is_reported() -> None:
+    """csspin.graph.PluginGraph reports the plugins on a cycle together with
+    their requires.spin declarations"""
+    edges = {"other": [], "foo": ["bar"], "bar": ["baz"], "baz": ["foo"]}
+    declarations = {"foo": KeyInfo("foo_schema.yaml", 7)}
+    plugin_graph = graph.PluginGraph(edges.keys(), edges, declarations)
+
+    assert plugin_graph.find_cycle() == ["foo", "bar", "baz", "foo"]
+    assert graph.PluginGraph(["a", "b"], {"a": ["b"]}).find_cycle() == []
+
+    with pytest.raises(Abort) as exc:
+        plugin_graph.order()
+    msg = exc.value.args[0][0]
+    assert msg.startswith(
+        "dependency graph has at least one cycle: foo -> bar -> baz -> foo"
+    )
+    assert "foo requires bar (foo_schema.yaml:7)" in msg
+    assert "baz requires foo" in msg
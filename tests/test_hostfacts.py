@@ -0,0 +1,55 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of the host facts."""
+
+from __future__ import annotations
+
+import json
+from typing import TYPE_CHECKING
+
+from csspin import hostfacts
+from csspin.builtin import get_distro
+
+if TYPE_CHECKING:
+    from path import Path
+    from pytest import MonkeyPatch
+    from pytest_mock import MockerFixture
+
+    from csspin.tree import ConfigTree
+
+
+def test_host_facts_are_persisted(
+    tmp_path: Path, monkeypatch: MonkeyPatch, mocker: MockerFixture
+) -> None:
+    """csspin.hostfacts.host_facts computes the facts once and recomputes
+    them only if the host key changed"""
+    monkeypatch.setenv("SPIN_DATA", str(tmp_path))
+    monkeypatch.setattr(hostfacts, "_FACTS", None)
+    compute = mocker.spy(hostfacts, "compute")
+
+    facts = hostfacts.host_facts()
+    assert facts["cpus"] >= 1
+    stored = json.loads((tmp_path / "host-facts.json").read_text())
+    assert stored == {"key": hostfacts.host_key(), "facts": facts}
+
+    # Another process reads the stored facts
+    monkeypatch.setattr(hostfacts, "_FACTS", None)
+    assert hostfacts.host_facts() == facts
+    assert compute.call_count == 1
+
+    # e.g. after a reboot or a kernel update
+    monkeypatch.setattr(hostfacts, "_FACTS", None)
+    mocker.patch("csspin.hostfacts.host_key", return_value=["rebooted"])
+    assert hostfacts.host_facts() == facts
+    assert compute.call_count == 2
+
+
+def test_host_facts_in_tree(cfg: ConfigTree) -> None:
+    """The host facts are available in the tree and used by get_distro"""
+    facts = hostfacts.host_facts()
+    assert cfg.host.cpus == facts["cpus"]
+    assert get_distro()["id"] == cfg.host.distro == facts["distro"]
@@ -0,0 +1,78 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of the project and plugin locks."""
+
+from __future__ import annotations
+
+import os
+import sys
+from typing import TYPE_CHECKING
+
+import click
+import pytest
+
+from csspin import locking
+
+if TYPE_CHECKING:
+    from path import Path
+
+    from csspin.tree import ConfigTree
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="Windows only supports exclusive locks"
+)
+
+
+def test_shared_and_exclusive_locks(tmp_path: Path) -> None:
+    """Shared locks can be held at the same time, exclusive ones can't"""
+    fn = tmp_path / "test.lock"
+    first = locking.FileLock(fn, exclusive=False)
+    second = locking.FileLock(fn, exclusive=False)
+    exclusive = locking.FileLock(fn)
+    assert first.try_acquire()
+    assert second.try_acquire()
+    assert not exclusive.try_acquire()
+    first.release()
+    second.release()
+
+    assert exclusive.try_acquire()
+    assert not first.try_acquire()
+    assert str(os.getpid()) in exclusive.holder()
+    exclusive.release()
+    assert first.try_acquire()
+    first.release()
+
+
+def test_locked_timeout(cfg: ConfigTree, tmp_path: Path) -> None:
+    """Waiting for a lock gives up after the timeout, naming the holder"""
+    fn = tmp_path / "test.lock"
+    with locking.locked(fn, True, 1, "the test lock"):
+        with pytest.raises(click.Abort):
+            with locking.locked(fn, False, 0.2, "the test lock"):
+                pass
+    with locking.locked(fn, False, 0.2, "the test lock"):
+        pass
+
+
+def test_project_lock(cfg: ConfigTree, tmp_path: Path) -> None:
+    """The project lock is not taken again by subprocesses of its holder"""
+    cfg.spin.spin_dir = tmp_path / ".spin"
+    cfg.spin.lock_timeout = 0.2
+    # Not provisioned, nothing to guard
+    with locking.project_lock(cfg, exclusive=False):
+        assert locking.LOCKED_PROJECT not in os.environ
+
+    with locking.project_lock(cfg, exclusive=True):
+        assert os.environ[locking.LOCKED_PROJECT] == cfg.spin.spin_dir
+        # e.g. 'spin provision' running in a task of the holder
+        with locking.project_lock(cfg, exclusive=True):
+            pass
+        del os.environ[locking.LOCKED_PROJECT]
+        with pytest.raises(click.Abort):
+            with locking.project_lock(cfg, exclusive=False):
+                pass
+    assert locking.LOCKED_PROJECT not in os.environ
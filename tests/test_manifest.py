@@ -0,0 +1,137 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of the command manifest."""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import pytest
+from conftest import chdir
+
+from csspin import cli
+
+if TYPE_CHECKING:
+    from click.testing import CliRunner
+    from path import Path
+    from pytest_mock import MockerFixture
+
+PLUGIN = '''
+import click
+from csspin import group, option, task
+
+@task(aliases=["mft"])
+def manifesttask(
+    cfg,
+    level: option("--level", type=click.Choice(["low", "high"]), help="Level"),  # noqa: F722
+    args,
+):
+    """Run the manifest task."""
+    print("RUN", level, args)
+
+@group()
+def manifestgroup(ctx):
+    """Group of the manifest tests."""
+
+@manifestgroup.task()
+def subtask(cfg):
+    """Run the subtask."""
+'''
+
+
+@pytest.fixture()
+def project(tmp_path: Path, cli_runner: CliRunner) -> Path:
+    """A project using a local plugin, whose manifest has been written."""
+    (tmp_path / "plugins").mkdir()
+    (tmp_path / "plugins" / "manifestplugin.py").write_text(PLUGIN)
+    (tmp_path / "plugins" / "manifestplugin_schema.yaml").write_text(
+        "manifestplugin:\n  type: object\n  help: Test plugin\n"
+        "  properties:\n    level:\n      type: str\n"
+    )
+    (tmp_path / "spinfile.yaml").write_text(
+        "plugin_paths: [plugins]\nplugins: [manifestplugin]\n"
+    )
+    with chdir(tmp_path):
+        assert cli_runner.invoke(cli.cli, ["--help"]).exit_code == 0
+    assert (tmp_path / ".spin" / "commands.json").exists()
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "args",
+    (
+        ["--help"],
+        ["manifesttask", "--help"],
+        ["mft", "--help"],
+        ["manifestgroup", "subtask", "--help"],
+    ),
+)
+def test_help_from_manifest(
+    project: Path, cli_runner: CliRunner, mocker: MockerFixture, args: list
+) -> None:
+    """The help is served from the command manifest without loading the
+    plugins"""
+    with chdir(project):
+        expected = cli_runner.invoke(cli.cli, args)
+        (project / ".spin" / "commands.json").unlink()
+        assert cli_runner.invoke(cli.cli, args).output == expected.output
+
+        load_plugins = mocker.patch(
+            "csspin.cli.load_plugins_into_tree", side_effect=AssertionError
+        )
+        res = cli_runner.invoke(cli.cli, args)
+    assert res.exit_code == 0
+    assert res.output == expected.output
+    load_plugins.assert_not_called()
+
+
+def test_tasks_are_not_run_from_manifest(project: Path, cli_runner: CliRunner) -> None:
+    """Command lines that ask for more than help load the plugins"""
+    with chdir(project):
+        res = cli_runner.invoke(cli.cli, ["manifesttask", "--", "--help"])
+    assert res.exit_code == 0
+    assert "RUN None ('--help',)" in res.output
+
+
+def test_help_of_commands_run_by_tasks(
+    project: Path, cli_runner: CliRunner, mocker: MockerFixture
+) -> None:
+    """--help following the arguments of a task is passed on to the task,
+    instead of showing the help of the task from the manifest"""
+    sh = mocker.patch("csspin.builtin.sh")
+    with chdir(project):
+        res = cli_runner.invoke(cli.cli, ["run", "python", "--help"])
+    assert res.exit_code == 0, res.output
+    assert "Run a shell command" not in res.output
+    sh.assert_called_once_with("python --help", shell=True)
+
+
+def test_completion_from_manifest(
+    project: Path, cli_runner: CliRunner, mocker: MockerFixture
+) -> None:
+    """The shell completion is served from the command manifest, including
+    the names of properties"""
+    mocker.patch("csspin.cli.load_plugins_into_tree", side_effect=AssertionError)
+
+    def complete(words: str) -> list:
+        with chdir(project):
+            res = cli_runner.invoke(
+                cli.cli,
+                prog_name="spin",
+                env={
+                    "_SPIN_COMPLETE": "bash_complete",
+                    "COMP_WORDS": words,
+                    "COMP_CWORD": str(len(words.split()) - (not words.endswith(" "))),
+                },
+            )
+        assert res.exit_code == 0
+        return [line.split(",", 1)[1] for line in res.output.splitlines()]
+
+    assert complete("spin manifest") == ["manifestgroup", "manifesttask"]
+    assert complete("spin manifestgroup ") == ["subtask"]
+    assert complete("spin mft --level ") == ["low", "high"]
+    assert complete("spin -p manifestplugin.l") == ["manifestplugin.level="]
@@ -0,0 +1,91 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of the shared plugin store."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+import shutil
+import zipfile
+from typing import TYPE_CHECKING
+
+from csspin import cli, pluginstore
+
+if TYPE_CHECKING:
+    from path import Path
+    from pytest_mock import MockerFixture
+
+    from csspin.tree import ConfigTree
+
+
+def make_wheel(directory: Path) -> Path:
+    """Create a minimal wheel of the distribution 'storeplugin'."""
+    files = {
+        "storeplugin.py": "VALUE = 42\n",
+        "storeplugin-1.0.dist-info/METADATA": (
+            "Metadata-Version: 2.1\nName: storeplugin\nVersion: 1.0\n"
+        ),
+        "storeplugin-1.0.dist-info/WHEEL": (
+            "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\n"
+            "Tag: py3-none-any\n"
+        ),
+    }
+    record = []
+    for name, content in files.items():
+        digest = base64.urlsafe_b64encode(hashlib.sha256(content.encode()).digest())
+        record.append(f"{name},sha256={digest.decode().rstrip('=')},{len(content)}")
+    record.append("storeplugin-1.0.dist-info/RECORD,,")
+    files["storeplugin-1.0.dist-info/RECORD"] = "\n".join(record) + "\n"
+
+    directory.mkdir()
+    wheel = directory / "storeplugin-1.0-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return wheel
+
+
+def test_shared_plugin_store(
+    cfg: ConfigTree, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """Plugin packages are installed once into the shared store, referenced
+    by the projects using them and collected when no project uses them"""
+    wheels = tmp_path / "wheels"
+    wheel = make_wheel(wheels)
+    mocker.patch("csspin.cli.find_plugin_packages", return_value=(str(wheel),))
+    install_entry = mocker.spy(pluginstore, "_install_entry")
+    cfg.spin.data = tmp_path / "data"
+    cfg.spin.shared_plugin_store = True
+
+    projects = [tmp_path / "a" / ".spin", tmp_path / "b" / ".spin"]
+    for spin_dir in projects:
+        cfg.spin.spin_dir = spin_dir
+        cli.install_plugin_packages(cfg, find_links=wheels)
+    assert install_entry.call_count == 1
+
+    store = pluginstore.store_dir(cfg)
+    (entry,) = [name for name in os.listdir(store) if name != "refs"]
+    assert entry.startswith("storeplugin-1.0-")
+    assert (store / entry / "storeplugin.py").is_file()
+    for spin_dir in projects:
+        pth = spin_dir / "plugins" / pluginstore.PTH
+        assert pth.read_text() == f"{store / entry}\n"
+        assert not (spin_dir / "plugins" / "storeplugin.py").exists()
+
+    # Project b still uses the entry
+    cfg.spin.spin_dir = projects[0]
+    pluginstore.unregister(cfg)
+    pluginstore.collect_garbage(cfg)
+    assert (store / entry).is_dir()
+
+    # Project b is gone
+    shutil.rmtree(projects[1])
+    pluginstore.collect_garbage(cfg)
+    assert not (store / entry).exists()
+    assert not os.listdir(store / "refs")
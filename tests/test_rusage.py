@@ -0,0 +1,63 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of the resource accounting of
+commands."""
+
+from __future__ import annotations
+
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+import csspin
+from csspin import rusage
+
+if TYPE_CHECKING:
+    from pytest_mock import MockerFixture
+
+    from csspin.tree import ConfigTree
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="resource is not available on Windows"
+)
+
+
+def test_sh_rusage(
+    cfg: ConfigTree, mocker: MockerFixture, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """sh attaches the resources used by the command to its result and
+    accounts them to the current plugin hook"""
+    # pylint: disable=protected-access
+    monkeypatch.setattr(rusage, "_TOTALS", {})
+    burn = (
+        "import time\nt = time.process_time()\nwhile time.process_time() - t < 0.2:"
+        " pass"
+    )
+    with rusage.hook("plugin.provision"):
+        cpi = csspin.sh(sys.executable, "-c", burn)
+        csspin.sh(sys.executable, "-c", "raise SystemExit(1)", check=False)
+    usage = cpi.rusage  # type: ignore[union-attr]
+    assert isinstance(usage, rusage.ResourceUsage)
+    assert usage.user + usage.system >= 0.2
+
+    total, count = rusage._TOTALS["plugin.provision"]
+    assert count == 2
+    assert total.user >= usage.user
+
+    info = mocker.Mock()
+    rusage.report(info)
+    assert "plugin.provision (2 commands)" in info.call_args_list[1].args[0]
+    assert not rusage._TOTALS
+
+
+def test_add() -> None:
+    """Usages are summed up, keeping the largest known peak memory"""
+    a = rusage.ResourceUsage(1.0, 2.0, None, 1, 2, 3, 4)
+    b = rusage.ResourceUsage(0.5, 0.5, 100, 1, 1, 1, 1)
+    assert rusage.add(a, b) == (1.5, 2.5, 100, 2, 3, 4, 5)
+    assert rusage.add(a, a).maxrss is None
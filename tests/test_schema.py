@@ -72,6 +72,28 @@ def test_descriptor() -> None:
     assert "test" not in DESCRIPTOR_REGISTRY
 
 
+def test_descriptor_extra_keys() -> None:
+    """Descriptors store the common schema keys in slots and others in a
+    dictionary created on demand"""
+    from copy import deepcopy
+
+    desc = schema.build_descriptor(config(type="str", help="Help", default="x"))
+    assert desc.help == "Help"
+    assert desc._extra is None
+    with raises(AttributeError):
+        desc.enum  # pylint: disable=pointless-statement
+
+    desc.enum = ["x", "y"]
+    assert desc.enum == ["x", "y"]
+    assert desc._extra == {"enum": ["x", "y"]}
+    assert not hasattr(desc, "__dict__")
+
+    copy = deepcopy(desc)
+    assert copy.type == ["str"]
+    assert copy.default == "x"
+    assert copy.enum == ["x", "y"]
+
+
 def test_build_descriptor() -> None:
     """Function testing the build of a descriptor to generate a schema."""
 
@@ -0,0 +1,71 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing tests that load synthetic projects."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+from csspin import toporun
+from csspin.cli import finalize_cfg_tree, load_minimal_tree, load_plugins_into_tree
+
+if TYPE_CHECKING:
+    from typing import Callable
+
+    from pytest import MonkeyPatch
+
+
+def test_synthetic_project(
+    synthetic_project: Callable, monkeypatch: MonkeyPatch
+) -> None:
+    """A synthetic project loads with its global.yaml, provisions plugins
+    after their dependencies and resolves its interpolation chains"""
+    project = synthetic_project(width=3, depth=3, fanout=2, keys=6, chain=3)
+    monkeypatch.setenv("SPIN_CONFIG", project.config_dir)
+    monkeypatch.delenv("SPIN_DISABLE_GLOBAL_YAML", raising=False)
+    cwd = os.getcwd()
+    try:
+        cfg = load_minimal_tree(project.spinfile, cwd=project.root)
+        load_plugins_into_tree(cfg)
+        finalize_cfg_tree(cfg)
+        toporun(cfg, "provision")
+    finally:
+        os.chdir(cwd)
+
+    with open(cfg.spin.spin_dir / "provision.log", encoding="utf-8") as f:
+        provisioned = f.read().split()
+    assert sorted(provisioned) == sorted(
+        spec.split(".")[-1] for spec in project.plugins
+    )
+    for spec, deps in project.requires.items():
+        for dep in deps:
+            assert provisioned.index(dep.split(".")[-1]) < provisioned.index(
+                spec.split(".")[-1]
+            )
+
+    # l1_0.k2 -> l1_0.k1 -> l1_0.k0 -> l0_0.k0, which global.yaml doesn't
+    # override, as it only sets the top level.
+    assert cfg.l1_0.k2 == f"{cfg.spin.data}/l0_0/l1_0/1/2"
+    assert cfg.l2_0.k0 == f"{cfg.spin.data}/global/l2_0"
+    assert cfg.project.user == "synthetic"
+    assert cfg.project.k2 == f"{cfg.l2_0.k5}/1/2"
+
+
+@pytest.mark.slow()
+def test_synthetic_project_at_scale(synthetic_project: Callable) -> None:
+    """spin loads and dumps a project with 50 plugins and 5000 settings"""
+    project = synthetic_project(width=10, depth=5, keys=80, project_keys=1000)
+    output = subprocess.check_output(
+        [sys.executable, "-m", "csspin", "-C", project.root, "--dump", "l4-9"],
+        encoding="utf-8",
+    )
+    assert "l4_9" in output
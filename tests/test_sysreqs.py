@@ -0,0 +1,154 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of the static system requirements."""
+
+from __future__ import annotations
+
+import sys
+import zipfile
+from typing import TYPE_CHECKING
+
+from conftest import chdir
+
+from csspin import cli, sysreqs
+
+if TYPE_CHECKING:
+    from click.testing import CliRunner
+    from path import Path
+    from pytest_mock import MockerFixture
+
+    from csspin.tree import ConfigTree
+
+
+def schema(name: str, system: str | None, spin: str = "[]") -> str:
+    """Return a plugin schema declaring `system` as system requirements."""
+    text = (
+        f"{name}:\n"
+        "  type: object\n"
+        "  help: Test plugin\n"
+        "  properties:\n"
+        "    requires:\n"
+        "      type: object\n"
+        "      properties:\n"
+        "        spin:\n"
+        "          type: list\n"
+        f"          default: {spin}\n"
+    )
+    if system is not None:
+        text += (
+            f"        system:\n          type: object\n          default: {system}\n"
+        )
+    return text
+
+
+def test_system_provision_without_plugins(
+    cli_runner: CliRunner, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """spin system-provision reads the system requirements of plugins from
+    their schema files without installing or importing them"""
+    plugins = tmp_path / "plugins"
+    plugins.mkdir()
+    for name, system, spin in (
+        ("sysa", "{debian: {apt: [liba]}}", "[sysb]"),
+        ("sysb", "{debian: {apt: [libb]}, windows: {choco: [b]}}", "[]"),
+    ):
+        (plugins / f"{name}.py").write_text("raise ImportError\n")
+        (plugins / f"{name}_schema.yaml").write_text(schema(name, system, spin))
+    (tmp_path / "spinfile.yaml").write_text(
+        "plugin_paths: [plugins]\nplugins: [sysa]\n"
+        "system_requirements:\n  debian:\n    apt: [curl]\n"
+    )
+    mocker.patch("csspin.builtin.install_plugin_packages", side_effect=AssertionError)
+    mocker.patch("csspin.builtin.load_plugins_into_tree", side_effect=AssertionError)
+
+    with chdir(tmp_path):
+        res = cli_runner.invoke(cli.cli, ["system-provision", "debian"])
+    assert res.exit_code == 0, res.output
+    assert "apt install -y libb liba curl" in res.output
+    assert "sysa" not in sys.modules
+
+
+def test_parse_requires() -> None:
+    """csspin.sysreqs.parse_requires only accepts requirements the schema
+    declares explicitly"""
+    declared = schema("sysa", "{debian: {apt: [liba]}}", "[sysb]")
+    assert sysreqs.parse_requires("sysa", declared) == (
+        ["sysb"],
+        {"debian": {"apt": ["liba"]}},
+    )
+    assert sysreqs.parse_requires("sysa", schema("sysa", None)) is None
+    no_default = schema("sysa", "{}").replace("          default: {}\n", "")
+    assert sysreqs.parse_requires("sysa", no_default) is None
+    no_spin = declared.replace(
+        "        spin:\n          type: list\n          default: [sysb]\n", ""
+    )
+    assert sysreqs.parse_requires("sysa", no_spin) is None
+
+
+def test_static_requirements_need_all_plugins(
+    cfg: ConfigTree, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """csspin.sysreqs.static_requirements gives up, if a plugin doesn't
+    publish its system requirements"""
+    mocker.patch("csspin.sysreqs.download_wheels", return_value=False)
+    mocker.patch("csspin.sysreqs.pluginlock.read_lock", return_value=None)
+    (tmp_path / "sysa_schema.yaml").write_text(
+        schema("sysa", "{debian: {apt: [liba]}}", "[sysb]")
+    )
+    (tmp_path / "sysb_schema.yaml").write_text(schema("sysb", None))
+    mocker.patch("csspin.sysreqs.search_path", return_value=[str(tmp_path)])
+
+    assert sysreqs.static_requirements(cfg, ["sysa"]) is None
+    (tmp_path / "sysb_schema.yaml").write_text(schema("sysb", "{}"))
+    assert sysreqs.static_requirements(cfg, ["sysa"]) == {
+        "sysb": {},
+        "sysa": {"debian": {"apt": ["liba"]}},
+    }
+
+
+def test_static_requirements_from_wheels(
+    cfg: ConfigTree, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    """csspin.sysreqs.static_requirements reads the schema files from the
+    downloaded wheels of plugin packages"""
+    mocker.patch("csspin.sysreqs.pluginlock.read_lock", return_value=None)
+    mocker.patch("csspin.sysreqs.search_path", return_value=[])
+    wheels = tmp_path / "wheels"
+    mocker.patch("csspin.sysreqs.wheel_dir", return_value=wheels)
+
+    def download(_: ConfigTree) -> bool:
+        wheels.makedirs_p()
+        with zipfile.ZipFile(wheels / "csspin_sys-1.0-py3-none-any.whl", "w") as zf:
+            zf.writestr("csspin_sys/__init__.py", "")
+            zf.writestr(
+                "csspin_sys/sys_schema.yaml",
+                schema("sys", "{debian: {apt: [libsys]}}"),
+            )
+        return True
+
+    download_wheels = mocker.patch(
+        "csspin.sysreqs.download_wheels", side_effect=download
+    )
+    expected = {"csspin_sys.sys": {"debian": {"apt": ["libsys"]}}}
+    assert sysreqs.static_requirements(cfg, ["csspin_sys.sys"]) == expected
+    assert sysreqs.static_requirements(cfg, ["csspin_sys.sys"]) == expected
+    download_wheels.assert_called_once()
+
+
+def test_search_path(cfg: ConfigTree, tmp_path: Path) -> None:
+    """csspin.sysreqs.search_path covers the plugin paths and the plugin
+    directory including its .pth files, but not spin's sys.path"""
+    store = tmp_path / "store"
+    store.mkdir()
+    cfg.spin.spin_dir = tmp_path
+    cfg.plugin_paths = ["plugins"]
+    (tmp_path / "plugins").mkdir()
+    (tmp_path / "plugins" / "store.pth").write_text(f"{store}\nimport os\n")
+
+    paths = sysreqs.search_path(cfg)
+    assert paths[1:] == [str(tmp_path / "plugins"), str(store)]
+    assert not set(paths) & set(sys.path)
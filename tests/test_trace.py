@@ -0,0 +1,75 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of the trace log of commands."""
+
+from __future__ import annotations
+
+import asyncio
+import subprocess
+import sys
+from typing import TYPE_CHECKING
+
+import pytest
+
+import csspin
+from csspin import trace
+
+if TYPE_CHECKING:
+    from typing import Generator
+
+    from path import Path
+    from pytest_mock import MockerFixture
+
+    from csspin.tree import ConfigTree
+
+
+@pytest.fixture
+def traced(
+    cfg: ConfigTree, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Generator[ConfigTree, None, None]:
+    monkeypatch.setenv(trace.ENV, "1")
+    monkeypatch.setattr(trace, "_FILE", None)
+    cfg.spin.spin_dir = tmp_path / ".spin"
+    yield cfg
+    if trace._FILE is not None:  # pylint: disable=protected-access
+        trace._FILE.close()  # pylint: disable=protected-access
+
+
+def test_trace_sh(traced: ConfigTree, mocker: MockerFixture) -> None:
+    """Commands run by sh and async_sh are recorded with their results and
+    masked secrets"""
+    # pylint: disable=protected-access
+    mocker.patch("csspin.secrets", csspin._SecretSet(("s3cr3t",)))
+    python = sys.executable
+    csspin.sh(python, "-c", "print('s3cr3t')", stdout=subprocess.PIPE)
+    csspin.sh(python, "-c", "raise SystemExit(3)", check=False)
+    asyncio.run(csspin.async_sh(python, "-c", "pass"))
+
+    (log,) = trace.logs(traced)
+    first, second, third = trace.read([log])
+    assert "s3cr3t" not in first["cmd"]
+    assert first["returncode"] == 0
+    assert first["output"] == len("s3cr3t\n")
+    assert first["duration"] > 0
+    assert second["returncode"] == 3
+    assert second["output"] is None
+    assert third["returncode"] == 0
+
+    by_cmd = trace.aggregate([first, second, third], "cmd")
+    assert len(by_cmd) == 3
+    assert sum(row["failed"] for row in by_cmd) == 1
+    assert "count" in trace.format_table(by_cmd, "cmd")
+
+
+def test_trace_disabled(
+    cfg: ConfigTree, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Nothing is recorded without SPIN_TRACE"""
+    monkeypatch.delenv(trace.ENV, raising=False)
+    cfg.spin.spin_dir = tmp_path / ".spin"
+    csspin.sh(sys.executable, "-c", "pass")
+    assert not trace.logs(cfg)
@@ -194,6 +194,89 @@ def test_tree_keyname() -> None:
     assert tree.tree_keyname(config, "subtree1") == "subtree1"
 
 
+def test_tree_dump_formats(mocker) -> None:  # type: ignore[no-untyped-def]
+    """tree_dump_lines emits text, json and yaml with optional selection"""
+    import json
+
+    import ruamel.yaml
+
+    import csspin
+
+    mocker.patch("csspin.secrets", csspin._SecretSet({"s3cr3t"}))
+    config = tree.ConfigTree(
+        sub=tree.ConfigTree(
+            foo="bar",
+            token="s3cr3t",
+            items=[tree.ConfigTree(name="one", nested=tree.ConfigTree(x=1))],
+        ),
+        other=1,
+    )
+
+    lines = list(tree.tree_dump_lines(config, select="sub.items"))
+    assert lines[0].endswith("|items:")
+    assert lines[1].endswith("|  - name: 'one'")
+    assert lines[2].endswith("|    nested:")
+    assert lines[3].endswith("|      x: 1")
+    # The location column is aligned for all lines
+    assert len({line.index("|") for line in lines}) == 1
+
+    records = json.loads(tree.tree_dump(config, "json"))
+    assert [record["key"] for record in records] == [
+        "other",
+        "sub.foo",
+        "sub.items",
+        "sub.token",
+    ]
+    assert records[2]["value"] == [{"name": "one", "nested": {"x": 1}}]
+    assert records[3]["value"] == csspin.SECRET_MASK
+    assert "s3cr3t" not in tree.tree_dump(config)
+
+    yaml = ruamel.yaml.YAML(typ="safe", pure=True)
+    records = yaml.load(tree.tree_dump(config, "yaml", "sub.foo"))
+    assert len(records) == 1
+    assert records[0]["key"] == "sub.foo"
+    assert records[0]["value"] == "bar"
+
+    with raises(Abort):
+        list(tree.tree_dump_lines(config, select="sub.missing"))
+    with raises(Abort):
+        list(tree.tree_dump_lines(config, "xml"))
+
+
+def test_tree_dump_width() -> None:
+    """The location column of the text dump only depends on the dumped
+    tree"""
+    config = tree.ConfigTree(foo="bar")
+    tree.tree_set_keyinfo(config, "foo", tree.KeyInfo("/spin.yaml", 1))
+    before = tree.tree_dump(config)
+
+    other = tree.ConfigTree(foo="bar")
+    tree.tree_set_keyinfo(other, "foo", tree.KeyInfo("/" + "x" * 100, 10000))
+    assert tree.tree_dump(config) == before
+    assert before.index("|") == len("/spin.yaml:1:") + 1
+
+
+def test_keyinfo_map() -> None:
+    """_KeyInfoMap stores integer locations packed and returns KeyInfo
+    tuples"""
+    import pickle
+
+    infos = tree._KeyInfoMap()
+    infos["a"] = tree.KeyInfo("/a.yaml", 3)
+    infos["b"] = tree.KeyInfo("/b.yaml", "?")
+    assert isinstance(dict.__getitem__(infos, "a"), int)
+    assert infos["a"] == ("/a.yaml", 3)
+    assert infos["b"] == ("/b.yaml", "?")
+    assert infos.get("a") == ("/a.yaml", 3)
+    assert infos.get("c") is None
+    assert list(infos) == ["a", "b"]
+
+    copy = pickle.loads(pickle.dumps(infos))
+    assert isinstance(copy, tree._KeyInfoMap)
+    assert dict(copy.items()) == dict(infos.items())
+    assert copy["a"] == ("/a.yaml", 3)
+
+
 def test_keyinfo_callsite() -> None:
     """Function validating the source of assignment of config tree elements."""
     config = tree.ConfigTree(foo=None)
@@ -217,6 +300,25 @@ def test_tree_load() -> None:
     assert ki.line == 1
 
 
+def test_tree_copy() -> None:
+    """tree_copy copies subtrees and containers along with their locations,
+    so merging the copy doesn't modify the original"""
+    source = tree.ConfigTree(sub=tree.ConfigTree(items=["a"], mapping={"k": []}))
+    copy = tree.tree_copy(source)
+    assert copy == source
+    assert tree.tree_keyinfo(copy.sub, "items") == tree.tree_keyinfo(
+        source.sub, "items"
+    )
+    assert tree.tree_keyname(copy.sub, "items") == "sub->items"
+
+    target = tree.ConfigTree()
+    tree.tree_merge(target, copy)
+    target.sub["items"].append("b")
+    target.sub.mapping["k"].append(1)
+    target.sub.new = "value"
+    assert source == {"sub": {"items": ["a"], "mapping": {"k": []}}}
+
+
 def test_update() -> None:
     """Validating the update/override of configuration tree values."""
     a = tree.ConfigTree(sub=tree.ConfigTree(a="a"))
@@ -0,0 +1,129 @@
+# -*- mode: python; coding: utf-8 -*-
+#
+# Copyright (C) 2026 CONTACT Software GmbH
+# All rights reserved.
+# https://www.contact-software.com/
+
+"""Module implementing the unit tests of file scans and 'spin watch'."""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING
+
+import pytest
+from click import Abort
+
+import csspin
+from csspin import scanner, watch
+
+if TYPE_CHECKING:
+    from path import Path
+    from pytest_mock import MockerFixture
+
+    from csspin.tree import ConfigTree
+
+
+def _touch(path: Path, content: str = "") -> None:
+    path.dirname().makedirs_p()
+    path.write_text(content)
+
+
+def test_scan(tmp_path: Path) -> None:
+    """csspin.scanner.scan returns the files matching file names, directories
+    and glob patterns, skipping ignored names"""
+    for fn in ("a.py", "b.txt", "src/c.py", "src/sub/d.py", "src/.git/e.py"):
+        _touch(tmp_path / fn)
+    root = str(tmp_path).replace(os.sep, "/")
+
+    def names(*patterns: str) -> list:
+        snapshot = scanner.scan(patterns, root=str(tmp_path))
+        return sorted(path[len(root) + 1 :] for path in snapshot)  # noqa: E203
+
+    assert names("b.txt", "missing.txt") == ["b.txt"]
+    assert names("*.py") == ["a.py"]
+    assert names("src/*.py") == ["src/c.py"]
+    assert names("**/*.py") == ["a.py", "src/c.py", "src/sub/d.py"]
+    assert names("src") == ["src/c.py", "src/sub/d.py"]
+    assert names("[ab].*") == ["a.py", "b.txt"]
+    assert names(str(tmp_path / "src" / "sub")) == ["src/sub/d.py"]
+
+
+def test_changes(tmp_path: Path) -> None:
+    """csspin.scanner.changes reports added, removed and modified files"""
+    _touch(tmp_path / "keep.py")
+    _touch(tmp_path / "modify.py")
+    _touch(tmp_path / "remove.py")
+    before = scanner.scan(["*.py"], root=str(tmp_path))
+
+    _touch(tmp_path / "modify.py", "modified")
+    (tmp_path / "remove.py").remove()
+    _touch(tmp_path / "add.py")
+    after = scanner.scan(["*.py"], root=str(tmp_path))
+
+    assert [os.path.basename(fn) for fn in scanner.changes(before, after)] == [
+        "add.py",
+        "modify.py",
+        "remove.py",
+    ]
+    assert not scanner.changes(after, after)
+
+
+def test_watcher_debounces(tmp_path: Path) -> None:
+    """csspin.watch.Watcher.wait returns once the files stopped changing,
+    reporting all changes of a burst at once"""
+    _touch(tmp_path / "a.py")
+    # The first poll sees no change, then a burst of three edits follows
+    edits = iter([None, "a.py", "b.py", "a.py", None])
+    count = iter(range(100))
+
+    def sleep(_: float) -> None:
+        if fn := next(edits):
+            _touch(tmp_path / fn, "x" * next(count))
+
+    watcher = watch.Watcher(["*.py"], str(tmp_path), sleep=sleep)
+    assert [os.path.basename(fn) for fn in watcher.wait()] == ["a.py", "b.py"]
+
+
+def test_task_sources(cfg: ConfigTree) -> None:
+    """csspin.watch.task_sources follows the build rules of the task"""
+    cfg.build_rules = csspin.config(
+        **{
+            "task test": csspin.config(sources=["generated.py", "tests"]),
+            "generated.py": csspin.config(sources="generated.in", script=[]),
+        }
+    )
+    assert watch.task_sources(cfg, "test") == ["tests", "generated.in"]
+    assert not watch.task_sources(cfg, "lint")
+
+
+def test_watch(cfg: ConfigTree, tmp_path: Path, mocker: MockerFixture) -> None:
+    """csspin.watch.watch runs the task after each change until interrupted,
+    reloading the configuration only if the spinfile changed"""
+    cfg.spin.project_root = tmp_path
+    cfg.spin.spinfile = tmp_path / "spinfile.yaml"
+    spinfile = scanner.normalize(cfg.spin.spinfile)
+    mocker.patch("csspin.pluginlock.global_yaml_path", return_value=None)
+    run_task = mocker.patch("csspin.watch.run_task", return_value=True)
+    reload_tree = mocker.patch("csspin.watch.reload_tree", return_value=cfg)
+
+    class FakeWatcher:
+        snapshot: dict = {}
+
+        def __init__(self, patterns: list, *_: object) -> None:
+            assert patterns == ["src/*.py", spinfile]
+            self.changes = iter([["src/a.py"], [spinfile]])
+
+        def wait(self) -> list:
+            try:
+                return next(self.changes)
+            except StopIteration as exc:
+                raise KeyboardInterrupt from exc
+
+    watch.watch(cfg, ["test", "-k", "foo"], ["src/*.py"], watcher_factory=FakeWatcher)
+    assert run_task.call_count == 3
+    run_task.assert_called_with(["test", "-k", "foo"])
+    assert reload_tree.call_count == 1
+
+    with pytest.raises(Abort):
+        watch.watch(cfg, ["lint"], watcher_factory=FakeWatcher)